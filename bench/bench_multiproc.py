@@ -0,0 +1,192 @@
+"""Stresstest: mehrere Worker-Prozesse auf denselben Zustandsdateien.
+
+    python bench/bench_multiproc.py --procs 4 --threads 4 --signals 200
+    python bench/bench_multiproc.py --persist-mode journal --compact-every 50
+    python bench/bench_multiproc.py --storage sqlite
+    python bench/bench_multiproc.py --no-lock        # zum Vergleich: STATE_CROSS_PROCESS=0
+
+Startet --procs Prozesse (je wie ein gunicorn-Worker: eigenes "import main")
+in einem gemeinsamen Temp-Verzeichnis. Jeder Thread legt --signals Bot-Signale
+mit eindeutiger id an, bestätigt sie für einen eigenen Client
+(remember_client_ack) und legt jeden 10. Durchlauf einen VIP-Trade an. Danach
+prüft jeder Worker, ob er die Signale aller anderen sieht, und ein frischer
+Prozess zählt nach: fehlende Signale, verlorene/veraltete Acks, fehlende
+Trades. Exit-Code 1, wenn etwas verloren ging.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def worker_env(args) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "RUN_MONITOR": "0",
+        "MONITOR_DEBUG": "0",
+        "STATE_CROSS_PROCESS": "0" if args.no_lock else "1",
+        "STATE_SYNC_POLL_SEC": "0.1",
+        "STORAGE_BACKEND": args.storage,
+        "BOT_PERSIST_MODE": args.persist_mode,
+        "BOT_JOURNAL_COMPACT_EVERY": str(args.compact_every),
+        "BOT_SIGNALS_MAX": "0",
+        "BOT_SIGNAL_TTL_SEC": "86400",
+        "BOT_REQUIRE_TIME": "0",
+    })
+    return env
+
+
+def wait_for(paths, timeout: float):
+    deadline = time.time() + timeout
+    while not all(os.path.exists(p) for p in paths):
+        if time.time() > deadline:
+            raise SystemExit("❌ Worker-Barriere: Timeout")
+        time.sleep(0.02)
+
+
+def run_worker(args):
+    sys.path.insert(0, ROOT)
+    import main  # noqa: E402
+
+    k = args.worker
+    errors = []
+
+    def thread(t: int):
+        client = f"w{k}t{t}"
+        last = None
+        for i in range(args.signals):
+            sig_id = f"sig_w{k}_t{t}_{i}"
+            try:
+                ok, status, _ = main.save_bot_signal("BTCUSD", "long", 100.0 + i, "5", client_id=client, sig_id=sig_id)
+                if not ok:
+                    errors.append(f"{sig_id}: {status}")
+                main.remember_client_ack(client, sig_id)
+                last = sig_id
+                if i % 10 == 0:
+                    main.save_trade("BTCUSD", 100.0, 99.0, 101.0, 102.0, 103.0, "long", meta={"stress": f"w{k}t{t}i{i}"})
+            except Exception as e:
+                errors.append(f"{sig_id}: {e}")
+        return last
+
+    wait_for([args.start_file], 60)
+    started = time.perf_counter()
+    threads = [threading.Thread(target=thread, args=(t,)) for t in range(args.threads)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    elapsed = time.perf_counter() - started
+
+    # Barriere: erst zählen, wenn alle Worker fertig geschrieben haben
+    open(os.path.join(args.workdir, f"done.{k}"), "w").close()
+    wait_for([os.path.join(args.workdir, f"done.{n}") for n in range(args.procs)], 300)
+    visible = len(main.cleanup_bot_signals())
+    print(json.dumps({"worker": k, "seconds": round(elapsed, 3), "visible": visible, "errors": errors[:5], "error_count": len(errors)}), flush=True)
+    return 0
+
+
+def run_verify(args):
+    sys.path.insert(0, ROOT)
+    import main  # noqa: E402
+
+    ids = {s["id"] for s in main.cleanup_bot_signals()}
+    clients = main.load_clients()
+    trades = main.load_trades()
+    expected_ids = {f"sig_w{k}_t{t}_{i}" for k in range(args.procs) for t in range(args.threads) for i in range(args.signals)}
+    last_ack = {f"w{k}t{t}": f"sig_w{k}_t{t}_{args.signals - 1}" for k in range(args.procs) for t in range(args.threads)}
+    stress_trades = {(t.get("meta") or {}).get("stress") for t in trades} - {None}
+    expected_trades = {f"w{k}t{t}i{i}" for k in range(args.procs) for t in range(args.threads) for i in range(0, args.signals, 10)}
+    print(json.dumps({
+        "signals_expected": len(expected_ids),
+        "signals_missing": len(expected_ids - ids),
+        "acks_expected": len(last_ack),
+        "acks_lost": sum(1 for c, sig_id in last_ack.items() if (clients.get(c) or {}).get("last_ack_id") != sig_id),
+        "trades_expected": len(expected_trades),
+        "trades_missing": len(expected_trades - stress_trades),
+    }), flush=True)
+    return 0
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--procs", type=int, default=4)
+    ap.add_argument("--threads", type=int, default=4, help="Threads pro Prozess (gthread)")
+    ap.add_argument("--signals", type=int, default=200, help="Signale pro Thread")
+    ap.add_argument("--storage", choices=["json", "sqlite"], default="json")
+    ap.add_argument("--persist-mode", choices=["json", "journal"], default="json")
+    ap.add_argument("--compact-every", type=int, default=100, help="BOT_JOURNAL_COMPACT_EVERY")
+    ap.add_argument("--no-lock", action="store_true", help="ohne STATE_CROSS_PROCESS (Vergleich)")
+    ap.add_argument("--keep", action="store_true", help="Temp-Verzeichnis nicht löschen")
+    ap.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    ap.add_argument("--verify", action="store_true", help=argparse.SUPPRESS)
+    ap.add_argument("--workdir", help=argparse.SUPPRESS)
+    ap.add_argument("--start-file", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker is not None:
+        return run_worker(args)
+    if args.verify:
+        return run_verify(args)
+
+    workdir = tempfile.mkdtemp(prefix="bench_multiproc_")
+    start_file = os.path.join(workdir, "start")
+    env = worker_env(args)
+    common = [
+        "--procs", str(args.procs), "--threads", str(args.threads), "--signals", str(args.signals),
+        "--workdir", workdir, "--start-file", start_file,
+    ]
+    try:
+        procs = [
+            subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "--worker", str(k)] + common,
+                cwd=workdir, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+            )
+            for k in range(args.procs)
+        ]
+        time.sleep(1.0)  # Imports abwarten, dann alle gleichzeitig loslassen
+        open(start_file, "w").close()
+        workers = []
+        for p in procs:
+            out, _ = p.communicate(timeout=600)
+            lines = [ln for ln in out.splitlines() if ln.startswith("{")]
+            workers.append(json.loads(lines[-1]) if lines else {"error": "keine Ausgabe", "returncode": p.returncode})
+
+        verify_env = dict(env, STATE_CROSS_PROCESS="1")
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--verify"] + common,
+            cwd=workdir, env=verify_env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, timeout=300,
+        ).stdout
+        result = json.loads([ln for ln in out.splitlines() if ln.startswith("{")][-1])
+    finally:
+        if args.keep:
+            print(f"Verzeichnis: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    total = args.procs * args.threads * args.signals
+    slowest = max((w.get("seconds", 0) for w in workers), default=0)
+    mode = "ohne Dateilock" if args.no_lock else "STATE_CROSS_PROCESS=1"
+    print(f"Storage={args.storage} Persist={args.persist_mode} {mode}: {args.procs} Prozesse x {args.threads} Threads")
+    print(f"Signale gesamt={total}  Dauer={slowest:.2f}s  ({total / max(slowest, 1e-9):,.0f} Signale+Acks/s)")
+    for w in workers:
+        print(f"  Worker {w.get('worker')}: {w.get('seconds')}s, sieht {w.get('visible')}/{total} Signale, Fehler={w.get('error_count', w.get('error'))}")
+    print(
+        f"Fehlende Signale={result['signals_missing']}/{result['signals_expected']}  "
+        f"Verlorene Acks={result['acks_lost']}/{result['acks_expected']}  "
+        f"Fehlende Trades={result['trades_missing']}/{result['trades_expected']}"
+    )
+    lost = result["signals_missing"] + result["acks_lost"] + result["trades_missing"]
+    lost += sum(total - (w.get("visible") or 0) for w in workers)
+    print("✅ nichts verloren" if lost == 0 else "❌ Daten verloren")
+    return 0 if lost == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,226 @@
+"""Monitor-Tick-Dauer und Alert-Latenz gegen den lokalen Provider-Simulator.
+
+    python bench/bench_providers.py --scenario healthy --duration 60
+    python bench/bench_providers.py --scenario metals_monthly_429 --symbols XAUUSD,BTCUSD --json
+    PRICE_TTL_METALS_SEC=5 python bench/bench_providers.py --scenario slow
+
+Startet tools/provider_sim.py als eigenen Prozess, zeigt alle API-Basen der
+App dorthin und treibt check_trades() im eigenen Thread wie monitor_loop()
+(inkl. adaptiver Pause; Ausgaben der App nur mit --verbose). Neben --trades
+Hintergrund-Trades mit weit entfernten Levels legt der Harness pro Sprung
+einen frischen Long-Trade an, setzt den Preis im Simulator über TP1 und misst
+die Zeit bis die TP1-Nachricht beim simulierten Telegram ankommt.
+Ausgabe: Tick-Perzentile, Alert-Latenzen, Provider-Calls/Fehler/429 laut
+Simulator, Cache-Trefferquote und aktive Cooldowns der App.
+"""
+import argparse
+import contextlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SIM = os.path.join(ROOT, "tools", "provider_sim.py")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_sim(args):
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, SIM, "--port", str(port), "--scenario", args.scenario, "--seed", str(args.seed)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 20
+    while time.time() < deadline:
+        try:
+            requests.get(f"{base}/_sim/stats", timeout=1)
+            return proc, base
+        except requests.RequestException:
+            time.sleep(0.1)
+    proc.terminate()
+    raise SystemExit("❌ Provider-Simulator nicht erreichbar")
+
+
+def import_app(base: str, workdir: str):
+    os.environ.update({
+        "RUN_MONITOR": "0",
+        "MONITOR_DEBUG": "0",
+        "TELEGRAM_BOT_TOKEN": "bench",
+        "TELEGRAM_CHAT_ID": "1",
+        "METALS_API_KEY": "bench",
+        "TWELVE_API_KEY": "bench",
+        "TELEGRAM_API_BASE": base,
+        "COINGECKO_API_BASE": base,
+        "METALS_API_BASE": base,
+        "TWELVE_API_BASE": base,
+    })
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+    import main  # noqa: E402
+
+    return main
+
+
+def sim_keys(main, symbol: str):
+    # Schlüssel, unter denen der Simulator den Preis führt (inkl. Fallback-Provider)
+    keys = [main.convert_symbol_for_twelve(symbol)]
+    if symbol in main.COINGECKO_MAP:
+        keys.append(main.COINGECKO_MAP[symbol])
+    if symbol in main.METALS_SYMBOLS:
+        keys.append("XAU" if "XAU" in symbol else "XAG")
+    return keys
+
+
+def pct(values, q):
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 1) if values else None
+
+
+def run(args, main, base: str):
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+    sim = requests.Session()
+
+    def sim_price(symbol: str) -> float:
+        prices = sim.get(f"{base}/_sim/prices", timeout=5).json()
+        return float(prices.get(sim_keys(main, symbol)[0], 100.0))
+
+    def set_price(symbol: str, price: float):
+        for key in sim_keys(main, symbol):
+            sim.post(f"{base}/_sim/price", json={"symbol": key, "price": price}, timeout=5)
+
+    # Hintergrundlast: Levels ±5..10 % entfernt, lösen im Lauf nicht aus
+    for i in range(args.trades):
+        symbol = symbols[i % len(symbols)]
+        p = sim_price(symbol)
+        side = "long" if i % 2 else "short"
+        d = 1 if side == "long" else -1
+        main.save_trade(symbol, p, p * (1 - d * 0.05), p * (1 + d * 0.06), p * (1 + d * 0.08), p * (1 + d * 0.10), side)
+
+    ticks = []
+    stop = threading.Event()
+
+    def monitor():
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                main.check_trades()
+            except Exception as e:
+                print(f"❌ check_trades: {e}", flush=True)
+            ticks.append(time.perf_counter() - t0)
+            stop.wait(main._monitor_sleep_sec())
+
+    th = threading.Thread(target=monitor, daemon=True)
+    th.start()
+
+    jumps = []
+    gap = args.duration / (args.jumps + 1)
+    started = time.time()
+    for k in range(args.jumps):
+        symbol = symbols[k % len(symbols)]
+        p = sim_price(symbol)
+        main.save_trade(symbol, p, p * 0.98, p * 1.01, p * 1.02, p * 1.03, "long")
+        stop.wait(max(0.0, started + (k + 1) * gap - time.time()))
+        jumps.append((symbol, time.time()))
+        set_price(symbol, p * 1.015)
+    stop.wait(max(0.0, started + args.duration - time.time()))
+
+    def match():
+        messages = sim.get(f"{base}/_sim/telegram", timeout=5).json()
+        found, missing = [], []
+        for symbol, at in jumps:
+            hit = next((m for m in messages if m["recv_ts"] >= at and f"*{symbol}*" in m["text"] and "TP1" in m["text"]), None)
+            if hit is None:
+                missing.append(symbol)
+            else:
+                found.append(hit["recv_ts"] - at)
+        return found, missing
+
+    # Monitor läuft weiter, bis alle Sprünge gemeldet sind (max. --settle)
+    deadline = time.time() + args.settle
+    latencies, missed = match()
+    while missed and time.time() < deadline:
+        stop.wait(0.5)
+        latencies, missed = match()
+    stop.set()
+    th.join(30)
+
+    cache = main.price_cache_status()
+    now_ts = time.time()
+    return {
+        "scenario": args.scenario,
+        "duration_sec": args.duration,
+        "open_trades": args.trades + args.jumps,
+        "ticks": {
+            "count": len(ticks),
+            "p50_ms": pct(ticks, 0.50), "p90_ms": pct(ticks, 0.90), "p99_ms": pct(ticks, 0.99),
+            "max_ms": round(max(ticks) * 1000, 1) if ticks else None,
+        },
+        "alerts": {
+            "jumps": len(jumps), "delivered": len(latencies), "missed": missed,
+            "p50_ms": pct(latencies, 0.50), "p90_ms": pct(latencies, 0.90),
+            "max_ms": round(max(latencies) * 1000, 1) if latencies else None,
+        },
+        "providers": sim.get(f"{base}/_sim/stats", timeout=5).json()["stats"],
+        "price_cache": {k: cache[k] for k in ("hits", "stale_hits", "misses", "refreshes", "hit_ratio")},
+        "cooldowns_sec": {
+            "metals": round(max(0.0, main.METALS_API_COOLDOWN_UNTIL - now_ts)),
+            "twelve": round(max(0.0, main.TWELVE_API_COOLDOWN_UNTIL - now_ts)),
+        },
+        "telegram": dict(main._tg_stats),
+    }
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scenario", default="healthy", help="Szenario-Name aus tools/provider_sim.py oder JSON-Datei")
+    ap.add_argument("--symbols", default="BTCUSD,ETHUSD,XAUUSD,EURUSD,NAS100")
+    ap.add_argument("--trades", type=int, default=200, help="Hintergrund-Trades")
+    ap.add_argument("--jumps", type=int, default=10, help="Preissprünge über TP1")
+    ap.add_argument("--duration", type=float, default=60.0)
+    ap.add_argument("--settle", type=float, default=60.0, help="max. Nachlauf für ausstehende Alerts")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--verbose", action="store_true", help="Ausgaben der App nicht unterdrücken")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    proc, base = start_sim(args)
+    try:
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else open(os.devnull, "w")):
+            main = import_app(base, tempfile.mkdtemp(prefix="bench_providers_"))
+            result = run(args, main, base)
+    finally:
+        proc.terminate()
+        proc.wait(10)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+
+    t, a = result["ticks"], result["alerts"]
+    print(f"Szenario={result['scenario']} Dauer={args.duration:g}s Trades={result['open_trades']}")
+    print(f"Monitor-Tick   n={t['count']}  p50={t['p50_ms']} ms  p90={t['p90_ms']} ms  p99={t['p99_ms']} ms  max={t['max_ms']} ms")
+    print(f"Alert-Latenz   {a['delivered']}/{a['jumps']}  p50={a['p50_ms']} ms  p90={a['p90_ms']} ms  max={a['max_ms']} ms"
+          + (f"  verpasst: {','.join(a['missed'])}" if a["missed"] else ""))
+    for provider, st in sorted(result["providers"].items()):
+        print(f"{provider:<10} calls={st['calls']} errors={st['errors']} quota_429={st['quota_429']} rate_429={st['rate_429']}")
+    c = result["price_cache"]
+    print(f"Preis-Cache    hits={c['hits']} stale={c['stale_hits']} misses={c['misses']} ratio={c['hit_ratio']}")
+    print(f"Cooldowns      metals={result['cooldowns_sec']['metals']}s twelve={result['cooldowns_sec']['twelve']}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,325 @@
+"""Lasttest für die Flask-Routen mit lokalen Stand-ins für Telegram und Preis-APIs.
+
+    python bench/bench_routes.py --requests 500 --concurrency 8 --clients 50
+    python bench/bench_routes.py --routes bot_webhook,bot_next --storage sqlite --json
+
+Startet drei Prozesse: Stand-in-Server (Telegram sendMessage, CoinGecko,
+MetalsAPI, TwelveData mit fester Latenz), die App (gunicorn -k gevent wie in
+render.yaml, --worker gthread zum Vergleich, ohne gunicorn werkzeug threaded)
+in einem leeren Temp-Verzeichnis und den Lastgenerator. Pro Route: Durchsatz, Latenz-Perzentile, Fehler und
+I/O pro Request (JSON-Dateien, Journale, SQLite-Tabellen; Differenz von
+/monitor_status -> file_io).
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SECRET = "bench"
+SYMBOLS = ["BTCUSD", "ETHUSD", "XAUUSD", "EURUSD", "NAS100"]
+ROUTES = ["webhook", "bot_webhook", "bot_next", "add_manual", "trades", "bot_signals", "monitor_status"]
+
+
+# ---------------------------------------------------------------------
+# Stand-ins (eigener Prozess)
+# ---------------------------------------------------------------------
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.03
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, payload: dict):
+        time.sleep(self.latency)
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        if self.path.endswith("/sendMessage"):
+            self._reply({"ok": True, "result": {"message_id": random.randint(1, 1 << 30)}})
+        else:
+            self._reply({"ok": False})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == "/api/v3/simple/price":
+            self._reply({i: {"usd": 100.0 + random.random()} for i in q.get("ids", "").split(",") if i})
+        elif url.path == "/api/latest":
+            self._reply({"success": True, "rates": {"USD": 2400.0, "XAU": 1 / 2400.0, "XAG": 1 / 30.0}})
+        elif url.path == "/price":
+            syms = [s for s in q.get("symbol", "").split(",") if s]
+            if len(syms) == 1:
+                self._reply({"price": "1.2345"})
+            else:
+                self._reply({s: {"price": "1.2345"} for s in syms})
+        else:
+            self._reply({})
+
+
+def serve_stubs(port: int, latency_ms: float):
+    StubHandler.latency = latency_ms / 1000.0
+    ThreadingHTTPServer(("127.0.0.1", port), StubHandler).serve_forever()
+
+
+def serve_app(port: int):
+    sys.path.insert(0, ROOT)
+    from werkzeug.serving import make_server
+
+    import main
+
+    make_server("127.0.0.1", port, main.app, threaded=True).serve_forever()
+
+
+# ---------------------------------------------------------------------
+# Prozesse
+# ---------------------------------------------------------------------
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_http(url: str, timeout: float = 20.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.1)
+    raise SystemExit(f"❌ {url} nicht erreichbar")
+
+
+def start_processes(args, workdir: str):
+    stub_port, app_port = free_port(), free_port()
+    stub = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve-stubs", str(stub_port), "--stub-latency-ms", str(args.stub_latency_ms)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    wait_http(f"http://127.0.0.1:{stub_port}/")
+
+    base = f"http://127.0.0.1:{stub_port}"
+    env = dict(os.environ)
+    env.update({
+        "RUN_MONITOR": "1" if args.monitor else "0",
+        "MONITOR_DEBUG": "0",
+        "RT_SECRET": SECRET,
+        "TELEGRAM_BOT_TOKEN": "bench",
+        "TELEGRAM_CHAT_ID": "1",
+        "METALS_API_KEY": "bench",
+        "TWELVE_API_KEY": "bench",
+        "TELEGRAM_API_BASE": base,
+        "COINGECKO_API_BASE": base,
+        "METALS_API_BASE": base,
+        "TWELVE_API_BASE": base,
+        "TELEGRAM_GLOBAL_PER_SEC": "1000",
+        "TELEGRAM_CHAT_PER_MIN": "100000",
+        "TELEGRAM_CHAT_BURST": "1000",
+        "TELEGRAM_QUEUE_MAX": "100000",
+        "STORAGE_BACKEND": args.storage,
+        "BOT_PERSIST_MODE": args.persist_mode,
+        "BOT_SIGNALS_MAX": str(args.signals_max),
+        "WEB_THREADS": str(args.threads),
+        "WEB_CONNECTIONS": str(args.connections),
+    })
+
+    server = args.server
+    if server == "auto":
+        server = "gunicorn" if shutil.which("gunicorn") else "werkzeug"
+    if server == "gunicorn":
+        if args.worker == "gevent":
+            worker = ["-k", "gevent", "--worker-connections", str(args.connections)]
+        else:
+            worker = ["--threads", str(args.threads)]
+        cmd = ["gunicorn", "main:app", "--workers", "1"] + worker + ["--pythonpath", ROOT,
+               "-b", f"127.0.0.1:{app_port}", "--log-level", "warning"]
+    else:
+        cmd = [sys.executable, os.path.abspath(__file__), "--serve-app", str(app_port)]
+    app = subprocess.Popen(cmd, cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_http(f"http://127.0.0.1:{app_port}/")
+    return stub, app, f"http://127.0.0.1:{app_port}", server
+
+
+# ---------------------------------------------------------------------
+# Last
+# ---------------------------------------------------------------------
+_counter = [0]
+_counter_lock = threading.Lock()
+
+
+def next_n() -> int:
+    with _counter_lock:
+        _counter[0] += 1
+        return _counter[0]
+
+
+def make_request(route: str, args, client_no: int):
+    n = next_n()
+    symbol = SYMBOLS[n % len(SYMBOLS)]
+    side = "long" if n % 2 else "short"
+    if route == "webhook":
+        entry, d = 100.0 + n % 50, 1 if side == "long" else -1
+        return "POST", "/webhook", {
+            "key": SECRET, "cmd": "ENTRY", "symbol": symbol, "side": side, "entry": entry,
+            "slf": entry - d, "tp1": entry + d, "tp3": entry + 2 * d, "tp5": entry + 3 * d,
+        }
+    if route == "bot_webhook":
+        tv_time = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        return "POST", "/bot_webhook", {
+            "key": SECRET, "cmd": "ENTRY", "symbol": symbol, "side": side, "entry": 100 + n, "tf": "5",
+            "time": tv_time, "client": f"c{n % args.clients}",
+        }
+    if route == "bot_next":
+        return "GET", f"/bot_next?client=c{client_no}", None
+    if route == "add_manual":
+        return "POST", "/add_manual", {"symbol": symbol, "side": "long", "entry": 100, "sl": 99, "tp1": 101, "tp2": 102, "tp3": 103}
+    if route == "bot_signals":
+        return "GET", "/bot_signals?limit=200", None
+    return "GET", f"/{route}", None
+
+
+def file_io(base: str) -> dict:
+    try:
+        return requests.get(f"{base}/monitor_status", timeout=10).json().get("file_io", {})
+    except Exception:
+        return {}
+
+
+def io_delta(before: dict, after: dict, n: int) -> dict:
+    out = {"reads": 0, "writes": 0, "read_bytes": 0, "write_bytes": 0}
+    for path, st in after.items():
+        prev = before.get(path, {})
+        for k in out:
+            out[k] += st.get(k, 0) - prev.get(k, 0)
+    return {k: round(v / max(1, n), 2) for k, v in out.items()}
+
+
+def run_route(base: str, route: str, args) -> dict:
+    # bot_next: ein Worker pro Client (Polling), sonst --concurrency Worker
+    workers = args.clients if route == "bot_next" else args.concurrency
+    per_worker = max(1, args.requests // workers)
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def worker(k: int):
+        s = requests.Session()
+        local = []
+        for _ in range(per_worker):
+            method, path, body = make_request(route, args, k)
+            t0 = time.perf_counter()
+            try:
+                r = s.request(method, base + path, json=body, timeout=60)
+                ok = r.status_code < 400
+            except requests.RequestException:
+                ok = False
+            local.append(time.perf_counter() - t0)
+            if not ok:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(local)
+
+    before = file_io(base)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        list(ex.map(worker, range(workers)))
+    elapsed = time.perf_counter() - t0
+    after = file_io(base)
+
+    lat = sorted(latencies)
+
+    def pct(q):
+        return round(lat[min(len(lat) - 1, int(q * len(lat)))] * 1000, 2) if lat else None
+
+    return {
+        "route": route,
+        "requests": len(lat),
+        "workers": workers,
+        "errors": errors[0],
+        "rps": round(len(lat) / elapsed, 1) if elapsed else None,
+        "p50_ms": pct(0.50),
+        "p90_ms": pct(0.90),
+        "p99_ms": pct(0.99),
+        "max_ms": round(lat[-1] * 1000, 2) if lat else None,
+        "mean_ms": round(statistics.mean(lat) * 1000, 2) if lat else None,
+        "io_per_req": io_delta(before, after, len(lat)),
+    }
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--routes", default=",".join(ROUTES))
+    ap.add_argument("--requests", type=int, default=500, help="Requests pro Route")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--clients", type=int, default=50, help="Polling-Clients für /bot_next")
+    ap.add_argument("--server", choices=["auto", "gunicorn", "werkzeug"], default="auto")
+    ap.add_argument("--worker", choices=["gevent", "gthread"], default="gevent", help="gunicorn-Worker (render.yaml: gevent)")
+    ap.add_argument("--threads", type=int, default=8, help="gunicorn --threads (gthread)")
+    ap.add_argument("--connections", type=int, default=1000, help="gunicorn --worker-connections (gevent)")
+    ap.add_argument("--storage", choices=["json", "sqlite"], default="json")
+    ap.add_argument("--persist-mode", choices=["json", "journal"], default="json")
+    ap.add_argument("--signals-max", type=int, default=3000)
+    ap.add_argument("--stub-latency-ms", type=float, default=30.0)
+    ap.add_argument("--monitor", action="store_true", help="VIP-Monitor mitlaufen lassen")
+    ap.add_argument("--json", action="store_true")
+    ap.add_argument("--serve-stubs", type=int, help=argparse.SUPPRESS)
+    ap.add_argument("--serve-app", type=int, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.serve_stubs:
+        serve_stubs(args.serve_stubs, args.stub_latency_ms)
+        return 0
+    if args.serve_app:
+        serve_app(args.serve_app)
+        return 0
+
+    workdir = tempfile.mkdtemp(prefix="bench_routes_")
+    stub, app, base, server = start_processes(args, workdir)
+    try:
+        results = [run_route(base, r.strip(), args) for r in args.routes.split(",") if r.strip()]
+    finally:
+        app.terminate()
+        stub.terminate()
+        app.wait(10)
+        stub.wait(10)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps({"server": server, "storage": args.storage, "persist_mode": args.persist_mode, "results": results}, indent=2))
+        return 0
+
+    print(f"Server={server} Storage={args.storage} Persist={args.persist_mode} Stand-in-Latenz={args.stub_latency_ms:g} ms")
+    print(f"{'Route':<15}{'Req':>6}{'Fehler':>7}{'req/s':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}  I/O pro Request")
+    for r in results:
+        io = r["io_per_req"]
+        print(
+            f"{r['route']:<15}{r['requests']:>6}{r['errors']:>7}{r['rps']:>9}{r['p50_ms']:>9}{r['p90_ms']:>9}{r['p99_ms']:>9}{r['max_ms']:>9}"
+            f"  R={io['reads']} ({io['read_bytes']:.0f} B)  W={io['writes']} ({io['write_bytes']:.0f} B)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
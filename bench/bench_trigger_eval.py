@@ -0,0 +1,118 @@
+"""Benchmark: Trigger-Auswertung Schleife (evaluate_trade) vs. TradeBook (NumPy).
+
+    python bench/bench_trigger_eval.py --trades 5000 --symbols 20 --ticks 50
+
+Prüft nebenbei, dass beide Varianten exakt dieselben Übergänge liefern.
+"""
+import argparse
+import copy
+import os
+import random
+import statistics
+import sys
+import time
+
+os.environ.setdefault("RUN_MONITOR", "0")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import main  # noqa: E402
+
+
+def make_trades(n: int, symbols, base: dict, rng: random.Random):
+    trades = []
+    for _ in range(n):
+        symbol = rng.choice(symbols)
+        side = rng.choice(["long", "short"])
+        entry = base[symbol] * (1 + rng.uniform(-0.002, 0.002))
+        sl = main.calc_sl(entry, side)
+        tp1, tp2, tp3 = main.calc_tp(entry, sl, side, symbol)
+        trades.append({
+            "symbol": symbol, "side": side, "entry": entry, "sl": sl,
+            "tp1": tp1, "tp2": tp2, "tp3": tp3,
+            "tp1_hit": False, "tp2_hit": False, "tp3_hit": False, "sl_hit": False, "closed": False,
+        })
+    return trades
+
+
+def price_path(symbols, base: dict, ticks: int, rng: random.Random):
+    prices = dict(base)
+    path = []
+    for _ in range(ticks):
+        prices = {s: p * (1 + rng.gauss(0, 0.0015)) for s, p in prices.items()}
+        path.append(dict(prices))
+    return path
+
+
+def run_loop(trades, path):
+    out = []
+    t0 = time.perf_counter()
+    for prices in path:
+        for i, t in enumerate(trades):
+            if t["closed"]:
+                continue
+            events = main.evaluate_trade(t, prices[t["symbol"]])
+            if events:
+                out.append((i, tuple(events)))
+    return time.perf_counter() - t0, out
+
+
+def run_book(trades, path, rebuild: bool = False):
+    # rebuild=True: Buch vor jedem Tick aus den Dicts neu bauen (Kosten ohne residentes Buch)
+    out = []
+    t0 = time.perf_counter()
+    book = main.TradeBook.from_trades(trades)
+    build = time.perf_counter() - t0
+    for prices in path:
+        if rebuild:
+            book = main.TradeBook.from_trades(trades)
+        for row, events, flags in book.evaluate(prices):
+            book.apply(trades[row], events, flags)
+            out.append((row, tuple(events)))
+    return time.perf_counter() - t0, build, out
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--trades", type=int, default=5000)
+    ap.add_argument("--symbols", type=int, default=20)
+    ap.add_argument("--ticks", type=int, default=50)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    if main.np is None:
+        print("numpy nicht installiert – TradeBook nicht verfügbar")
+        return 1
+
+    rng = random.Random(args.seed)
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    base = {s: rng.uniform(10, 5000) for s in symbols}
+    trades = make_trades(args.trades, symbols, base, rng)
+    path = price_path(symbols, base, args.ticks, rng)
+
+    loop_times, book_times, rebuild_times, builds = [], [], [], []
+    for _ in range(args.repeat):
+        a, b, c = copy.deepcopy(trades), copy.deepcopy(trades), copy.deepcopy(trades)
+        lt, lout = run_loop(a, path)
+        bt, build, bout = run_book(b, path)
+        rt, _, rout = run_book(c, path, rebuild=True)
+        if lout != bout or lout != rout or a != b or a != c:
+            print("❌ Abweichung zwischen Schleife und TradeBook")
+            return 1
+        loop_times.append(lt)
+        book_times.append(bt)
+        rebuild_times.append(rt)
+        builds.append(build)
+
+    # alle Zeiten inkl. Aufbau des Buchs
+    lt, bt, rt = statistics.median(loop_times), statistics.median(book_times), statistics.median(rebuild_times)
+    print(f"Trades={args.trades} Symbole={args.symbols} Ticks={args.ticks} Übergänge={len(lout)}")
+    print(f"Schleife              : {lt * 1000:8.1f} ms gesamt  {lt / args.ticks * 1000:7.3f} ms/Tick")
+    print(f"TradeBook resident    : {bt * 1000:8.1f} ms gesamt  {bt / args.ticks * 1000:7.3f} ms/Tick  "
+          f"(davon Aufbau einmalig {statistics.median(builds) * 1000:.1f} ms)  Faktor {lt / bt:5.1f}x")
+    print(f"TradeBook je Tick neu : {rt * 1000:8.1f} ms gesamt  {rt / args.ticks * 1000:7.3f} ms/Tick  Faktor {lt / rt:5.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
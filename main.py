@@ -3,12 +3,38 @@ import time
 import json
 import threading
 import hashlib
+import atexit
+import socket
+import sqlite3
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait as futures_wait
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timezone, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 import requests
 
+try:
+    import numpy as np
+except ImportError:  # optional: nur für große Trade-Bücher (vektorisierte Auswertung)
+    np = None
+
+try:
+    import websocket  # websocket-client
+except ImportError:  # optional: nur für PRICE_FEED_URL=ws://...
+    websocket = None
+
+try:
+    from gevent import monkey as gevent_monkey  # gunicorn -k gevent (render.yaml)
+except ImportError:  # optional: ohne gevent nur gthread/werkzeug
+    gevent_monkey = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: keine Dateilocks, STATE_CROSS_PROCESS wirkt dann nicht
+    fcntl = None
+
 app = Flask(__name__)
 
 # =============================================================================
@@ -19,6 +45,15 @@ CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID", "").strip()
 METALS_API_KEY = os.environ.get("METALS_API_KEY", "").strip()
 TWELVE_API_KEY = os.environ.get("TWELVE_API_KEY", "").strip()
 
+# API-Basis-URLs (überschreibbar für lokale Stand-ins, z.B. bench/bench_routes.py)
+TELEGRAM_API_BASE = os.environ.get("TELEGRAM_API_BASE", "https://api.telegram.org").strip().rstrip("/")
+COINGECKO_API_BASE = os.environ.get("COINGECKO_API_BASE", "https://api.coingecko.com").strip().rstrip("/")
+METALS_API_BASE = os.environ.get("METALS_API_BASE", "https://metals-api.com").strip().rstrip("/")
+TWELVE_API_BASE = os.environ.get("TWELVE_API_BASE", "https://api.twelvedata.com").strip().rstrip("/")
+
+# Präfix für alle /metrics-Namen
+METRICS_PREFIX = os.environ.get("METRICS_PREFIX", "tvtg_").strip()
+
 # API Cooldowns bei 429
 METALS_API_COOLDOWN_UNTIL = 0.0
 TWELVE_API_COOLDOWN_UNTIL = 0.0
@@ -30,6 +65,10 @@ BOT_SECRET = os.environ.get("BOT_SECRET", "").strip() or RT_SECRET
 
 # Files
 TRADES_FILE = os.environ.get("TRADES_FILE", "trades.json").strip()
+# Archiv: geschlossene Trades wandern nach N Sekunden in Tagesdateien (JSONL)
+TRADES_HISTORY_DIR = os.environ.get("TRADES_HISTORY_DIR", "trades_history").strip()
+TRADES_ARCHIVE_AFTER_SEC = max(0, int(os.environ.get("TRADES_ARCHIVE_AFTER_SEC", "3600")))
+TRADES_ARCHIVE_EVERY_SEC = max(0, int(os.environ.get("TRADES_ARCHIVE_EVERY_SEC", "300")))  # 0 = aus
 ERRORS_FILE = os.environ.get("ERRORS_FILE", "errors.log").strip()
 
 BOT_SIGNALS_FILE = os.environ.get("BOT_SIGNALS_FILE", "bot_signals.json").strip()
@@ -37,7 +76,27 @@ BOT_SIGNALS_MAX = int(os.environ.get("BOT_SIGNALS_MAX", "3000"))
 BOT_STATE_FILE = os.environ.get("BOT_STATE_FILE", "bot_state.json").strip()
 BOT_CLIENTS_FILE = os.environ.get("BOT_CLIENTS_FILE", "bot_clients.json").strip()
 
+# Speicher-Backend: json (Dateien oben) | sqlite (eine DB im WAL-Modus)
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "json").strip().lower()
+STORAGE_DB_FILE = os.environ.get("STORAGE_DB_FILE", "storage.db").strip()
+
 RUN_MONITOR = os.environ.get("RUN_MONITOR", "1").strip() != "0"
+# 0 = nur als Bibliothek importieren (tools/): Bot-Store erst bei Bedarf laden, kein Monitor
+APP_STARTUP = os.environ.get("APP_STARTUP", "1").strip() != "0"
+
+# =============================================================================
+# TELEGRAM DELIVERY (Queue + Worker)
+# =============================================================================
+TELEGRAM_QUEUE_MAX = max(1, int(os.environ.get("TELEGRAM_QUEUE_MAX", "500")))
+TELEGRAM_WORKERS = max(1, int(os.environ.get("TELEGRAM_WORKERS", "2")))
+# drop_oldest = älteste Nachricht verwerfen, drop_new = neue Nachricht ablehnen
+TELEGRAM_QUEUE_OVERFLOW = os.environ.get("TELEGRAM_QUEUE_OVERFLOW", "drop_oldest").strip().lower()
+TELEGRAM_DRAIN_SEC = max(0, int(os.environ.get("TELEGRAM_DRAIN_SEC", "5")))
+TELEGRAM_GLOBAL_PER_SEC = max(1.0, float(os.environ.get("TELEGRAM_GLOBAL_PER_SEC", "30")))
+TELEGRAM_CHAT_PER_MIN = max(1.0, float(os.environ.get("TELEGRAM_CHAT_PER_MIN", "20")))
+TELEGRAM_CHAT_BURST = max(1, int(os.environ.get("TELEGRAM_CHAT_BURST", "3")))
+TELEGRAM_RETRIES = max(0, int(os.environ.get("TELEGRAM_RETRIES", "3")))
+TELEGRAM_MAX_AGE_SEC = max(0, int(os.environ.get("TELEGRAM_MAX_AGE_SEC", "900")))
 
 # =============================================================================
 # MONITOR TUNING (VIP TELEGRAM)
@@ -46,6 +105,47 @@ MONITOR_POLL_SEC = max(1, int(os.environ.get("MONITOR_POLL_SEC", "3")))
 MONITOR_DEBUG = os.environ.get("MONITOR_DEBUG", "1").strip() != "0"
 TRIGGER_EPS_PCT = float(os.environ.get("TRIGGER_EPS_PCT", "0.00005"))
 
+# Adaptives Polling: Symbole nahe an TP/SL/BE öfter, weit entfernte seltener
+MONITOR_ADAPTIVE = os.environ.get("MONITOR_ADAPTIVE", "1").strip() != "0"
+MONITOR_MIN_POLL_SEC = max(0.2, float(os.environ.get("MONITOR_MIN_POLL_SEC", "1")))
+MONITOR_MAX_POLL_SEC = max(MONITOR_MIN_POLL_SEC, float(os.environ.get("MONITOR_MAX_POLL_SEC", "60")))
+MONITOR_ADAPTIVE_SAFETY = max(0.01, float(os.environ.get("MONITOR_ADAPTIVE_SAFETY", "0.2")))
+# Ab so vielen offenen Trades vektorisiert (NumPy) auswerten
+MONITOR_VECTOR_MIN_TRADES = max(1, int(os.environ.get("MONITOR_VECTOR_MIN_TRADES", "500")))
+# loop = Einzelauswertung aller Trades (alt), vector = TradeBook für alle,
+# index = nur Trades mit gekreuzten Levels (Standard)
+MONITOR_EVAL_MODE = os.environ.get("MONITOR_EVAL_MODE", "index").strip().lower()
+# Zustandswechsel (tp*/sl/closed) werden sofort geschrieben, reine
+# Monitoring-Felder (last_price, last_check_at) nur alle N Sekunden
+MONITOR_CHECKPOINT_SEC = max(0, int(os.environ.get("MONITOR_CHECKPOINT_SEC", "60")))
+
+# Preis-Cache (prozessweit): Frische pro Provider, danach stale-while-revalidate
+PRICE_TTL_COINGECKO_SEC = max(0.0, float(os.environ.get("PRICE_TTL_COINGECKO_SEC", "10")))
+PRICE_TTL_METALS_SEC = max(0.0, float(os.environ.get("PRICE_TTL_METALS_SEC", "30")))
+PRICE_TTL_TWELVE_SEC = max(0.0, float(os.environ.get("PRICE_TTL_TWELVE_SEC", "15")))
+PRICE_STALE_MAX_SEC = max(0.0, float(os.environ.get("PRICE_STALE_MAX_SEC", "120")))
+PRICE_BATCH_MAX = max(1, int(os.environ.get("PRICE_BATCH_MAX", "50")))
+# Provider-Gruppen parallel abrufen; MetalsAPI nach PRICE_HEDGE_AFTER_SEC
+# zusätzlich per TwelveData absichern (0 = kein Hedging)
+PRICE_FETCH_WORKERS = max(1, int(os.environ.get("PRICE_FETCH_WORKERS", "4")))
+PRICE_HEDGE_AFTER_SEC = max(0.0, float(os.environ.get("PRICE_HEDGE_AFTER_SEC", "1.5")))
+
+# API-Kontingente (0 = unbekannt -> kein Budget). MetalsAPI zählt pro Request,
+# TwelveData pro Symbol. PRICE_BUDGET_RESERVE_PCT bleibt als Puffer unangetastet.
+METALS_API_MONTHLY_CREDITS = max(0, int(os.environ.get("METALS_API_MONTHLY_CREDITS", "0")))
+TWELVE_API_DAILY_CREDITS = max(0, int(os.environ.get("TWELVE_API_DAILY_CREDITS", "0")))
+PRICE_BUDGET_RESERVE_PCT = min(0.9, max(0.0, float(os.environ.get("PRICE_BUDGET_RESERVE_PCT", "0.05"))))
+PRICE_BUDGET_FILE = os.environ.get("PRICE_BUDGET_FILE", "price_budget.json").strip()
+
+# Push-Feed statt Polling: tcp://host:port (Zeilenprotokoll) oder ws(s)://...
+# (ws braucht websocket-client). Leer = aus, nur REST-Polling.
+PRICE_FEED_URL = os.environ.get("PRICE_FEED_URL", "").strip()
+PRICE_FEED_SYMBOLS = [s.strip().upper() for s in os.environ.get("PRICE_FEED_SYMBOLS", "").split(",") if s.strip()]
+PRICE_FEED_STALE_SEC = max(1.0, float(os.environ.get("PRICE_FEED_STALE_SEC", "10")))
+PRICE_FEED_RECONNECT_SEC = max(0.5, float(os.environ.get("PRICE_FEED_RECONNECT_SEC", "2")))
+# Kommt so lange gar nichts (auch kein Heartbeat), gilt die Verbindung als hängend -> Reconnect
+PRICE_FEED_IDLE_SEC = max(1.0, float(os.environ.get("PRICE_FEED_IDLE_SEC", str(PRICE_FEED_STALE_SEC * 3))))
+
 # =============================================================================
 # BOT DELIVERY BEHAVIOR (cTrader-Hub)
 # =============================================================================
@@ -53,19 +153,210 @@ BOT_NEW_CLIENT_BASELINE = os.environ.get("BOT_NEW_CLIENT_BASELINE", "1").strip()
 BOT_AUTO_ACK_ON_GET = os.environ.get("BOT_AUTO_ACK_ON_GET", "1").strip() != "0"
 BOT_BASELINE_GRACE_SEC = int(os.environ.get("BOT_BASELINE_GRACE_SEC", "120"))
 BOT_SIGNAL_TTL_SEC = max(5, int(os.environ.get("BOT_SIGNAL_TTL_SEC", "90")))
+# Dedup-Fenster bewusst deutlich länger als die Signal-TTL (späte TV-Retries)
+BOT_DEDUP_TTL_SEC = max(BOT_SIGNAL_TTL_SEC, int(os.environ.get("BOT_DEDUP_TTL_SEC", "21600")))
+BOT_DEDUP_MAX = max(1000, int(os.environ.get("BOT_DEDUP_MAX", "200000")))
 BOT_REQUIRE_TIME = os.environ.get("BOT_REQUIRE_TIME", "1").strip() != "0"
 BOT_DEFAULT_CLIENT = os.environ.get("BOT_DEFAULT_CLIENT", "default").strip() or "default"
 
+# Parkplätze für Long-Polls und Streams. gthread (--threads WEB_THREADS):
+# jeder Wartende belegt einen Thread. gevent (-k gevent --worker-connections
+# WEB_CONNECTIONS, render.yaml): ein idle Stream ist nur ein Greenlet, es
+# zählen die Verbindungen. Immer bleiben BOT_RESERVED_THREADS Plätze frei,
+# sonst hängen /webhook und /bot_webhook - genau die Routen, die die
+# Wartenden wecken würden.
+WEB_ASYNC = gevent_monkey is not None and gevent_monkey.is_module_patched("socket")
+WEB_THREADS = max(1, int(os.environ.get("WEB_THREADS", "8")))
+WEB_CONNECTIONS = max(1, int(os.environ.get("WEB_CONNECTIONS", "1000")))
+BOT_RESERVED_THREADS = max(1, int(os.environ.get("BOT_RESERVED_THREADS", "4")))
+BOT_PARKED_MAX = max(0, (WEB_CONNECTIONS if WEB_ASYNC else WEB_THREADS) - BOT_RESERVED_THREADS)
+
+# Long-Poll /bot_next?wait=N (leer = Standard: gthread 4, gevent alle Parkplätze)
+BOT_LONGPOLL_MAX_SEC = max(0, int(os.environ.get("BOT_LONGPOLL_MAX_SEC", "25")))
+BOT_LONGPOLL_MAX_WAITERS = min(BOT_PARKED_MAX, max(0, int(os.environ.get("BOT_LONGPOLL_MAX_WAITERS", "").strip() or (BOT_PARKED_MAX if WEB_ASYNC else 4))))
+
+# SSE /bot_stream (leer = Standard: gthread 4, gevent alle Parkplätze)
+BOT_STREAM_MAX = min(BOT_PARKED_MAX, max(0, int(os.environ.get("BOT_STREAM_MAX", "").strip() or (BOT_PARKED_MAX if WEB_ASYNC else 4))))
+BOT_STREAM_PING_SEC = max(1, int(os.environ.get("BOT_STREAM_PING_SEC", "15")))
+# Stream nach N Sekunden beenden -> Platz wird frei, EventSource verbindet
+# sich nach "retry" mit Last-Event-ID neu (0 = unbegrenzt)
+BOT_STREAM_MAX_SEC = max(0, int(os.environ.get("BOT_STREAM_MAX_SEC", "300")))
+
+# Persistenz: "json" = ganze Datei pro Event, "journal" = Append-Log + Snapshot
+BOT_PERSIST_MODE = os.environ.get("BOT_PERSIST_MODE", "json").strip().lower()
+BOT_JOURNAL_COMPACT_EVERY = max(1, int(os.environ.get("BOT_JOURNAL_COMPACT_EVERY", "500")))
+BOT_JOURNAL_COMPACT_SEC = max(1, int(os.environ.get("BOT_JOURNAL_COMPACT_SEC", "300")))
+
+# Client-Acks (/bot_next, /bot_ack) nur im Speicher merken und spätestens alle
+# N Sekunden gebündelt schreiben = max. Verlustfenster bei Absturz (0 = sofort)
+BOT_ACK_FLUSH_SEC = max(0.0, float(os.environ.get("BOT_ACK_FLUSH_SEC", "1")))
+
+# Mehrere gunicorn-Worker (--workers N): Zustand per Dateilock (flock) schützen
+# und Änderungen anderer Prozesse vor jedem Zugriff nachladen
+STATE_CROSS_PROCESS = os.environ.get("STATE_CROSS_PROCESS", "0").strip() == "1" and fcntl is not None
+# Long-Poll/Stream: so oft nach Signalen anderer Worker sehen (deren notify erreicht uns nicht)
+STATE_SYNC_POLL_SEC = max(0.05, float(os.environ.get("STATE_SYNC_POLL_SEC", "0.5")))
+
+# VIP-Monitor bei mehreren Workern: nur der Inhaber der Lease-Datei läuft.
+# Fällt er aus, übernimmt ein anderer Worker nach spätestens TTL + RENEW Sekunden.
+MONITOR_LEASE_FILE = os.environ.get("MONITOR_LEASE_FILE", "monitor.lease").strip()
+MONITOR_LEASE_TTL_SEC = max(3.0, float(os.environ.get("MONITOR_LEASE_TTL_SEC", "15")))
+MONITOR_LEASE_RENEW_SEC = min(MONITOR_LEASE_TTL_SEC / 3, max(0.5, float(os.environ.get("MONITOR_LEASE_RENEW_SEC", "5"))))
+# Hängt der Monitor-Loop länger, wird die Lease nicht mehr verlängert
+MONITOR_LEASE_STALL_SEC = max(MONITOR_LEASE_TTL_SEC, float(os.environ.get("MONITOR_LEASE_STALL_SEC", "120")))
+
 # =============================================================================
 # LOCKS
 # =============================================================================
-_lock_trades = threading.RLock()
-_lock_bot = threading.RLock()
-_lock_state = threading.RLock()
-_lock_clients = threading.RLock()
+class _ProcLock:
+    # Reentranter Lock + fcntl.flock auf <datei>.lock (nur mit STATE_CROSS_PROCESS),
+    # damit mehrere Worker-Prozesse dieselben Zustandsdateien lesen/ändern können.
+    # Besitzer und Tiefe werden selbst geführt (plain Lock darunter), der
+    # Dateilock hängt am äußersten acquire. Für threading.Condition:
+    # _is_owned/_release_save/_acquire_restore, wait() gibt Thread- und Dateilock frei.
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._owner = None
+        self._depth = 0
+        self._fd = None
+        self._pid = None
+
+    def _flock(self, exclusive: bool):
+        if not STATE_CROSS_PROCESS:
+            return
+        if self._fd is None or self._pid != os.getpid():
+            # nach fork eigener Descriptor, sonst teilen sich Eltern und Kind den Lock
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        fcntl.flock(self._fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_UN)
+
+    def _take(self, depth: int, blocking: bool = True, timeout: float = -1) -> bool:
+        if not self._lock.acquire(blocking, timeout):
+            return False
+        try:
+            self._flock(True)
+        except BaseException:
+            self._lock.release()
+            raise
+        self._owner = threading.get_ident()
+        self._depth = depth
+        return True
+
+    def _drop(self) -> int:
+        depth = self._depth
+        self._owner = None
+        self._depth = 0
+        try:
+            self._flock(False)
+        finally:
+            self._lock.release()
+        return depth
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if self._owner == threading.get_ident():
+            self._depth += 1
+            return True
+        return self._take(1, blocking, timeout)
+
+    def release(self):
+        if self._owner != threading.get_ident():
+            raise RuntimeError("cannot release un-acquired lock")
+        if self._depth > 1:
+            self._depth -= 1
+            return
+        self._drop()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def _is_owned(self) -> bool:
+        return self._owner == threading.get_ident()
+
+    def _release_save(self):
+        if self._owner != threading.get_ident():
+            raise RuntimeError("cannot release un-acquired lock")
+        return self._drop()
+
+    def _acquire_restore(self, depth: int):
+        self._take(depth)
+
+
+_lock_trades = _ProcLock(TRADES_FILE + ".lock")
+_lock_bot = _ProcLock(BOT_SIGNALS_FILE + ".lock")
+_lock_state = _ProcLock(BOT_STATE_FILE + ".lock")
+_lock_clients = _ProcLock(BOT_CLIENTS_FILE + ".lock")
+_lock_prices = threading.RLock()
+
+# =============================================================================
+# METRIKEN (Prometheus-Textformat unter /metrics)
+#
+# Auf dem Request-Pfad nur Inkremente ohne Lock: unter dem GIL kann bei
+# gleichzeitigen Updates höchstens ein einzelnes Inkrement verloren gehen,
+# das ist für Monitoring tragbar. Alles andere (Gauges, Datei-I/O) wird erst
+# beim Scrape berechnet.
+# =============================================================================
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(METRICS_BUCKETS) + 1)      # letzter Slot = +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(METRICS_BUCKETS, value)] += 1
+        self.sum += value
+
+
+_metrics_hist: Dict[tuple, _Histogram] = {}     # (name, labels) -> Histogramm
+_metrics_count: Dict[tuple, int] = {}           # (name, labels) -> Zähler
+
+
+def metrics_observe(name: str, labels: tuple, value: float):
+    h = _metrics_hist.get((name, labels))
+    if h is None:
+        h = _metrics_hist.setdefault((name, labels), _Histogram())
+    h.observe(value)
+
+
+def metrics_inc(name: str, labels: tuple):
+    key = (name, labels)
+    _metrics_count[key] = _metrics_count.get(key, 0) + 1
+
+
+# Basis + Pfad, damit die Zuordnung auch bei gemeinsamer Stand-in-Basis stimmt
+_PROVIDER_PREFIXES = (
+    (f"{TELEGRAM_API_BASE}/bot", "telegram"),
+    (f"{COINGECKO_API_BASE}/api/v3/", "coingecko"),
+    (f"{METALS_API_BASE}/api/latest", "metals"),
+    (f"{TWELVE_API_BASE}/price", "twelve"),
+)
+
+
+class _MeteredSession(requests.Session):
+    # Latenz + Statuscode pro Provider für alle ausgehenden Calls über _http
+    def request(self, method, url, *args, **kwargs):
+        provider = next((name for prefix, name in _PROVIDER_PREFIXES if url.startswith(prefix)), "other")
+        t0 = time.perf_counter()
+        status = "error"
+        try:
+            r = super().request(method, url, *args, **kwargs)
+            status = str(r.status_code)
+            return r
+        finally:
+            metrics_observe("provider_request_duration_seconds", (("provider", provider),), time.perf_counter() - t0)
+            metrics_inc("provider_responses_total", (("provider", provider), ("status", status)))
+
 
 # requests Session
-_http = requests.Session()
+_http = _MeteredSession()
 
 # =============================================================================
 # BASICS
@@ -129,11 +420,40 @@ def log_info(text: str):
     print(text, flush=True)
 
 
+# I/O pro Pfad (Anzahl + Bytes), für /monitor_status und Benchmarks: JSON-Dateien,
+# Journale (inkl. Replay), Archiv und SQLite-Tabellen als "storage.db:trades"
+_file_io: Dict[str, Dict[str, int]] = {}
+_file_io_lock = threading.Lock()
+
+
+def _count_io(path: str, op: str, nbytes: int):
+    with _file_io_lock:
+        st = _file_io.get(path)
+        if st is None:
+            st = _file_io[path] = {"reads": 0, "read_bytes": 0, "writes": 0, "write_bytes": 0}
+        st[op + "s"] += 1
+        st[op + "_bytes"] += nbytes
+
+
+def file_io_status() -> dict:
+    with _file_io_lock:
+        return {path: dict(st) for path, st in _file_io.items()}
+
+
+def _file_sig(path: str):
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+    except OSError:
+        return None
+
+
 def _safe_read_json(path: str, default):
     if not os.path.exists(path):
         return default
     try:
         with open(path, "r", encoding="utf-8") as f:
+            _count_io(path, "read", os.fstat(f.fileno()).st_size)
             return json.load(f)
     except Exception as e:
         log_error(f"JSON Read Fehler {path}: {e}")
@@ -145,7 +465,9 @@ def _safe_write_json_atomic(path: str, data) -> bool:
     try:
         with open(tmp, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=2)
+            nbytes = f.tell()
         os.replace(tmp, path)
+        _count_io(path, "write", nbytes)
         return True
     except Exception as e:
         log_error(f"JSON Write Fehler {path}: {e}")
@@ -157,6 +479,388 @@ def _safe_write_json_atomic(path: str, data) -> bool:
         return False
 
 
+# =============================================================================
+# JOURNAL (append-only Persistenz)
+#
+# Pro Event eine kompakte JSON-Zeile anhängen (O(1)), regelmäßig im
+# Hintergrund einen Snapshot in die eigentliche JSON-Datei schreiben und das
+# Journal kürzen. Beim Start: Snapshot laden + Journal nachspielen.
+# Mit STATE_CROSS_PROCESS liest jeder Prozess nur das Ende nach, das andere
+# Prozesse seit seinem letzten Stand angehängt haben (poll).
+# =============================================================================
+class _Journal:
+    def __init__(self, snapshot_path: str, lock, snapshot_fn, sync_fn=None):
+        self.snapshot_path = snapshot_path
+        self.path = snapshot_path + ".journal"
+        self.rotated_path = snapshot_path + ".journal.compacting"
+        self.lock = lock
+        self.snapshot_fn = snapshot_fn
+        self.sync_fn = sync_fn
+        self.seen = None
+        self.records = 0
+        self.last_compact = time.time()
+        self.compacting = False
+        self._compact_lock = threading.Lock()
+
+    def append(self, rec: dict) -> bool:
+        line = json.dumps(rec, separators=(",", ":"), ensure_ascii=False) + "\n"
+        with self.lock:
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+                _count_io(self.path, "write", len(line.encode("utf-8")))
+            except Exception as e:
+                log_error(f"Journal Write Fehler {self.path}: {e}")
+                return False
+            if STATE_CROSS_PROCESS:
+                self.mark_seen()
+            self.records += 1
+            due = (
+                self.records >= BOT_JOURNAL_COMPACT_EVERY
+                or time.time() - self.last_compact >= BOT_JOURNAL_COMPACT_SEC
+            )
+            if due and not self.compacting:
+                self.compacting = True
+                threading.Thread(target=self.compact, daemon=True).start()
+        return True
+
+    def replay(self) -> List[dict]:
+        # .compacting bleibt nur nach Absturz während der Kompaktierung liegen
+        out = []
+        for path in (self.rotated_path, self.path):
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    _count_io(path, "read", os.fstat(f.fileno()).st_size)
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            rec = json.loads(line)
+                        except Exception:
+                            # abgeschnittene letzte Zeile nach Absturz
+                            continue
+                        if isinstance(rec, dict):
+                            out.append(rec)
+            except Exception as e:
+                log_error(f"Journal Read Fehler {path}: {e}")
+        self.records = len(out)
+        return out
+
+    def _position(self):
+        try:
+            st = os.stat(self.path)
+            journal = (st.st_ino, st.st_size)
+        except OSError:
+            journal = (None, 0)
+        return (_file_sig(self.snapshot_path), _file_sig(self.rotated_path)) + journal
+
+    def mark_seen(self):
+        # Aufruf unter self.lock: Snapshot + Journal gelten bis hier als gelesen
+        self.seen = self._position()
+
+    def poll(self):
+        # Aufruf unter self.lock. Records, die andere Prozesse seit mark_seen()
+        # angehängt haben; None = inzwischen kompaktiert -> komplett neu laden
+        pos, seen = self._position(), self.seen
+        if pos == seen:
+            return []
+        if seen is None or pos[:2] != seen[:2] or (seen[2] is not None and pos[2] != seen[2]) or pos[3] < seen[3]:
+            return None
+        start = seen[3] if seen[2] is not None else 0
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(start)
+                chunk = f.read(pos[3] - start)
+        except OSError as e:
+            log_error(f"Journal Read Fehler {self.path}: {e}")
+            return None
+        _count_io(self.path, "read", len(chunk))
+        out = []
+        for line in chunk.splitlines():
+            try:
+                rec = json.loads(line)
+            except Exception:
+                continue
+            if isinstance(rec, dict):
+                out.append(rec)
+        self.seen = pos
+        return out
+
+    def _write_snapshot(self, data) -> bool:
+        ok = _safe_write_json_atomic(self.snapshot_path, data)
+        if ok and os.path.exists(self.rotated_path):
+            os.remove(self.rotated_path)
+        return ok
+
+    def compact(self) -> bool:
+        # Lock-Reihenfolge überall Store-Lock -> _compact_lock: save_clients()
+        # und _bot_store_persist() rufen compact() mit gehaltenem Store-Lock.
+        # Der Snapshot wird danach ohne Store-Lock geschrieben (_compact_lock
+        # hält parallele Kompaktierungen in Reihenfolge). Mit mehreren
+        # Prozessen bleibt der Dateilock bis zum Ende gehalten, sonst könnte
+        # ein anderer Prozess .compacting überschreiben, bevor der Snapshot steht.
+        self.lock.acquire()
+        locked = True
+        try:
+            with self._compact_lock:
+                if self.sync_fn is not None:
+                    self.sync_fn()
+                data = self.snapshot_fn()
+                if os.path.exists(self.path):
+                    os.replace(self.path, self.rotated_path)
+                self.records = 0
+                self.last_compact = time.time()
+                if STATE_CROSS_PROCESS:
+                    ok = self._write_snapshot(data)
+                    self.mark_seen()
+                    return ok
+                self.lock.release()
+                locked = False
+                return self._write_snapshot(data)
+        except Exception as e:
+            log_error(f"Journal Kompaktierung Fehler {self.path}: {e}")
+            return False
+        finally:
+            if locked:
+                self.lock.release()
+            self.compacting = False
+
+
+# =============================================================================
+# STORAGE (SQLite, WAL)
+#
+# Alternative zu den JSON-Dateien (STORAGE_BACKEND=sqlite): Trades, Signale
+# und Clients als Zeilen (JSON-Spalte + indizierte Felder), Änderungen
+# zeilenweise statt Datei komplett neu schreiben. Eine Verbindung pro Thread,
+# WAL erlaubt Leser parallel zum Schreiber. meta.<tabelle> zählt Schreib-
+# vorgänge, damit residente Kopien Änderungen von außen erkennen.
+# =============================================================================
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT NOT NULL,
+    closed INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_trades_closed ON trades (closed, symbol);
+
+CREATE TABLE IF NOT EXISTS signals (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    client TEXT NOT NULL,
+    received_at TEXT,
+    expires_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_signals_client_time ON signals (client, received_at);
+
+CREATE TABLE IF NOT EXISTS clients (
+    client_id TEXT PRIMARY KEY,
+    last_ack_id TEXT,
+    acked_at TEXT,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def _row_json(d: dict) -> str:
+    return json.dumps(d, separators=(",", ":"), ensure_ascii=False)
+
+
+class _SqliteStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._conns: List[Tuple[threading.Thread, sqlite3.Connection]] = []
+
+    def conn(self) -> sqlite3.Connection:
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            # check_same_thread=False nur, damit _reap()/close() fremde Verbindungen schließen darf
+            c = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA synchronous=NORMAL")
+            with self._schema_lock:
+                if not self._schema_ready:
+                    c.executescript(_SQLITE_SCHEMA)
+                    self._schema_ready = True
+                self._reap()
+                self._conns.append((threading.current_thread(), c))
+            self._local.conn = c
+        return c
+
+    def _reap(self):
+        # Aufruf unter _schema_lock: Verbindungen beendeter Threads schließen
+        alive = []
+        for th, c in self._conns:
+            if th.is_alive():
+                alive.append((th, c))
+            else:
+                c.close()
+        self._conns = alive
+
+    def close(self):
+        with self._schema_lock:
+            for _, c in self._conns:
+                try:
+                    c.close()
+                except sqlite3.Error:
+                    pass
+            self._conns = []
+            self._local = threading.local()
+
+    def _bump(self, c: sqlite3.Connection, key: str) -> int:
+        c.execute(
+            "INSERT INTO meta (key, value) VALUES (?, 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1",
+            (key,),
+        )
+        return c.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()[0]
+
+    def rev(self, key: str) -> int:
+        row = self.conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def is_empty(self) -> bool:
+        c = self.conn()
+        return not any(
+            c.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone()
+            for table in ("trades", "signals", "clients", "state")
+        )
+
+    # --- Trades --------------------------------------------------------
+    def load_trades(self):
+        rows = self.conn().execute("SELECT id, data FROM trades ORDER BY id").fetchall()
+        _count_io(f"{self.path}:trades", "read", sum(len(data) for _, data in rows))
+        return [json.loads(data) for _, data in rows], [rowid for rowid, _ in rows]
+
+    def write_trades(self, trades: List[Dict[str, Any]], rowids: Optional[List[int]], changed: List[int], removed: List[int] = ()):
+        # rowids=None -> Tabelle ersetzen; sonst entfernte Zeilen löschen und
+        # nur geänderte/neue Zeilen schreiben
+        c = self.conn()
+        with c:
+            if rowids is None:
+                c.execute("DELETE FROM trades")
+                rowids, changed = [], list(range(len(trades)))
+            else:
+                rowids = list(rowids)
+                c.executemany("DELETE FROM trades WHERE id = ?", [(rowid,) for rowid in removed])
+            nbytes = 0
+            for i in changed:
+                t = trades[i]
+                cols = ((t.get("symbol", "") or "").upper(), 1 if t.get("closed") else 0, t.get("updated_at"), _row_json(t))
+                nbytes += len(cols[3])
+                if i < len(rowids):
+                    c.execute("UPDATE trades SET symbol = ?, closed = ?, updated_at = ?, data = ? WHERE id = ?", cols + (rowids[i],))
+                else:
+                    rowids.append(c.execute("INSERT INTO trades (symbol, closed, updated_at, data) VALUES (?, ?, ?, ?)", cols).lastrowid)
+            rev = self._bump(c, "trades")
+        _count_io(f"{self.path}:trades", "write", nbytes)
+        return rowids, rev
+
+    # --- Bot-Signale ---------------------------------------------------
+    def load_signals(self) -> List[Dict[str, Any]]:
+        rows = self.conn().execute("SELECT data FROM signals ORDER BY seq").fetchall()
+        _count_io(f"{self.path}:signals", "read", sum(len(data) for (data,) in rows))
+        return [json.loads(data) for (data,) in rows]
+
+    def signals_after(self, seq: int):
+        rows = self.conn().execute("SELECT seq, data FROM signals WHERE seq > ? ORDER BY seq", (seq,)).fetchall()
+        _count_io(f"{self.path}:signals", "read", sum(len(data) for _, data in rows))
+        return [(s, json.loads(data)) for s, data in rows]
+
+    def max_signal_seq(self) -> int:
+        return self.conn().execute("SELECT COALESCE(MAX(seq), 0) FROM signals").fetchone()[0]
+
+    def write_signals(self, added: List[Dict[str, Any]], removed: List[str], replace: bool = False):
+        c = self.conn()
+        with c:
+            if replace:
+                c.execute("DELETE FROM signals")
+            c.executemany("DELETE FROM signals WHERE id = ?", [(sig_id,) for sig_id in removed])
+            rows = [
+                (str(s.get("id", "")), str(s.get("client", "")), s.get("received_at"), s.get("expires_at"), _row_json(s))
+                for s in added
+                if isinstance(s, dict) and s.get("id")
+            ]
+            c.executemany("INSERT OR REPLACE INTO signals (id, client, received_at, expires_at, data) VALUES (?, ?, ?, ?, ?)", rows)
+            self._bump(c, "signals")
+        _count_io(f"{self.path}:signals", "write", sum(len(r[4]) for r in rows))
+
+    # --- Clients -------------------------------------------------------
+    def load_clients(self) -> Dict[str, Any]:
+        rows = self.conn().execute("SELECT client_id, data FROM clients").fetchall()
+        _count_io(f"{self.path}:clients", "read", sum(len(data) for _, data in rows))
+        return {client_id: json.loads(data) for client_id, data in rows}
+
+    def get_client(self, client_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn().execute("SELECT data FROM clients WHERE client_id = ?", (client_id,)).fetchone()
+        _count_io(f"{self.path}:clients", "read", len(row[0]) if row else 0)
+        return json.loads(row[0]) if row else None
+
+    def put_clients(self, clients: Dict[str, Any], replace: bool = False):
+        c = self.conn()
+        with c:
+            if replace:
+                c.execute("DELETE FROM clients")
+            rows = [
+                (client_id, rec.get("last_ack_id"), rec.get("acked_at"), _row_json(rec))
+                for client_id, rec in clients.items()
+                if isinstance(rec, dict)
+            ]
+            c.executemany("INSERT OR REPLACE INTO clients (client_id, last_ack_id, acked_at, data) VALUES (?, ?, ?, ?)", rows)
+            self._bump(c, "clients")
+        _count_io(f"{self.path}:clients", "write", sum(len(r[3]) for r in rows))
+
+    # --- Bot-State -----------------------------------------------------
+    def load_state(self) -> Dict[str, Any]:
+        rows = self.conn().execute("SELECT key, value FROM state").fetchall()
+        _count_io(f"{self.path}:state", "read", sum(len(value) for _, value in rows))
+        return {key: json.loads(value) for key, value in rows}
+
+    def save_state(self, state: Dict[str, Any]):
+        c = self.conn()
+        with c:
+            c.execute("DELETE FROM state")
+            rows = [(k, json.dumps(v)) for k, v in state.items()]
+            c.executemany("INSERT INTO state (key, value) VALUES (?, ?)", rows)
+            self._bump(c, "state")
+        _count_io(f"{self.path}:state", "write", sum(len(r[1]) for r in rows))
+
+
+_sqlite = _SqliteStore(STORAGE_DB_FILE) if STORAGE_BACKEND == "sqlite" else None
+if _sqlite is not None:
+    # zuerst registriert -> läuft nach allen anderen atexit-Schreibern
+    atexit.register(_sqlite.close)
+
+
+def storage_status() -> dict:
+    out = {"backend": STORAGE_BACKEND, "cross_process": STATE_CROSS_PROCESS}
+    if _sqlite is not None:
+        c = _sqlite.conn()
+        out["db_file"] = STORAGE_DB_FILE
+        for table in ("trades", "signals", "clients"):
+            out[table] = c.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        out["open_trades"] = c.execute("SELECT COUNT(*) FROM trades WHERE closed = 0").fetchone()[0]
+    return out
+
+
 def require_secret(data: dict, purpose: str) -> bool:
     secret = VIP_SECRET if purpose == "vip" else BOT_SECRET
     if secret:
@@ -242,11 +946,12 @@ def fmt_price(symbol: str, value: float) -> str:
     return f"{float(value):.{d}f}"
 
 
-def trigger_eps_abs(target: float) -> float:
+def trigger_eps_abs(target: float, eps_pct: Optional[float] = None) -> float:
     if target is None:
         return 0.0
+    eps_pct = TRIGGER_EPS_PCT if eps_pct is None else eps_pct
     try:
-        return abs(float(target)) * max(0.0, TRIGGER_EPS_PCT)
+        return abs(float(target)) * max(0.0, eps_pct)
     except Exception:
         return 0.0
 
@@ -278,26 +983,111 @@ def back_to_entry_short(price: float, entry: float) -> bool:
 # =============================================================================
 # TELEGRAM
 # =============================================================================
-def send_telegram(text: str, retries: int = 1) -> bool:
-    if not BOT_TOKEN or not CHAT_ID:
+class _TokenBucket:
+    def __init__(self, rate_per_sec: float, burst: float):
+        self.rate = max(0.001, float(rate_per_sec))
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+
+    def wait_time(self, now: Optional[float] = None) -> float:
+        # Sekunden bis ein Token verfügbar ist (0 = sofort)
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1.0
+
+
+# Telegram-Limits: ~30 Nachrichten/s global, ~20/min pro Gruppe/Kanal
+_tg_global_bucket = _TokenBucket(TELEGRAM_GLOBAL_PER_SEC, TELEGRAM_GLOBAL_PER_SEC)
+_tg_chat_buckets: Dict[str, _TokenBucket] = {}
+_tg_chat_blocked_until: Dict[str, float] = {}      # monotonic, aus retry_after
+
+
+def _telegram_chat_bucket(chat_id: str) -> _TokenBucket:
+    b = _tg_chat_buckets.get(chat_id)
+    if b is None:
+        b = _TokenBucket(TELEGRAM_CHAT_PER_MIN / 60.0, TELEGRAM_CHAT_BURST)
+        _tg_chat_buckets[chat_id] = b
+    return b
+
+
+def _telegram_post(chat_id: str, text: str):
+    # Ein Versuch. Ergebnis: ("ok" | "retry" | "fail", retry_after_sec, Fehlertext)
+    url = f"{TELEGRAM_API_BASE}/bot{BOT_TOKEN}/sendMessage"
+    payload = {"chat_id": chat_id, "text": text, "parse_mode": "Markdown"}
+    try:
+        r = _http.post(url, data=payload, timeout=10)
+    except Exception as e:
+        return "retry", 0.0, str(e)
+
+    print("📱 Telegram Response:", r.status_code, r.text, flush=True)
+    if r.status_code == 200:
+        return "ok", 0.0, ""
+
+    err = f"HTTP {r.status_code}: {r.text}"
+    if r.status_code == 429:
+        retry_after = 1.0
+        try:
+            params = (r.json() or {}).get("parameters") or {}
+            retry_after = float(params.get("retry_after", retry_after))
+        except Exception:
+            pass
+        return "retry", max(0.0, retry_after), err
+
+    if r.status_code >= 500:
+        return "retry", 0.0, err
+    return "fail", 0.0, err
+
+
+def _telegram_acquire(chat_id: str) -> float:
+    # Aufruf unter _tg_cond. 0 = Token genommen, sonst Wartezeit in Sekunden.
+    now = time.monotonic()
+    wait = max(
+        _tg_chat_blocked_until.get(chat_id, 0.0) - now,
+        _telegram_chat_bucket(chat_id).wait_time(now),
+        _tg_global_bucket.wait_time(now),
+    )
+    if wait > 0:
+        return wait
+    _telegram_chat_bucket(chat_id).consume()
+    _tg_global_bucket.consume()
+    return 0.0
+
+
+def send_telegram(text: str, retries: int = 1, chat_id: Optional[str] = None) -> bool:
+    # Direkt und blockierend (ohne Queue), hält sich aber an dieselben Limits
+    chat_id = chat_id or CHAT_ID
+    if not BOT_TOKEN or not chat_id:
         log_error("Telegram nicht konfiguriert (BOT_TOKEN/CHAT_ID fehlt)")
         return False
 
-    url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
-    payload = {"chat_id": CHAT_ID, "text": text, "parse_mode": "Markdown"}
-
     last_err = None
     attempts = max(1, int(retries) + 1)
-    for attempt in range(1, attempts + 1):
-        try:
-            r = _http.post(url, data=payload, timeout=10)
-            print("📱 Telegram Response:", r.status_code, r.text, flush=True)
-            if r.status_code == 200:
-                return True
-            last_err = f"HTTP {r.status_code}: {r.text}"
-        except Exception as e:
-            last_err = str(e)
+    attempt = 0
+    while attempt < attempts:
+        with _tg_cond:
+            wait = _telegram_acquire(chat_id)
+        if wait > 0:
+            time.sleep(wait)
+            continue
 
+        status, retry_after, last_err = _telegram_post(chat_id, text)
+        if status == "ok":
+            return True
+        if status == "fail":
+            break
+        if retry_after > 0:
+            # 429 zählt nicht als Fehlversuch
+            with _tg_cond:
+                _tg_chat_blocked_until[chat_id] = time.monotonic() + retry_after
+            continue
+        attempt += 1
         if attempt < attempts:
             time.sleep(1)
 
@@ -305,22 +1095,293 @@ def send_telegram(text: str, retries: int = 1) -> bool:
     return False
 
 
+# ---------------------------------------------------------------------
+# Delivery-Queue
+#
+# Routen und Monitor legen Nachrichten nur noch in eine begrenzte Queue;
+# Worker-Threads liefern aus. Pro Chat wird immer nur die älteste Nachricht
+# bearbeitet, damit die Reihenfolge (TP1 vor TP2 ...) erhalten bleibt.
+# Token-Buckets begrenzen auf die Telegram-Limits, 429 mit retry_after
+# wird neu eingeplant statt verworfen.
+# ---------------------------------------------------------------------
+_tg_queue: deque = deque()
+_tg_cond = threading.Condition()
+_tg_busy_chats: set = set()
+_tg_workers: List[threading.Thread] = []
+_tg_stats = {"enqueued": 0, "sent": 0, "failed": 0, "dropped": 0, "expired": 0, "rescheduled": 0, "max_depth": 0}
+
+# Ergebnis von queue_telegram(): nur TG_FULL ist eine echte Ablehnung (-> 503)
+TG_QUEUED = "queued"
+TG_DISABLED = "disabled"  # BOT_TOKEN/CHAT_ID fehlt, Nachricht wird nie gesendet
+TG_FULL = "full"          # Queue voll unter drop_new
+
+
+def _ensure_telegram_workers():
+    with _tg_cond:
+        if _tg_workers:
+            return
+        for i in range(TELEGRAM_WORKERS):
+            th = threading.Thread(target=_telegram_worker, name=f"tg-worker-{i}", daemon=True)
+            _tg_workers.append(th)
+            th.start()
+
+
+def queue_telegram(text: str, chat_id: Optional[str] = None) -> str:
+    chat_id = chat_id or CHAT_ID
+    if not BOT_TOKEN or not chat_id:
+        log_error("Telegram nicht konfiguriert (BOT_TOKEN/CHAT_ID fehlt)")
+        return TG_DISABLED
+
+    _ensure_telegram_workers()
+    with _tg_cond:
+        if len(_tg_queue) >= TELEGRAM_QUEUE_MAX:
+            _tg_stats["dropped"] += 1
+            if TELEGRAM_QUEUE_OVERFLOW == "drop_new":
+                log_error("Telegram Queue voll – neue Nachricht verworfen")
+                return TG_FULL
+            _tg_queue.popleft()
+            log_error("Telegram Queue voll – älteste Nachricht verworfen")
+
+        _tg_queue.append({"chat_id": chat_id, "text": text, "queued_at": time.time(), "not_before": 0.0, "errors": 0})
+        _tg_stats["enqueued"] += 1
+        _tg_stats["max_depth"] = max(_tg_stats["max_depth"], len(_tg_queue))
+        _tg_cond.notify()
+    return TG_QUEUED
+
+
+def _telegram_take():
+    # Aufruf unter _tg_cond. Liefert (item, None) oder (None, Wartezeit|None).
+    now = time.monotonic()
+    seen = set()
+    wait = None
+    i = 0
+    while i < len(_tg_queue):
+        item = _tg_queue[i]
+        chat_id = item["chat_id"]
+        if chat_id in seen or chat_id in _tg_busy_chats:
+            i += 1
+            continue
+        seen.add(chat_id)
+
+        if TELEGRAM_MAX_AGE_SEC and time.time() - item["queued_at"] > TELEGRAM_MAX_AGE_SEC:
+            del _tg_queue[i]
+            _tg_stats["expired"] += 1
+            log_error(f"Telegram Nachricht nach {TELEGRAM_MAX_AGE_SEC}s verworfen (nicht zustellbar)")
+            seen.discard(chat_id)
+            continue
+
+        w = item["not_before"] - now
+        if w <= 0:
+            w = _telegram_acquire(chat_id)
+        if w <= 0:
+            del _tg_queue[i]
+            return item, None
+        wait = w if wait is None else min(wait, w)
+        i += 1
+    return None, wait
+
+
+def _telegram_worker():
+    while True:
+        with _tg_cond:
+            item, wait = _telegram_take()
+            while item is None:
+                _tg_cond.wait(wait)
+                item, wait = _telegram_take()
+            _tg_busy_chats.add(item["chat_id"])
+
+        status, retry_after, err = "fail", 0.0, ""
+        try:
+            status, retry_after, err = _telegram_post(item["chat_id"], item["text"])
+        except Exception as e:
+            err = str(e)
+            log_error(f"Telegram Worker Fehler: {e}")
+
+        with _tg_cond:
+            _tg_busy_chats.discard(item["chat_id"])
+            rate_limited = status == "retry" and retry_after > 0
+            if status == "retry" and not rate_limited:
+                item["errors"] += 1
+                if item["errors"] > TELEGRAM_RETRIES:
+                    status = "fail"
+                else:
+                    retry_after = min(30.0, 2.0 ** (item["errors"] - 1))
+
+            if status == "ok":
+                _tg_stats["sent"] += 1
+            elif status == "retry":
+                # wieder vorne einreihen -> Reihenfolge pro Chat bleibt erhalten
+                now = time.monotonic()
+                item["not_before"] = now + retry_after
+                if rate_limited:
+                    _tg_chat_blocked_until[item["chat_id"]] = now + retry_after
+                _tg_queue.appendleft(item)
+                _tg_stats["rescheduled"] += 1
+            else:
+                _tg_stats["failed"] += 1
+                log_error(f"Telegram Fehler: {err}")
+            _tg_cond.notify_all()
+
+
+def telegram_queue_status() -> dict:
+    with _tg_cond:
+        oldest = _tg_queue[0]["queued_at"] if _tg_queue else None
+        return {
+            "depth": len(_tg_queue),
+            "max": TELEGRAM_QUEUE_MAX,
+            "workers": TELEGRAM_WORKERS,
+            "overflow": TELEGRAM_QUEUE_OVERFLOW,
+            "in_flight": len(_tg_busy_chats),
+            "chat_per_min": TELEGRAM_CHAT_PER_MIN,
+            "global_per_sec": TELEGRAM_GLOBAL_PER_SEC,
+            "oldest_age_sec": round(time.time() - oldest, 3) if oldest else 0.0,
+            **_tg_stats,
+        }
+
+
+def _drain_telegram_queue():
+    deadline = time.time() + TELEGRAM_DRAIN_SEC
+    with _tg_cond:
+        while (_tg_queue or _tg_busy_chats) and _tg_workers:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                log_error(f"Telegram Queue beim Beenden nicht leer ({len(_tg_queue)} verworfen)")
+                return
+            _tg_cond.wait(remaining)
+
+
+atexit.register(_drain_telegram_queue)
+
+
 # =============================================================================
 # TRADES (VIP-Monitor)
 # =============================================================================
+# Resident: die Liste wird nur neu gelesen, wenn sich die Datei von außen
+# geändert hat. _trades_version zählt strukturelle Änderungen (Trades
+# entfernt/neu geladen) – der Monitor baut daran seinen Index neu; angehängte
+# Trades übernimmt er inkrementell (Listenlänge).
+_trades_resident: Optional[List[Dict[str, Any]]] = None
+_trades_sig = None
+_trades_version = 0
+# nur SQLite: Zeilen-IDs und zuletzt geschriebener Stand pro Trade
+_trades_rowids: Optional[List[int]] = None
+_trades_rowjson: List[str] = []
+# Monitor: ungeschriebene Preis-/Heartbeat-Felder seit letztem Schreiben
+_trades_volatile_dirty = False
+_trades_checkpoint_at = 0.0
+_trades_io = {"flushes": 0, "checkpoints": 0, "skipped": 0}
+
+
+def _trades_signature():
+    if _sqlite is not None:
+        return _sqlite.rev("trades")
+    return _file_sig(TRADES_FILE)
+
+
+def _resident_trades() -> List[Dict[str, Any]]:
+    # Aufruf unter _lock_trades; liefert die residente Liste selbst
+    global _trades_resident, _trades_sig, _trades_version, _trades_rowids, _trades_rowjson
+
+    sig = _trades_signature()
+    if _trades_resident is None or sig != _trades_sig:
+        if _sqlite is not None:
+            _trades_resident, _trades_rowids = _sqlite.load_trades()
+            _trades_rowjson = [_row_json(t) for t in _trades_resident]
+        else:
+            data = _safe_read_json(TRADES_FILE, [])
+            _trades_resident = data if isinstance(data, list) else []
+        _trades_sig = sig
+        _trades_version += 1
+    return _trades_resident
+
+
+def _persist_trades(removed_rowids: List[int] = ()):
+    # Aufruf unter _lock_trades; schreibt die residente Liste ohne Versionswechsel.
+    # removed_rowids: SQLite-Zeilen entfernter Trades (Archiv)
+    global _trades_sig, _trades_rowids, _trades_rowjson, _trades_volatile_dirty, _trades_checkpoint_at
+
+    trades = _trades_resident or []
+    _stamp_last_prices(trades)
+    _trades_volatile_dirty = False
+    _trades_checkpoint_at = time.time()
+    if _sqlite is None:
+        if _safe_write_json_atomic(TRADES_FILE, trades):
+            _trades_sig = _file_sig(TRADES_FILE)
+        return
+
+    rowjson = [_row_json(t) for t in trades]
+    rowids, removed = _trades_rowids, list(removed_rowids)
+    if rowids is not None and len(trades) < len(rowids):
+        # kürzere Liste (save_trades): überzählige Zeilen gezielt löschen
+        rowids, removed = rowids[:len(trades)], removed + rowids[len(trades):]
+    if rowids is None:
+        changed = list(range(len(trades)))
+    else:
+        changed = [i for i, js in enumerate(rowjson) if i >= len(_trades_rowjson) or js != _trades_rowjson[i]]
+        if not changed and not removed:
+            return
+    try:
+        _trades_rowids, _trades_sig = _sqlite.write_trades(trades, rowids, changed, removed)
+        _trades_rowjson = rowjson
+    except sqlite3.Error as e:
+        log_error(f"SQLite Write Fehler trades: {e}")
+
+
+def _flush_trades(durable: bool):
+    # Aufruf unter _lock_trades. Übergänge sofort, sonst nur zum Checkpoint.
+    global _trades_volatile_dirty
+
+    if durable:
+        _trades_io["flushes"] += 1
+    elif _trades_volatile_dirty and time.time() - _trades_checkpoint_at >= MONITOR_CHECKPOINT_SEC:
+        _trades_io["checkpoints"] += 1
+    else:
+        _trades_io["skipped"] += 1
+        return
+    _persist_trades()
+
+
+def _checkpoint_trades_at_exit():
+    # Hat inzwischen ein anderer Prozess geschrieben, verfallen die Preisfelder
+    with _lock_trades:
+        if _trades_volatile_dirty and _trades_signature() == _trades_sig:
+            _persist_trades()
+
+
+def trades_persist_status() -> dict:
+    with _lock_trades:
+        return {
+            **_trades_io,
+            "checkpoint_sec": MONITOR_CHECKPOINT_SEC,
+            "volatile_pending": _trades_volatile_dirty,
+            "last_write_age_sec": round(time.time() - _trades_checkpoint_at, 1) if _trades_checkpoint_at else None,
+        }
+
+
+atexit.register(_checkpoint_trades_at_exit)
+
+
 def load_trades() -> List[Dict[str, Any]]:
+    # Kopien: der Monitor mutiert die residenten Dicts unter _lock_trades
     with _lock_trades:
-        data = _safe_read_json(TRADES_FILE, [])
-        return data if isinstance(data, list) else []
+        trades = _resident_trades()
+        _stamp_last_prices(trades)
+        return [dict(t) for t in trades]
 
 
 def save_trades(trades: List[Dict[str, Any]]):
+    global _trades_resident, _trades_version
+
+    # Zeilen-IDs bleiben: SQLite schreibt nur geänderte Positionen
     with _lock_trades:
-        _safe_write_json_atomic(TRADES_FILE, trades)
+        _trades_resident = list(trades)
+        _trades_version += 1
+        _persist_trades()
 
 
 def save_trade(symbol, entry, sl, tp1, tp2, tp3, side, meta=None):
     trade = {
+        "id": f"t_{os.urandom(8).hex()}",
         "symbol": symbol,
         "entry": float(entry),
         "sl": float(sl),
@@ -340,9 +1401,174 @@ def save_trade(symbol, entry, sl, tp1, tp2, tp3, side, meta=None):
         "close_reason": None,
         "meta": meta or {},
     }
-    trades = load_trades()
-    trades.append(trade)
-    save_trades(trades)
+    # nur anhängen: SQLite schreibt genau eine neue Zeile
+    with _lock_trades:
+        _resident_trades().append(trade)
+        _persist_trades()
+
+
+# =============================================================================
+# TRADE-ARCHIV
+#
+# Geschlossene Trades verlassen nach TRADES_ARCHIVE_AFTER_SEC den heißen
+# Bestand und landen als JSON-Zeile in trades_history/trades-YYYY-MM-DD.jsonl
+# (Tag = updated_at des Abschlusses). Pro Tag: alte Datei + neue Zeilen in
+# eine Temp-Datei, fsync, rename. Schon archivierte Trades (gleicher
+# Schlüssel) werden übersprungen -> ein Absturz oder Fehler zwischen Archiv
+# und Bestand verkleinern doppelt nichts. Eigener Thread, läuft auch ohne Monitor.
+# =============================================================================
+_archive_thread: Optional[threading.Thread] = None
+
+
+def _history_path(day: str) -> str:
+    return os.path.join(TRADES_HISTORY_DIR, f"trades-{day}.jsonl")
+
+
+def _history_days() -> List[str]:
+    try:
+        names = os.listdir(TRADES_HISTORY_DIR)
+    except OSError:
+        return []
+    return sorted(n[7:17] for n in names if n.startswith("trades-") and n.endswith(".jsonl") and len(n) == 23)
+
+
+def _trade_key(t: Dict[str, Any]) -> str:
+    # neue Trades tragen eine id; ältere über ihre unveränderlichen Felder
+    if t.get("id"):
+        return str(t["id"])
+    payload = "|".join(str(t.get(k)) for k in ("symbol", "side", "entry", "sl", "tp1", "created_at"))
+    return "h_" + hashlib.sha1(payload.encode("utf-8")).hexdigest()[:20]
+
+
+def _archive_day(day: str, items: List[Dict[str, Any]]):
+    os.makedirs(TRADES_HISTORY_DIR, exist_ok=True)
+    path = _history_path(day)
+    old = b""
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            old = f.read()
+        _count_io(path, "read", len(old))
+    if old and not old.endswith(b"\n"):
+        old += b"\n"  # abgeschnittene letzte Zeile nach Absturz abschließen
+
+    seen = set()
+    for line in old.splitlines():
+        try:
+            seen.add(_trade_key(json.loads(line)))
+        except Exception:
+            continue
+    new = [t for t in items if _trade_key(t) not in seen]
+    if not new:
+        return
+
+    data = old + "".join(_row_json(t) + "\n" for t in new).encode("utf-8")
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _count_io(path, "write", len(data))
+
+
+def archive_closed_trades(now_ts: Optional[float] = None) -> int:
+    global _trades_resident, _trades_rowids, _trades_rowjson, _trades_version
+
+    now_ts = time.time() if now_ts is None else now_ts
+    cutoff = now_ts - TRADES_ARCHIVE_AFTER_SEC
+    today = datetime.fromtimestamp(now_ts, timezone.utc).strftime("%Y-%m-%d")
+
+    with _lock_trades:
+        trades = _resident_trades()
+        by_day: Dict[str, List[int]] = {}
+        for row, t in enumerate(trades):
+            if not t.get("closed"):
+                continue
+            closed_dt = parse_iso_utc(t.get("updated_at")) or parse_iso_utc(t.get("created_at"))
+            if closed_dt is None:
+                # Alter unbekannt -> sofort, unter dem heutigen Tag
+                by_day.setdefault(today, []).append(row)
+            elif closed_dt.timestamp() <= cutoff:
+                by_day.setdefault(closed_dt.strftime("%Y-%m-%d"), []).append(row)
+
+        if not by_day:
+            return 0
+
+        # nur Tage, deren Datei sicher geschrieben ist, verlassen den Bestand
+        archived = set()
+        for day, rows in sorted(by_day.items()):
+            try:
+                _archive_day(day, [trades[row] for row in rows])
+                archived.update(rows)
+            except Exception as e:
+                log_error(f"Archiv Write Fehler {_history_path(day)}: {e}")
+        if not archived:
+            return 0
+
+        kept_rows = [row for row in range(len(trades)) if row not in archived]
+        # SQLite: nur die archivierten Zeilen löschen, der Rest bleibt stehen
+        removed_rowids: List[int] = []
+        if _trades_rowids is not None:
+            removed_rowids = [rowid for row, rowid in enumerate(_trades_rowids) if row in archived]
+            _trades_rowids = [_trades_rowids[row] for row in kept_rows if row < len(_trades_rowids)]
+            _trades_rowjson = [_trades_rowjson[row] for row in kept_rows if row < len(_trades_rowjson)]
+        _trades_resident = [trades[row] for row in kept_rows]
+        _trades_version += 1
+        _persist_trades(removed_rowids)
+        days = sorted(day for day, rows in by_day.items() if rows[0] in archived)
+
+    log_info(f"🗄️ {len(archived)} geschlossene Trades archiviert ({', '.join(days)})")
+    return len(archived)
+
+
+def _archive_loop():
+    while True:
+        time.sleep(TRADES_ARCHIVE_EVERY_SEC)
+        try:
+            archive_closed_trades()
+        except Exception as e:
+            log_error(f"Archiv Fehler: {e}")
+
+
+def start_trade_archiver():
+    global _archive_thread
+
+    if not TRADES_ARCHIVE_EVERY_SEC or _archive_thread is not None:
+        return
+    _archive_thread = threading.Thread(target=_archive_loop, name="trade-archiver", daemon=True)
+    _archive_thread.start()
+
+
+def read_trade_history(day_from: str, day_to: str, symbol: str = "", close_reason: str = "", limit: int = 100, cursor: str = ""):
+    # Streamt Tagesdateien ab Cursor ("YYYY-MM-DD:byte_offset"), lädt nie alles
+    cursor_day, _, cursor_pos = cursor.partition(":")
+    start_pos = int(cursor_pos) if cursor_day and cursor_pos.isdigit() else 0
+    out: List[Dict[str, Any]] = []
+
+    for day in _history_days():
+        if day < day_from or day > day_to or (cursor_day and day < cursor_day):
+            continue
+        try:
+            with open(_history_path(day), "rb") as f:
+                if day == cursor_day:
+                    f.seek(start_pos)
+                for line in iter(f.readline, b""):
+                    try:
+                        t = json.loads(line)
+                    except Exception:
+                        # abgeschnittene Zeile nach Absturz
+                        continue
+                    if symbol and (t.get("symbol", "") or "").upper() != symbol:
+                        continue
+                    if close_reason and t.get("close_reason") != close_reason:
+                        continue
+                    out.append(t)
+                    if len(out) >= limit:
+                        return out, f"{day}:{f.tell()}"
+        except OSError as e:
+            # Datei zwischen listdir und open verschwunden/unlesbar -> Tag auslassen
+            log_error(f"Archiv Read Fehler {_history_path(day)}: {e}")
+    return out, None
 
 
 # =============================================================================
@@ -409,279 +1635,1651 @@ def convert_symbol_for_twelve(symbol: str) -> str:
 # =============================================================================
 # PREISABFRAGE (VIP-Monitor)
 # =============================================================================
+COINGECKO_MAP = {
+    "BTCUSD": "bitcoin",
+    "ETHUSD": "ethereum",
+    "XRPUSD": "ripple",
+    "DOGEUSD": "dogecoin",
+}
+METALS_SYMBOLS = {"XAUUSD", "SILVER", "XAGUSD"}
+
+
+def price_provider(symbol: str) -> str:
+    symbol = (symbol or "").upper()
+    if symbol in COINGECKO_MAP:
+        return "coingecko"
+    if symbol in METALS_SYMBOLS:
+        return "metals"
+    return "twelve"
+
+
+def _price_ttl(provider: str) -> float:
+    return {
+        "coingecko": PRICE_TTL_COINGECKO_SEC,
+        "metals": PRICE_TTL_METALS_SEC,
+        "feed": PRICE_FEED_STALE_SEC,
+    }.get(provider, PRICE_TTL_TWELVE_SEC)
+
+
+# ---------------------------------------------------------------------
+# Prozessweiter Preis-Cache
+#
+# frisch (< TTL des Providers)        -> Cache-Hit, kein API-Call
+# stale (< PRICE_STALE_MAX_SEC)       -> alter Wert sofort, Refresh im Hintergrund
+# älter / fehlt                       -> synchron abrufen; gleichzeitige Misses
+#                                        desselben Symbols warten auf einen Call
+# ---------------------------------------------------------------------
+_price_cache: Dict[str, Dict[str, Any]] = {}
+_price_refreshing: set = set()
+_price_inflight: Dict[str, Future] = {}     # symbol -> laufender synchroner Abruf
+PRICE_INFLIGHT_WAIT_SEC = 30.0              # > Provider-Timeout inkl. Hedge
+_price_stats = {"hits": 0, "stale_hits": 0, "budget_stale_hits": 0, "misses": 0, "coalesced": 0, "refreshes": 0, "errors": 0, "hedges": 0, "hedge_wins": 0}
+# Budget erschöpft: Symbol -> fetched_at des alten Werts, der weiter ausgeliefert wird
+_price_budget_stale: Dict[str, float] = {}
+_price_budget_warned: Dict[str, float] = {}
+_price_pool = ThreadPoolExecutor(max_workers=PRICE_FETCH_WORKERS, thread_name_prefix="price")
+
+
+def _price_store(requested: List[str], values: Dict[str, float]):
+    now_ts = time.time()
+    with _lock_prices:
+        for symbol in requested:
+            value = values.get(symbol) or 0.0
+            if value > 0:
+                _price_cache[symbol] = {"value": value, "fetched_at": now_ts, "provider": price_provider(symbol)}
+                _price_budget_stale.pop(symbol, None)
+            else:
+                _price_stats["errors"] += 1
+
+
+def _price_refresh_bg(symbols: List[str]):
+    try:
+        _price_store(symbols, _fetch_prices(symbols))
+    except Exception as e:
+        log_error(f"Preis-Refresh Fehler für {','.join(symbols)}: {e}")
+    finally:
+        with _lock_prices:
+            _price_refreshing.difference_update(symbols)
+
+
+def get_prices(symbols: List[str]) -> Dict[str, float]:
+    # Mehrere Symbole auf einmal: Cache zuerst, Rest pro Provider gebündelt
+    wanted = list(dict.fromkeys((s or "").upper() for s in symbols if s))
+    now_ts = time.time()
+    out: Dict[str, float] = {}
+    misses: List[str] = []
+    stale: List[str] = []
+    waits: Dict[str, Future] = {}
+
+    with _lock_prices:
+        budget_note_demand(wanted, now_ts)
+        budget = budget_intervals(wanted, now_ts)
+        for symbol in wanted:
+            entry = _price_cache.get(symbol)
+            age = now_ts - entry["fetched_at"] if entry else None
+
+            if entry and budget[symbol] is None:
+                # Budget bis zum Reset aufgebraucht: alter Wert, aber als veraltet geführt
+                _price_stats["budget_stale_hits"] += 1
+                out[symbol] = entry["value"]
+                _price_budget_stale[symbol] = entry["fetched_at"]
+                if now_ts - _price_budget_warned.get(symbol, 0.0) >= 600:
+                    _price_budget_warned[symbol] = now_ts
+                    log_error(f"Preis {symbol} ist {age / 60:.0f} min alt – API-Budget erschöpft, kein Refresh bis zum Reset")
+                continue
+
+            ttl = max(_price_ttl(entry["provider"]), budget[symbol]) if entry else 0.0
+            if entry and age <= ttl:
+                _price_stats["hits"] += 1
+                out[symbol] = entry["value"]
+            elif entry and age <= ttl + PRICE_STALE_MAX_SEC:
+                _price_stats["stale_hits"] += 1
+                out[symbol] = entry["value"]
+                if symbol not in _price_refreshing:
+                    _price_refreshing.add(symbol)
+                    stale.append(symbol)
+            elif symbol in _price_inflight:
+                # ein anderer Request holt dieses Symbol gerade -> mitwarten statt erneut zahlen
+                _price_stats["coalesced"] += 1
+                waits[symbol] = _price_inflight[symbol]
+            else:
+                _price_stats["misses"] += 1
+                misses.append(symbol)
+                _price_inflight[symbol] = Future()
+
+        if stale:
+            _price_stats["refreshes"] += 1
+            threading.Thread(target=_price_refresh_bg, args=(stale,), daemon=True).start()
+
+    if misses:
+        fetched: Dict[str, float] = {}
+        try:
+            fetched = _fetch_prices(misses)
+            _price_store(misses, fetched)
+        finally:
+            with _lock_prices:
+                for symbol in misses:
+                    _price_inflight.pop(symbol).set_result(fetched.get(symbol) or 0.0)
+        for symbol in misses:
+            out[symbol] = fetched.get(symbol) or 0.0
+
+    if waits:
+        futures_wait(list(waits.values()), timeout=PRICE_INFLIGHT_WAIT_SEC)
+        for symbol, fut in waits.items():
+            out[symbol] = fut.result() if fut.done() else 0.0
+
+    return out
+
+
 def get_price(symbol: str) -> float:
-    global METALS_API_COOLDOWN_UNTIL, TWELVE_API_COOLDOWN_UNTIL
-
-    symbol = symbol.upper()
-    coingecko_map = {
-        "BTCUSD": "bitcoin",
-        "ETHUSD": "ethereum",
-        "XRPUSD": "ripple",
-        "DOGEUSD": "dogecoin",
-    }
+    symbol = (symbol or "").upper()
+    return get_prices([symbol]).get(symbol, 0.0)
+
+
+def price_cache_status() -> dict:
+    now_ts = time.time()
+    with _lock_prices:
+        hits = _price_stats["hits"] + _price_stats["stale_hits"] + _price_stats["budget_stale_hits"]
+        total = hits + _price_stats["misses"]
+        return {
+            **_price_stats,
+            "hit_ratio": round(hits / total, 4) if total else 0.0,
+            "ttl_sec": {p: _price_ttl(p) for p in ("coingecko", "metals", "twelve")},
+            "stale_max_sec": PRICE_STALE_MAX_SEC,
+            "budget_stale_symbols": sorted(_price_budget_stale),
+            "symbols": {
+                sym: {
+                    "value": e["value"],
+                    "provider": e["provider"],
+                    "age_sec": round(now_ts - e["fetched_at"], 2),
+                    "fresh": sym not in _price_budget_stale and now_ts - e["fetched_at"] <= _price_ttl(e["provider"]),
+                    "budget_exhausted": sym in _price_budget_stale,
+                }
+                for sym, e in _price_cache.items()
+            },
+        }
+
+
+# ---------------------------------------------------------------------
+# Credit-Budget (MetalsAPI Monat, TwelveData Tag)
+#
+# Statt erst beim 429 blind zu werden: verbleibende Credits gleichmäßig auf
+# die offenen Symbole und die Restzeit des Fensters verteilen. Das ergibt
+# ein Mindest-Intervall pro Symbol, das der Preis-Cache als TTL nutzt.
+# Ist das Budget aufgebraucht, wird der Provider bis zum Reset nicht mehr
+# angefragt (MetalsAPI fällt dann auf TwelveData zurück).
+# ---------------------------------------------------------------------
+_budget: Dict[str, Dict[str, Any]] = {
+    "metals": {"window": "", "used": 0, "warned": False},
+    "twelve": {"window": "", "used": 0, "warned": False},
+}
+_budget_recent: Dict[str, deque] = {"metals": deque(), "twelve": deque()}   # (ts, credits), letzte Stunde
+_budget_demand: Dict[str, float] = {}                                      # symbol -> zuletzt angefragt
+_budget_loaded = False
+_budget_saved_at = 0.0
+BUDGET_DEMAND_WINDOW_SEC = 600
+
+
+def _budget_allowance(provider: str) -> int:
+    if provider == "metals":
+        return METALS_API_MONTHLY_CREDITS
+    if provider == "twelve":
+        return TWELVE_API_DAILY_CREDITS
+    return 0
+
+
+def _budget_window(provider: str):
+    now = datetime.now(timezone.utc)
+    if provider == "metals":
+        return now.strftime("%Y-%m"), next_utc_month_ts()
+    return now.strftime("%Y-%m-%d"), next_utc_midnight_ts()
 
-    # ---------------------------------------------------------
-    # 1) Crypto via CoinGecko
-    # ---------------------------------------------------------
-    if symbol in coingecko_map:
+
+def _budget_state(provider: str):
+    # Aufruf unter _lock_prices
+    global _budget_loaded
+
+    if not _budget_loaded:
+        _budget_loaded = True
+        saved = _safe_read_json(PRICE_BUDGET_FILE, {})
+        if isinstance(saved, dict):
+            for p, st in saved.items():
+                if p in _budget and isinstance(st, dict):
+                    _budget[p]["window"] = str(st.get("window", ""))
+                    _budget[p]["used"] = int(st.get("used", 0) or 0)
+
+    key, end_ts = _budget_window(provider)
+    st = _budget[provider]
+    if st["window"] != key:
+        st["window"] = key
+        st["used"] = 0
+        st["warned"] = False
+    return st, end_ts
+
+
+def _budget_save(force: bool = False):
+    global _budget_saved_at
+
+    with _lock_prices:
+        if not _budget_loaded or (not force and time.time() - _budget_saved_at < 30):
+            return
+        _budget_saved_at = time.time()
+        data = {p: {"window": st["window"], "used": st["used"]} for p, st in _budget.items()}
+    _safe_write_json_atomic(PRICE_BUDGET_FILE, data)
+
+
+atexit.register(_budget_save, True)
+
+
+def budget_allows(provider: str, credits: int = 1) -> bool:
+    allowance = _budget_allowance(provider)
+    if not allowance:
+        return True
+    with _lock_prices:
+        st, _ = _budget_state(provider)
+        ok = st["used"] + credits <= allowance * (1.0 - PRICE_BUDGET_RESERVE_PCT)
+        if not ok and not st["warned"]:
+            st["warned"] = True
+            log_error(f"Preis-Budget {provider} erschöpft ({st['used']}/{allowance}) – pausiert bis Fensterwechsel.")
+        return ok
+
+
+def budget_charge(provider: str, credits: int = 1):
+    if provider not in _budget:
+        return
+    now_ts = time.time()
+    with _lock_prices:
+        st, _ = _budget_state(provider)
+        st["used"] += credits
+        recent = _budget_recent[provider]
+        recent.append((now_ts, credits))
+        while recent and recent[0][0] < now_ts - 3600:
+            recent.popleft()
+    _budget_save()
+
+
+def budget_note_demand(symbols: List[str], now_ts: float):
+    # Aufruf unter _lock_prices
+    for symbol in symbols:
+        _budget_demand[symbol] = now_ts
+    cutoff = now_ts - BUDGET_DEMAND_WINDOW_SEC
+    for symbol in [s for s, ts in _budget_demand.items() if ts < cutoff]:
+        del _budget_demand[symbol]
+
+
+def _budget_metals_ok() -> bool:
+    return bool(METALS_API_KEY) and time.time() >= METALS_API_COOLDOWN_UNTIL and budget_allows("metals")
+
+
+def _budget_billing_provider(symbol: str, metals_ok: bool) -> str:
+    # Wer die Abfrage dieses Symbols tatsächlich bezahlt (metals_ok einmal pro Durchlauf)
+    provider = price_provider(symbol)
+    if provider == "metals":
+        return "metals" if metals_ok else "twelve"
+    return provider
+
+
+def budget_intervals(symbols: List[str], now_ts: Optional[float] = None) -> Dict[str, Optional[float]]:
+    # Mindestabstand (s) zwischen zwei Abfragen pro Symbol, damit das Budget
+    # reicht; None = Budget bis zum Reset aufgebraucht. Abrechnung und
+    # Nachfrage einmal pro Aufruf bestimmen, nicht pro Symbol.
+    now_ts = time.time() if now_ts is None else now_ts
+    if not METALS_API_MONTHLY_CREDITS and not TWELVE_API_DAILY_CREDITS:
+        return {s: 0.0 for s in symbols}
+
+    with _lock_prices:
+        metals_ok = _budget_metals_ok()
+        per_provider: Dict[str, Optional[float]] = {}
+        for provider in ("metals", "twelve"):
+            allowance = _budget_allowance(provider)
+            if not allowance:
+                continue
+            st, end_ts = _budget_state(provider)
+            remaining = allowance * (1.0 - PRICE_BUDGET_RESERVE_PCT) - st["used"]
+            time_left = max(1.0, end_ts - now_ts)
+            if remaining <= 0:
+                per_provider[provider] = None
+            elif provider == "metals":
+                # ein Request deckt alle Metalle ab
+                per_provider[provider] = time_left / remaining
+            else:
+                demand = {
+                    convert_symbol_for_twelve(s)
+                    for s in _budget_demand
+                    if _budget_billing_provider(s, metals_ok) == "twelve"
+                }
+                per_provider[provider] = time_left * max(1, len(demand)) / remaining
+        return {s: per_provider.get(_budget_billing_provider(s, metals_ok), 0.0) for s in symbols}
+
+
+def budget_interval(symbol: str, now_ts: Optional[float] = None) -> Optional[float]:
+    return budget_intervals([symbol], now_ts)[symbol]
+
+
+def price_budget_status() -> dict:
+    now_ts = time.time()
+    out = {}
+    for provider in ("metals", "twelve"):
+        allowance = _budget_allowance(provider)
+        with _lock_prices:
+            st, end_ts = _budget_state(provider)
+            burn_per_hour = float(sum(c for ts, c in _budget_recent[provider] if ts >= now_ts - 3600))
+            used = st["used"]
+            window = st["window"]
+            metals_ok = _budget_metals_ok()
+            demand = sorted(s for s in _budget_demand if _budget_billing_provider(s, metals_ok) == provider)
+            intervals = budget_intervals(demand, now_ts)
+
+        usable = allowance * (1.0 - PRICE_BUDGET_RESERVE_PCT) if allowance else None
+        remaining = usable - used if usable is not None else None
+        hours_left = max(0.0, (end_ts - now_ts) / 3600.0)
+        projected = used + burn_per_hour * hours_left
+        out[provider] = {
+            "allowance": allowance or None,
+            "usable": usable,
+            "used": used,
+            "remaining": remaining,
+            "window": window,
+            "resets_at": end_ts,
+            "burn_per_hour": burn_per_hour,
+            "projected_window_use": round(projected, 1),
+            "projected_over_budget": bool(usable is not None and projected > usable),
+            "projected_exhaust_at": (
+                now_ts + remaining / burn_per_hour * 3600.0
+                if remaining is not None and burn_per_hour > 0 and remaining > 0
+                else None
+            ),
+            "symbols": demand,
+            # None = erschöpft, bis zum Reset keine Abfragen
+            "interval_sec": {s: round(v, 1) if v is not None else None for s, v in intervals.items()},
+        }
+    return out
+
+
+def _fetch_price(symbol: str) -> float:
+    symbol = (symbol or "").upper()
+    return _fetch_prices([symbol]).get(symbol, 0.0)
+
+
+def _fetch_prices(symbols: List[str]) -> Dict[str, float]:
+    # Gruppiert nach Provider, ein Request pro Gruppe, Gruppen laufen parallel.
+    # Fehlende Symbole fehlen im Ergebnis.
+    groups: Dict[str, List[str]] = {}
+    for symbol in symbols:
+        symbol = symbol.upper()
+        groups.setdefault(price_provider(symbol), []).append(symbol)
+
+    futures = []
+    if groups.get("coingecko"):
+        futures.append(_price_pool.submit(_fetch_coingecko, groups["coingecko"]))
+    if groups.get("twelve"):
+        futures.append(_price_pool.submit(_fetch_twelve, groups["twelve"]))
+
+    out: Dict[str, float] = {}
+
+    # Metals koordiniert der aufrufende Thread (nicht der Pool -> kein Deadlock)
+    if groups.get("metals"):
+        out.update(_fetch_metals_hedged(groups["metals"]))
+
+    for fut in futures:
+        try:
+            out.update(fut.result())
+        except Exception as e:
+            log_error(f"Preisabruf Fehler: {e}")
+
+    return out
+
+
+def _fetch_metals_hedged(symbols: List[str]) -> Dict[str, float]:
+    # MetalsAPI zuerst; hängt sie länger als PRICE_HEDGE_AFTER_SEC, parallel
+    # TwelveData fragen und die erste vollständige gültige Antwort nehmen.
+    primary = _price_pool.submit(_fetch_metals, symbols)
+    can_hedge = (
+        PRICE_HEDGE_AFTER_SEC > 0
+        and TWELVE_API_KEY
+        and time.time() >= TWELVE_API_COOLDOWN_UNTIL
+        and budget_allows("twelve", len(symbols))
+    )
+
+    done, _ = futures_wait([primary], timeout=PRICE_HEDGE_AFTER_SEC if can_hedge else None)
+    if primary in done or not can_hedge:
+        got = dict(primary.result())
+        missing = [s for s in symbols if s not in got]
+        if missing:
+            # TwelveData-Fallback für alles, was MetalsAPI nicht liefern konnte
+            got.update(_fetch_twelve(missing))
+        return got
+
+    with _lock_prices:
+        _price_stats["hedges"] += 1
+    hedge = _price_pool.submit(_fetch_twelve, symbols)
+
+    got: Dict[str, float] = {}
+    pending = {primary, hedge}
+    while pending:
+        done, pending = futures_wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            try:
+                res = fut.result()
+            except Exception as e:
+                log_error(f"Preisabruf Fehler (Metals): {e}")
+                continue
+            for symbol, val in res.items():
+                got.setdefault(symbol, val)
+            if all(s in res for s in symbols):
+                if fut is hedge:
+                    with _lock_prices:
+                        _price_stats["hedge_wins"] += 1
+                return {s: res[s] for s in symbols}
+        if all(s in got for s in symbols):
+            break
+    return got
+
+
+def _chunks(items: List[str], size: int):
+    size = max(1, size)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+# ---------------------------------------------------------
+# 1) Crypto via CoinGecko (ids=a,b,c)
+# ---------------------------------------------------------
+def _fetch_coingecko(symbols: List[str]) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for chunk in _chunks(symbols, PRICE_BATCH_MAX):
+        ids = sorted({COINGECKO_MAP[s] for s in chunk})
         try:
             r = _http.get(
-                f"https://api.coingecko.com/api/v3/simple/price?ids={coingecko_map[symbol]}&vs_currencies=usd",
+                f"{COINGECKO_API_BASE}/api/v3/simple/price?ids={','.join(ids)}&vs_currencies=usd",
                 timeout=10,
             )
             data = r.json()
-            return float(data[coingecko_map[symbol]]["usd"])
         except Exception as e:
-            log_error(f"Preisabruf Fehler (CoinGecko) für {symbol}: {e}")
-            return 0.0
-
-    # ---------------------------------------------------------
-    # 2) Metals via MetalsAPI (mit Cooldown)
-    # ---------------------------------------------------------
-    if symbol in {"XAUUSD", "SILVER", "XAGUSD"}:
-        base = "XAU" if "XAU" in symbol else "XAG"
+            log_error(f"Preisabruf Fehler (CoinGecko) für {','.join(chunk)}: {e}")
+            continue
 
-        if METALS_API_KEY and time.time() >= METALS_API_COOLDOWN_UNTIL:
+        for symbol in chunk:
             try:
-                r = _http.get(
-                    f"https://metals-api.com/api/latest?access_key={METALS_API_KEY}&base={base}&symbols=USD",
-                    timeout=10,
-                )
-                raw = r.json()
-
-                # metals-api liefert teils {"data": {...}}
-                data = raw.get("data", raw) if isinstance(raw, dict) else raw
-
-                if (
-                    isinstance(data, dict)
-                    and data.get("success") is True
-                    and "rates" in data
-                    and "USD" in data["rates"]
-                ):
-                    val = float(data["rates"]["USD"])
-                    if val < 1:
-                        val = 1 / val
-                    return val
-
-                # Fehler robust lesen (nested / plain)
-                err = {}
-                if isinstance(data, dict):
-                    err = data.get("error", {}) or {}
-                if not err and isinstance(raw, dict):
-                    err = raw.get("error", {}) or {}
-
-                code = int((err.get("code", 0) or 0)) if isinstance(err, dict) else 0
-                info = str(err.get("info", "")) if isinstance(err, dict) else ""
-
-                if code == 429:
-                    # Monatslimit -> bis Monatswechsel pausieren
-                    if "monthly" in info.lower():
-                        METALS_API_COOLDOWN_UNTIL = next_utc_month_ts()
-                        log_error("MetalsAPI Monatslimit erreicht (429) – Pause bis Monatswechsel, nutze TwelveData-Fallback.")
-                    else:
-                        METALS_API_COOLDOWN_UNTIL = time.time() + 3600
-                        log_error("MetalsAPI Limit erreicht (429) – 1h Pause, nutze TwelveData-Fallback.")
-                else:
-                    log_error(f"MetalsAPI Fehler für {symbol}: {raw}")
-
+                out[symbol] = float(data[COINGECKO_MAP[symbol]]["usd"])
             except Exception as e:
-                log_error(f"MetalsAPI Fallback für {symbol}: {e}")
+                log_error(f"Preisabruf Fehler (CoinGecko) für {symbol}: {e}")
+    return out
 
-    # ---------------------------------------------------------
-    # 3) TwelveData Fallback (mit Cooldown)
-    # ---------------------------------------------------------
-    if not TWELVE_API_KEY:
-        log_error("TWELVE_API_KEY fehlt (Fallback nicht möglich)")
-        return 0.0
 
-    if time.time() < TWELVE_API_COOLDOWN_UNTIL:
-        return 0.0
+# ---------------------------------------------------------
+# 2) Metals via MetalsAPI (XAU + XAG in einem Call, mit Cooldown)
+# ---------------------------------------------------------
+def _fetch_metals(symbols: List[str]) -> Dict[str, float]:
+    global METALS_API_COOLDOWN_UNTIL
 
+    if not METALS_API_KEY or time.time() < METALS_API_COOLDOWN_UNTIL:
+        return {}
+    if not budget_allows("metals", 1):
+        return {}
+
+    metal_of = {s: ("XAU" if "XAU" in s else "XAG") for s in symbols}
+    metals = sorted(set(metal_of.values()))
+    if len(metals) == 1:
+        query = f"base={metals[0]}&symbols=USD"
+    else:
+        query = f"base=USD&symbols={','.join(metals)}"
+
+    budget_charge("metals", 1)
     try:
-        symbol_twelve = convert_symbol_for_twelve(symbol)
         r = _http.get(
-            f"https://api.twelvedata.com/price?symbol={symbol_twelve}&apikey={TWELVE_API_KEY}",
+            f"{METALS_API_BASE}/api/latest?access_key={METALS_API_KEY}&{query}",
             timeout=10,
         )
-        data = r.json()
-
-        if "price" in data and str(data["price"]).strip():
-            return float(data["price"])
-
-        code = int((data.get("code", 0) or 0)) if isinstance(data, dict) else 0
-        msg = str(data.get("message", "")) if isinstance(data, dict) else ""
+        raw = r.json()
+
+        # metals-api liefert teils {"data": {...}}
+        data = raw.get("data", raw) if isinstance(raw, dict) else raw
+
+        if isinstance(data, dict) and data.get("success") is True and isinstance(data.get("rates"), dict):
+            rates = data["rates"]
+            out: Dict[str, float] = {}
+            for symbol, metal in metal_of.items():
+                key = "USD" if len(metals) == 1 else metal
+                if key not in rates:
+                    continue
+                val = float(rates[key])
+                if val <= 0:
+                    continue
+                if val < 1:
+                    val = 1 / val
+                out[symbol] = val
+            return out
+
+        # Fehler robust lesen (nested / plain)
+        err = {}
+        if isinstance(data, dict):
+            err = data.get("error", {}) or {}
+        if not err and isinstance(raw, dict):
+            err = raw.get("error", {}) or {}
+
+        code = int((err.get("code", 0) or 0)) if isinstance(err, dict) else 0
+        info = str(err.get("info", "")) if isinstance(err, dict) else ""
 
         if code == 429:
-            TWELVE_API_COOLDOWN_UNTIL = next_utc_midnight_ts()
-            if "daily" in msg.lower() or "credits" in msg.lower():
-                log_error("TwelveData Daily Limit erreicht (429) – Pause bis nächste UTC-Mitternacht.")
+            # Monatslimit -> bis Monatswechsel pausieren
+            if "monthly" in info.lower():
+                METALS_API_COOLDOWN_UNTIL = next_utc_month_ts()
+                log_error("MetalsAPI Monatslimit erreicht (429) – Pause bis Monatswechsel, nutze TwelveData-Fallback.")
             else:
-                log_error("TwelveData Limit erreicht (429) – Pause bis nächste UTC-Mitternacht.")
-            return 0.0
-
-        log_error(f"Twelve Data Fehler für {symbol}: {data}")
-        return 0.0
+                METALS_API_COOLDOWN_UNTIL = time.time() + 3600
+                log_error("MetalsAPI Limit erreicht (429) – 1h Pause, nutze TwelveData-Fallback.")
+        else:
+            log_error(f"MetalsAPI Fehler für {','.join(symbols)}: {raw}")
 
     except Exception as e:
-        log_error(f"Preisabruf Fehler (TwelveData) für {symbol}: {e}")
-        return 0.0
+        log_error(f"MetalsAPI Fallback für {','.join(symbols)}: {e}")
+
+    return {}
+
+
+# ---------------------------------------------------------
+# 3) TwelveData (symbol=A,B,C; auch Fallback für Metals, mit Cooldown)
+# ---------------------------------------------------------
+def _twelve_error(data, symbols: List[str]):
+    global TWELVE_API_COOLDOWN_UNTIL
+
+    code = int((data.get("code", 0) or 0)) if isinstance(data, dict) else 0
+    msg = str(data.get("message", "")) if isinstance(data, dict) else ""
+
+    if code == 429:
+        TWELVE_API_COOLDOWN_UNTIL = next_utc_midnight_ts()
+        if "daily" in msg.lower() or "credits" in msg.lower():
+            log_error("TwelveData Daily Limit erreicht (429) – Pause bis nächste UTC-Mitternacht.")
+        else:
+            log_error("TwelveData Limit erreicht (429) – Pause bis nächste UTC-Mitternacht.")
+        return
+
+    log_error(f"Twelve Data Fehler für {','.join(symbols)}: {data}")
+
+
+def _fetch_twelve(symbols: List[str]) -> Dict[str, float]:
+    if not TWELVE_API_KEY:
+        log_error("TWELVE_API_KEY fehlt (Fallback nicht möglich)")
+        return {}
+
+    # mehrere interne Symbole können auf dasselbe TwelveData-Symbol zeigen (GOLD/XAUUSD)
+    by_twelve: Dict[str, List[str]] = {}
+    for symbol in symbols:
+        by_twelve.setdefault(convert_symbol_for_twelve(symbol), []).append(symbol)
+
+    out: Dict[str, float] = {}
+    for chunk in _chunks(list(by_twelve), PRICE_BATCH_MAX):
+        if time.time() < TWELVE_API_COOLDOWN_UNTIL:
+            break
+        if not budget_allows("twelve", len(chunk)):
+            break
+
+        budget_charge("twelve", len(chunk))
+        try:
+            r = _http.get(
+                f"{TWELVE_API_BASE}/price?symbol={','.join(chunk)}&apikey={TWELVE_API_KEY}",
+                timeout=10,
+            )
+            data = r.json()
+        except Exception as e:
+            log_error(f"Preisabruf Fehler (TwelveData) für {','.join(chunk)}: {e}")
+            continue
+
+        if not isinstance(data, dict):
+            _twelve_error(data, chunk)
+            continue
+
+        # Einzelsymbol: {"price": ...}; mehrere: {"XAU/USD": {"price": ...}, ...}
+        if len(chunk) == 1:
+            per_symbol = {chunk[0]: data}
+        elif data.get("status") == "error" and "code" in data:
+            _twelve_error(data, chunk)
+            continue
+        else:
+            per_symbol = data
+
+        for tw_symbol in chunk:
+            item = per_symbol.get(tw_symbol)
+            if isinstance(item, dict) and "price" in item and str(item["price"]).strip():
+                try:
+                    val = float(item["price"])
+                except Exception:
+                    val = 0.0
+                if val > 0:
+                    for symbol in by_twelve[tw_symbol]:
+                        out[symbol] = val
+                    continue
+            _twelve_error(item, [tw_symbol])
+            if time.time() < TWELVE_API_COOLDOWN_UNTIL:
+                break
+
+    return out
+
+
+# =============================================================================
+# MONITOR LOGIK (VIP)
+# =============================================================================
+def _alert_trade(symbol: str, side: str, msg: str):
+    text = f"*{symbol}* | *{str(side).upper()}*\n{msg}"
+    queue_telegram(text)
+
+
+def _debug_trade_state(t: Dict[str, Any], price: float):
+    if not MONITOR_DEBUG:
+        return
+    symbol = (t.get("symbol") or "").upper()
+    side = t.get("side")
+    print(
+        "DEBUG "
+        f"{symbol} {side} | price={price} entry={t.get('entry')} sl={t.get('sl')} "
+        f"tp1={t.get('tp1')} tp2={t.get('tp2')} tp3={t.get('tp3')} | "
+        f"tp1_hit={t.get('tp1_hit')} tp2_hit={t.get('tp2_hit')} tp3_hit={t.get('tp3_hit')} "
+        f"sl_hit={t.get('sl_hit')} closed={t.get('closed')}",
+        flush=True,
+    )
+
+
+# ---------------------------------------------------------------------
+# Adaptiver Scheduler (pro Symbol)
+#
+# Abstand zum nächsten offenen Trigger (TP1..TP3, SL, Entry für BE nach TP1)
+# relativ zum Preis, skaliert mit der jüngsten Volatilität (EWMA der
+# |Rendite| pro sqrt(s)). Random-Walk-Annahme: bis zum Level braucht der
+# Preis grob (Abstand / sigma)^2 Sekunden; davon nehmen wir einen Bruchteil.
+# ---------------------------------------------------------------------
+_monitor_due: Dict[str, float] = {}                 # symbol -> nächste Abfrage (ts)
+_monitor_sched: Dict[str, Dict[str, Any]] = {}      # symbol -> letzte Planung (Status)
+_monitor_vol: Dict[str, Dict[str, float]] = {}      # symbol -> {"price", "ts", "sigma"}
+
+
+def _monitor_observe(symbol: str, price: float, now_ts: float):
+    v = _monitor_vol.get(symbol)
+    if v and price == v["price"]:
+        # unveränderter Preis kommt meist aus dem Cache -> keine Aussage über Volatilität
+        return
+    if v and v["price"] > 0 and now_ts > v["ts"]:
+        dt = now_ts - v["ts"]
+        sample = abs(price / v["price"] - 1.0) / (dt ** 0.5)
+        v["sigma"] = sample if v["sigma"] <= 0 else 0.8 * v["sigma"] + 0.2 * sample
+        v["price"] = price
+        v["ts"] = now_ts
+    else:
+        _monitor_vol[symbol] = {"price": price, "ts": now_ts, "sigma": v["sigma"] if v else 0.0}
+
+
+def _monitor_interval(symbol: str, distance: Optional[float], budget_sec: Optional[float] = 0.0) -> float:
+    sigma = (_monitor_vol.get(symbol) or {}).get("sigma", 0.0)
+    if distance is None:
+        interval = MONITOR_MAX_POLL_SEC
+    elif sigma <= 0:
+        interval = float(MONITOR_POLL_SEC)
+    else:
+        interval = MONITOR_ADAPTIVE_SAFETY * (distance / sigma) ** 2
+    # schneller als das Credit-Budget erlaubt bringt nichts (Cache liefert nur den alten Preis);
+    # None = Budget erschöpft, bis zum Reset gibt es keinen neuen Preis
+    interval = MONITOR_MAX_POLL_SEC if budget_sec is None else max(interval, budget_sec)
+    return min(MONITOR_MAX_POLL_SEC, max(MONITOR_MIN_POLL_SEC, interval))
+
+
+def _monitor_schedule(prices: Dict[str, float], now_ts: float):
+    # Abstand zum nächsten offenen Trigger pro Symbol per bisect im Trigger-Index
+    nearest: Dict[str, Optional[float]] = {}
+    for symbol, price in prices.items():
+        idx = _trigger_index["symbols"].get(symbol)
+        d = idx.nearest(price) if idx is not None and price and price > 0 else None
+        nearest[symbol] = d / price if d is not None else None
+    budget = budget_intervals(list(prices), now_ts)
+
+    for symbol, price in prices.items():
+        if not price:
+            interval = float(MONITOR_POLL_SEC)
+        else:
+            interval = _monitor_interval(symbol, nearest.get(symbol), budget.get(symbol, 0.0))
+        _monitor_due[symbol] = now_ts + interval
+        _monitor_sched[symbol] = {
+            "interval_sec": round(interval, 2),
+            "distance_pct": round(nearest[symbol] * 100, 4) if nearest.get(symbol) is not None else None,
+            "sigma": (_monitor_vol.get(symbol) or {}).get("sigma", 0.0),
+        }
+
+
+def _monitor_sleep_sec() -> float:
+    # bis zum frühesten fälligen Symbol, aber spätestens nach MONITOR_POLL_SEC
+    # nachsehen (neue Trades über /add_manual)
+    if not MONITOR_ADAPTIVE or not _monitor_due:
+        return float(MONITOR_POLL_SEC)
+    wait = min(_monitor_due.values()) - time.time()
+    return min(float(MONITOR_POLL_SEC), max(MONITOR_MIN_POLL_SEC, wait))
+
+
+def monitor_schedule_status() -> dict:
+    now_ts = time.time()
+    return {
+        "adaptive": MONITOR_ADAPTIVE,
+        "min_poll_sec": MONITOR_MIN_POLL_SEC,
+        "max_poll_sec": MONITOR_MAX_POLL_SEC,
+        "symbols": {
+            symbol: {**info, "next_in_sec": round(_monitor_due.get(symbol, now_ts) - now_ts, 2)}
+            for symbol, info in list(_monitor_sched.items())
+        },
+    }
+
+
+TRADE_EVENT_TEXTS = {
+    "tp1": "💶 *TP1 erreicht – BE setzen oder Trade managen. Wir machen uns auf den Weg zu TP2!* 🚀",
+    "tp2": "💶 *TP2 erreicht – weiter geht’s! Full TP in Sicht!* ✨",
+    "tp3": "🏆 *Full TP erreicht – Glückwunsch an alle! 💶💶💰🥳*",
+    "sl": "🛑 *SL erreicht – schade. Wir bewerten neu und kommen stärker zurück.*",
+    "be": "💰 *Trade teilweise im Gewinn geschlossen – TP1 wurde erreicht, Rest auf Entry beendet.*",
+    "be_tp2": "💰 *Trade teilweise im Gewinn geschlossen – TP1 + TP2 wurden erreicht, Rest auf Entry beendet.*",
+}
+
+
+# Zustand eines Trades als Bitmaske (identisch in TradeBook)
+TRADE_TP1, TRADE_TP2, TRADE_TP3, TRADE_SL, TRADE_CLOSED = 1, 2, 4, 8, 16
+TRADE_FLAG_KEYS = (
+    (TRADE_TP1, "tp1_hit"),
+    (TRADE_TP2, "tp2_hit"),
+    (TRADE_TP3, "tp3_hit"),
+    (TRADE_SL, "sl_hit"),
+    (TRADE_CLOSED, "closed"),
+)
+
+
+def trade_flags(t: Dict[str, Any]) -> int:
+    return sum(bit for bit, key in TRADE_FLAG_KEYS if t.get(key))
+
+
+def trade_transition(side: str, levels: tuple, flags: int, price: float, eps_pct: Optional[float] = None) -> Tuple[int, List[str], Optional[str]]:
+    # Reine Zustandsmaschine TP1 -> TP2 -> TP3 / SL / BE nach TP1.
+    # levels = (entry, sl, tp1, tp2, tp3); liefert (neue Flags, Events in
+    # Alert-Reihenfolge tp1, tp2, tp3, sl, be, close_reason oder None).
+    entry, sl, tp1, tp2, tp3 = levels
+    if side == "long":
+        def hit_tp(lv):
+            return price >= (lv - trigger_eps_abs(lv, eps_pct))
+
+        def hit_down(lv):
+            return price <= (lv + trigger_eps_abs(lv, eps_pct))
+    elif side == "short":
+        def hit_tp(lv):
+            return price <= (lv + trigger_eps_abs(lv, eps_pct))
+
+        def hit_down(lv):
+            return price >= (lv - trigger_eps_abs(lv, eps_pct))
+    else:
+        return flags, [], None
+
+    events: List[str] = []
+    reason = None
+
+    if not flags & TRADE_TP1 and hit_tp(tp1):
+        flags |= TRADE_TP1
+        events.append("tp1")
+
+    if not flags & TRADE_TP2 and hit_tp(tp2):
+        flags |= TRADE_TP1 | TRADE_TP2
+        events.append("tp2")
+
+    if not flags & TRADE_TP3 and hit_tp(tp3):
+        flags |= TRADE_TP1 | TRADE_TP2 | TRADE_TP3 | TRADE_CLOSED
+        reason = "tp3"
+        events.append("tp3")
+
+    if not flags & TRADE_CLOSED:
+        # SL nur vor TP1, danach Entry (Break-even) als Ausstieg
+        if not flags & TRADE_TP1 and not flags & TRADE_SL and hit_down(sl):
+            flags |= TRADE_SL | TRADE_CLOSED
+            reason = "sl"
+            events.append("sl")
+        elif flags & TRADE_TP1 and hit_down(entry):
+            flags |= TRADE_CLOSED
+            reason = "be_after_tp"
+            events.append("be")
+
+    return flags, events, reason
+
+
+def apply_trade_state(t: Dict[str, Any], flags: int, close_reason: Optional[str]):
+    for bit, key in TRADE_FLAG_KEYS:
+        t[key] = bool(flags & bit)
+    if close_reason:
+        t["close_reason"] = close_reason
+
+
+def trade_levels(t: Dict[str, Any]) -> tuple:
+    return tuple(parse_float(t.get(key)) or 0.0 for key in ("entry", "sl", "tp1", "tp2", "tp3"))
+
+
+def evaluate_trade(t: Dict[str, Any], price: float) -> List[str]:
+    # Wendet einen Preis auf einen offenen Trade an (mutiert t) und liefert
+    # die ausgelösten Events in Alert-Reihenfolge: tp1, tp2, tp3, sl, be.
+    side = (t.get("side", "") or "").lower()
+    flags, events, reason = trade_transition(side, trade_levels(t), trade_flags(t), price)
+    if events:
+        apply_trade_state(t, flags, reason)
+    return events
+
+
+def _alert_trade_events(t: Dict[str, Any], events: List[str]):
+    symbol = (t.get("symbol", "") or "").upper()
+    side = (t.get("side", "") or "").lower()
+    for ev in events:
+        key = "be_tp2" if ev == "be" and t.get("tp2_hit") else ev
+        _alert_trade(symbol, side, TRADE_EVENT_TEXTS[key])
+
+
+# ---------------------------------------------------------------------
+# Spaltenbasiertes Trade-Buch (NumPy)
+#
+# Für tausende offene Trades: Levels, Seite und Hit-Flags als Arrays, alle
+# Long-/Short-Trigger für einen Preisvektor in einem Durchlauf. Zurück kommen
+# nur die Zustandsübergänge; Semantik identisch zu evaluate_trade().
+# ---------------------------------------------------------------------
+class TradeBook:
+    TP1, TP2, TP3, SL, CLOSED = TRADE_TP1, TRADE_TP2, TRADE_TP3, TRADE_SL, TRADE_CLOSED
+
+    def __init__(self, trades: List[Dict[str, Any]], rows: List[int]):
+        self.rows: List[int] = []
+        self.pos: Dict[int, int] = {}          # Index in trades -> Spalte
+        self.symbols: List[str] = []
+        self.code: Dict[str, int] = {}
+        for name, arr in self._columns(trades, []).items():
+            setattr(self, name, arr)
+        self.extend(trades, rows)
+
+    def _columns(self, trades: List[Dict[str, Any]], rows: List[int]) -> Dict[str, Any]:
+        for i in rows:
+            symbol = (trades[i].get("symbol", "") or "").upper()
+            if symbol not in self.code:
+                self.code[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+
+        def col(key):
+            return np.array([parse_float(trades[i].get(key)) or 0.0 for i in rows], dtype=np.float64)
+
+        eps_pct = max(0.0, TRIGGER_EPS_PCT)
+        cols = {
+            "sym": np.array([self.code[(trades[i].get("symbol", "") or "").upper()] for i in rows], dtype=np.int32),
+            "long": np.array([(trades[i].get("side", "") or "").lower() == "long" for i in rows], dtype=bool),
+            "entry": col("entry"), "sl": col("sl"), "tp1": col("tp1"), "tp2": col("tp2"), "tp3": col("tp3"),
+        }
+        for key in ("entry", "sl", "tp1", "tp2", "tp3"):
+            cols[f"eps_{key}"] = np.abs(cols[key]) * eps_pct
+
+        flags = np.zeros(len(rows), dtype=np.uint8)
+        for bit, key in TRADE_FLAG_KEYS:
+            flags |= np.array([bool(trades[i].get(key)) for i in rows], dtype=np.uint8) * np.uint8(bit)
+        cols["flags"] = flags
+        return cols
+
+    def extend(self, trades: List[Dict[str, Any]], rows: List[int]):
+        # neue Trades anhängen (nur deren Dicts lesen, Spalten per concatenate)
+        rows = [r for r in rows if r not in self.pos]
+        if not rows:
+            return
+        for name, arr in self._columns(trades, rows).items():
+            setattr(self, name, np.concatenate([getattr(self, name), arr]))
+        for row in rows:
+            self.pos[row] = len(self.rows)
+            self.rows.append(row)
+
+    def set_flags(self, row: int, flags: int):
+        # Übergang außerhalb evaluate() (Index-/Schleifenpfad) nachziehen
+        k = self.pos.get(row)
+        if k is not None:
+            self.flags[k] = flags
+
+    @classmethod
+    def from_trades(cls, trades: List[Dict[str, Any]]) -> "TradeBook":
+        rows = [
+            i for i, t in enumerate(trades)
+            if not t.get("closed") and (t.get("side", "") or "").lower() in {"long", "short"}
+        ]
+        return cls(trades, rows)
+
+    def _tp(self, p, level, eps):
+        return np.where(self.long, p >= (level - eps), p <= (level + eps))
+
+    def evaluate(self, prices: Dict[str, float]):
+        # -> Liste (Index in trades, Events, neue Flags) nur für Trades mit Übergang
+        if not self.rows:
+            return []
+        pv = np.array([prices.get(s, 0.0) or 0.0 for s in self.symbols], dtype=np.float64)
+        p = pv[self.sym]
+        f = self.flags
+        live = (p > 0) & ((f & self.CLOSED) == 0)
+
+        h1 = live & ((f & self.TP1) == 0) & self._tp(p, self.tp1, self.eps_tp1)
+        h2 = live & ((f & self.TP2) == 0) & self._tp(p, self.tp2, self.eps_tp2)
+        h3 = live & ((f & self.TP3) == 0) & self._tp(p, self.tp3, self.eps_tp3)
+        tp1_now = ((f & self.TP1) != 0) | h1 | h2 | h3
+
+        open_after = live & ~h3
+        sl_cond = np.where(self.long, p <= (self.sl + self.eps_sl), p >= (self.sl - self.eps_sl))
+        be_cond = np.where(self.long, p <= (self.entry + self.eps_entry), p >= (self.entry - self.eps_entry))
+        hsl = open_after & ~tp1_now & ((f & self.SL) == 0) & sl_cond
+        hbe = open_after & tp1_now & be_cond
+
+        changed = np.nonzero(h1 | h2 | h3 | hsl | hbe)[0]
+        if not len(changed):
+            return []
+
+        nf = f.copy()
+        nf[h1] |= self.TP1
+        nf[h2] |= self.TP1 | self.TP2
+        nf[h3] |= self.TP1 | self.TP2 | self.TP3 | self.CLOSED
+        nf[hsl] |= self.SL | self.CLOSED
+        nf[hbe] |= self.CLOSED
+        self.flags = nf
+
+        out = []
+        for k in changed.tolist():
+            events = [ev for ev, m in (("tp1", h1), ("tp2", h2), ("tp3", h3), ("sl", hsl), ("be", hbe)) if m[k]]
+            out.append((self.rows[k], events, int(nf[k])))
+        return out
+
+    def apply(self, t: Dict[str, Any], events: List[str], flags: int):
+        reason = {"tp3": "tp3", "sl": "sl", "be": "be_after_tp"}.get(events[-1]) if events else None
+        apply_trade_state(t, flags, reason)
+
+
+# ---------------------------------------------------------------------
+# Trigger-Level-Index (pro Symbol)
+#
+# Alle offenen Trigger-Schwellen (genau die Vergleichswerte aus hit_* inkl.
+# Epsilon) sortiert. Bewegt sich der Preis von p0 nach p1, können nur Trades
+# mit einer Schwelle in [p0, p1] einen Übergang haben -> bisect statt alle
+# Trades anfassen. Nach jedem Übergang wird der Trade neu einsortiert.
+# ---------------------------------------------------------------------
+def trigger_thresholds(t: Dict[str, Any], eps_pct: Optional[float] = None) -> List[float]:
+    side = (t.get("side", "") or "").lower()
+    if t.get("closed") or side not in {"long", "short"}:
+        return []
+    sign = -1.0 if side == "long" else 1.0
+    out = []
+    for key in ("tp1", "tp2", "tp3"):
+        if not t.get(f"{key}_hit"):
+            lv = parse_float(t.get(key)) or 0.0
+            out.append(lv + sign * trigger_eps_abs(lv, eps_pct))
+    if t.get("tp1_hit"):
+        lv = parse_float(t.get("entry")) or 0.0
+        out.append(lv - sign * trigger_eps_abs(lv, eps_pct))
+    elif not t.get("sl_hit"):
+        lv = parse_float(t.get("sl")) or 0.0
+        out.append(lv - sign * trigger_eps_abs(lv, eps_pct))
+    return out
+
+
+class TriggerIndex:
+    def __init__(self, eps_pct: Optional[float] = None):
+        self.eps_pct = eps_pct
+        self.keys: List[float] = []
+        self.rows: List[int] = []
+        self.by_row: Dict[int, List[float]] = {}
+        self.last_price: Optional[float] = None
+        self.fresh: List[int] = []   # seit dem letzten Preis neu angelegt -> einmal voll prüfen
+
+    def add(self, row: int, t: Dict[str, Any]):
+        thresholds = trigger_thresholds(t, self.eps_pct)
+        if not thresholds:
+            return
+        self.by_row[row] = thresholds
+        for thr in thresholds:
+            pos = bisect_right(self.keys, thr)
+            self.keys.insert(pos, thr)
+            self.rows.insert(pos, row)
+
+    def remove(self, row: int):
+        for thr in self.by_row.pop(row, []):
+            i = bisect_left(self.keys, thr)
+            while i < len(self.keys) and self.keys[i] == thr:
+                if self.rows[i] == row:
+                    del self.keys[i]
+                    del self.rows[i]
+                    break
+                i += 1
+
+    def crossed(self, p0: float, p1: float) -> List[int]:
+        lo, hi = (p0, p1) if p0 <= p1 else (p1, p0)
+        i = bisect_left(self.keys, lo)
+        j = bisect_right(self.keys, hi)
+        if i == j:
+            return []
+        return sorted(set(self.rows[i:j]))
+
+    def open_rows(self) -> List[int]:
+        return sorted(self.by_row)
+
+    def nearest(self, price: float) -> Optional[float]:
+        # absoluter Abstand zur nächsten Schwelle
+        i = bisect_left(self.keys, price)
+        near = [abs(self.keys[k] - price) for k in (i - 1, i) if 0 <= k < len(self.keys)]
+        return min(near) if near else None
+
+
+# Resident, inkrementell gepflegt: angehängte Trades kommen einzeln dazu,
+# Übergänge sortieren nur ihre Zeile neu (_alert_transitions). Neuaufbau nur
+# bei strukturellen Änderungen (_trades_version: entfernt/neu geladen).
+# "open" = offene Zeilen pro Symbol (Dict als geordnete Menge, Zeilenreihenfolge).
+_trigger_index: Dict[str, Any] = {"version": None, "rows": 0, "symbols": {}, "open": {}}
+# Zuletzt gesehener Preis pro Symbol; landet erst beim Schreiben/Lesen in den Trades
+_trades_last_price: Dict[str, Tuple[float, str]] = {}
+_price_logged_at: Dict[str, float] = {}
+
+
+def _monitor_track(row: int, t: Dict[str, Any]):
+    if t.get("closed"):
+        return
+    for key in ("tp1_hit", "tp2_hit", "tp3_hit", "sl_hit", "closed"):
+        t.setdefault(key, False)
+    symbol = (t.get("symbol", "") or "").upper()
+    if (t.get("side", "") or "").lower() not in {"long", "short"}:
+        log_error(f"Ungültige Trade-Side in trades.json: {t.get('side')} ({symbol})")
+    _trigger_index["open"].setdefault(symbol, {})[row] = None
+    idx = _trigger_index["symbols"].setdefault(symbol, TriggerIndex())
+    idx.add(row, t)
+    idx.fresh.append(row)
+    # neuer/neu geladener Trade: Symbol sofort fällig, nicht erst nach dem alten Intervall
+    _monitor_due.pop(symbol, None)
+
+
+def _trigger_index_for(trades: List[Dict[str, Any]]) -> Dict[str, TriggerIndex]:
+    # Aufruf unter _lock_trades
+    if _trigger_index["version"] != _trades_version:
+        _trigger_index.update(version=_trades_version, rows=0, symbols={}, open={})
+    for row in range(_trigger_index["rows"], len(trades)):
+        _monitor_track(row, trades[row])
+    _trigger_index["rows"] = len(trades)
+    return _trigger_index["symbols"]
+
+
+def _record_last_prices(price_cache: Dict[str, float]):
+    global _trades_volatile_dirty
+
+    now_ts = time.time()
+    now_iso = utc_now_iso()
+    for symbol, price in price_cache.items():
+        _trades_last_price[symbol] = (price, now_iso)
+        # Feed liefert pro Tick -> höchstens einmal pro Poll-Intervall loggen
+        if MONITOR_DEBUG and now_ts - _price_logged_at.get(symbol, 0.0) >= MONITOR_POLL_SEC:
+            _price_logged_at[symbol] = now_ts
+            log_info(f"🔍 {symbol} Preis: {price}")
+    _trades_volatile_dirty = True
+
+
+def _stamp_last_prices(trades: List[Dict[str, Any]]):
+    # Aufruf unter _lock_trades, nur vor Schreiben/Kopieren (ohnehin O(n))
+    for t in trades:
+        if t.get("closed"):
+            continue
+        last = _trades_last_price.get((t.get("symbol", "") or "").upper())
+        # Preis von vor dem Anlegen gehört nicht zum Trade
+        if last is not None and last[1] >= (t.get("created_at") or ""):
+            t["last_price"], t["last_check_at"] = last
+
+
+def trigger_index_status() -> dict:
+    with _lock_trades:
+        return {
+            symbol: {"levels": len(idx.keys), "trades": len(idx.by_row), "last_price": idx.last_price}
+            for symbol, idx in _trigger_index["symbols"].items()
+        }
+
+
+def check_trades():
+    with _lock_trades:
+        _trigger_index_for(_resident_trades())
+        # Keine offenen Trades -> keine Preisabfragen
+        open_symbols = [s for s, rows in _trigger_index["open"].items() if rows]
+        # Planung geschlossener/archivierter Symbole verwerfen, sonst hält ihr
+        # vergangener Termin _monitor_sleep_sec dauerhaft auf MONITOR_MIN_POLL_SEC
+        live = set(open_symbols)
+        for symbol in [s for s in _monitor_due if s not in live]:
+            del _monitor_due[symbol]
+        for symbol in [s for s in _monitor_sched if s not in live]:
+            del _monitor_sched[symbol]
+    if not open_symbols:
+        return
+
+    now_ts = time.time()
+    # Symbole mit frischen Feed-Ticks wertet der Feed selbst aus
+    open_symbols = [s for s in open_symbols if not feed_covers(s, now_ts)]
+    if MONITOR_ADAPTIVE:
+        open_symbols = [s for s in open_symbols if _monitor_due.get(s, 0.0) <= now_ts]
+    if not open_symbols:
+        return
+
+    # Ein Request pro Provider statt einer pro Symbol (ohne Lock, Netzwerk)
+    price_cache: Dict[str, float] = get_prices(open_symbols)
+    for symbol, price in price_cache.items():
+        if price:
+            _monitor_observe(symbol, price, now_ts)
+
+    # Lease während des Abrufs verloren (Worker hing) -> der neue Leader wertet aus
+    if not monitor_is_leader():
+        return
+    evaluate_prices(price_cache, now_ts)
+
+
+def evaluate_prices(price_cache: Dict[str, float], now_ts: float) -> int:
+    # Preise (Polling oder Feed) auf die offenen Trades der Symbole anwenden.
+    # Kosten pro Tick: Symbole + ausgelöste/gekreuzte Trades, nicht alle Trades.
+    with _lock_trades:
+        trades = _resident_trades()
+        _trigger_index_for(trades)
+        _record_last_prices(price_cache)
+
+        mode = MONITOR_EVAL_MODE
+        if mode == "vector" and np is None:
+            mode = "loop"
+
+        if mode == "loop":
+            changed = _check_trades_loop(trades, price_cache)
+        elif mode == "vector":
+            changed = _alert_transitions(trades, _eval_rows_vector(trades, price_cache), price_cache)
+        else:
+            changed = _check_trades_index(trades, price_cache)
+
+        _monitor_schedule(price_cache, now_ts)
+        _flush_trades(durable=changed > 0)
+        return changed
+
+
+def _check_trades_loop(trades: List[Dict[str, Any]], price_cache: Dict[str, float]) -> int:
+    # Referenz: jeden offenen Trade einzeln auswerten (O(alle Trades) pro Tick)
+    transitions = []
+    for row, t in enumerate(trades):
+        if t.get("closed"):
+            continue
+
+        symbol = (t.get("symbol", "") or "").upper()
+        if symbol not in price_cache:
+            # noch nicht fällig
+            continue
+
+        price = price_cache.get(symbol, 0.0)
+        _debug_trade_state(t, price)
+
+        if price == 0:
+            continue
+
+        events = evaluate_trade(t, price)
+        if events:
+            transitions.append((row, events))
+    return _alert_transitions(trades, transitions, price_cache)
+
+
+def _eval_rows_loop(trades: List[Dict[str, Any]], rows: List[int], price_cache: Dict[str, float]):
+    out = []
+    for row in rows:
+        t = trades[row]
+        price = price_cache.get((t.get("symbol", "") or "").upper(), 0.0)
+        if not price or t.get("closed"):
+            continue
+        events = evaluate_trade(t, price)
+        if events:
+            out.append((row, events))
+    return out
+
+
+# Resident wie der Trigger-Index: neu aufgebaut nur bei strukturellen Änderungen
+_trade_book: Dict[str, Any] = {"version": None, "rows": 0, "book": None}
+
+
+def _trade_book_for(trades: List[Dict[str, Any]]) -> "TradeBook":
+    # Aufruf unter _lock_trades; angehängte Trades werden nur ergänzt
+    if _trade_book["version"] != _trades_version:
+        _trade_book.update(version=_trades_version, rows=len(trades), book=TradeBook.from_trades(trades))
+    elif _trade_book["rows"] < len(trades):
+        new_rows = [
+            i for i in range(_trade_book["rows"], len(trades))
+            if not trades[i].get("closed") and (trades[i].get("side", "") or "").lower() in {"long", "short"}
+        ]
+        _trade_book["book"].extend(trades, new_rows)
+        _trade_book["rows"] = len(trades)
+    return _trade_book["book"]
+
+
+def _eval_rows_vector(trades: List[Dict[str, Any]], price_cache: Dict[str, float]):
+    # Symbole ohne Preis in price_cache bleiben im Buch unberührt
+    book = _trade_book_for(trades)
+    out = []
+    for row, events, flags in book.evaluate(price_cache):
+        book.apply(trades[row], events, flags)
+        out.append((row, events))
+    return out
+
+
+def _alert_transitions(trades: List[Dict[str, Any]], transitions, price_cache: Dict[str, float]) -> int:
+    # updated_at ändert sich nur bei echten Zustandswechseln. Index, offene
+    # Zeilen und TradeBook werden nur für die betroffenen Zeilen nachgezogen.
+    now_iso = utc_now_iso()
+    book = _trade_book["book"] if _trade_book["version"] == _trades_version else None
+    for row, events in transitions:
+        t = trades[row]
+        symbol = (t.get("symbol", "") or "").upper()
+        price = price_cache.get(symbol, 0.0)
+        t["updated_at"] = now_iso
+        t["last_price"] = price
+        t["last_check_at"] = now_iso
+        if book is not None:
+            book.set_flags(row, trade_flags(t))
+        idx = _trigger_index["symbols"].get(symbol)
+        if idx is not None:
+            idx.remove(row)
+            idx.add(row, t)
+        if t.get("closed"):
+            rows = _trigger_index["open"].get(symbol)
+            if rows is not None:
+                rows.pop(row, None)
+                if not rows:
+                    del _trigger_index["open"][symbol]
+        _debug_trade_state(t, price)
+        _alert_trade_events(t, events)
+    return len(transitions)
+
+
+def _check_trades_index(trades: List[Dict[str, Any]], price_cache: Dict[str, float]) -> int:
+    index = _trigger_index["symbols"]
+    changed = 0
+    for symbol, price in price_cache.items():
+        rows = _trigger_index["open"].get(symbol)
+        if not price or not rows:
+            continue
+
+        idx = index.setdefault(symbol, TriggerIndex())
+        if idx.last_price is None:
+            # erster Preis nach (Neu-)Aufbau: alle Trades des Symbols auswerten
+            if np is not None and len(rows) >= MONITOR_VECTOR_MIN_TRADES:
+                transitions = _eval_rows_vector(trades, {symbol: price})
+            else:
+                transitions = _eval_rows_loop(trades, list(rows), {symbol: price})
+        else:
+            # gekreuzte Schwellen + seit dem letzten Preis angelegte Trades
+            candidates = idx.crossed(idx.last_price, price)
+            if idx.fresh:
+                candidates = sorted(set(candidates).union(idx.fresh))
+            transitions = _eval_rows_loop(trades, candidates, {symbol: price})
+        idx.fresh = []
+        idx.last_price = price
+        changed += _alert_transitions(trades, transitions, {symbol: price})
+    return changed
+
+
+def monitor_loop(generation: Optional[int] = None):
+    # generation: Amtszeit als Leader; endet, sobald die Lease verloren ist
+    queue_telegram("✅ *Trade-Monitor gestartet*")
+    if MONITOR_ADAPTIVE:
+        log_info(f"🔁 VIP Monitor aktiv (adaptiv {MONITOR_MIN_POLL_SEC}-{MONITOR_MAX_POLL_SEC}s)")
+    else:
+        log_info(f"🔁 VIP Monitor aktiv (Intervall {MONITOR_POLL_SEC}s)")
+    # Ende erst bei abgegebener Lease; hängt nur die Wahl (lokaler Ablauf),
+    # setzt check_trades über monitor_is_leader lediglich aus
+    while generation is None or (_leader_event.is_set() and _leader["generation"] == generation):
+        t0 = time.perf_counter()
+        _leader["last_tick"] = time.time()
+        try:
+            check_trades()
+        except Exception as e:
+            log_error(f"Hauptfehler Monitor: {e}")
+        metrics_observe("monitor_tick_duration_seconds", (), time.perf_counter() - t0)
+        time.sleep(_monitor_sleep_sec())
+    log_info("⏸️ VIP Monitor beendet (Lease abgegeben)")
+
+
+def start_monitor_delayed(generation: Optional[int] = None):
+    time.sleep(3)
+    if PRICE_FEED_URL:
+        start_price_feed()
+    monitor_loop(generation)
 
 
 # =============================================================================
-# MONITOR LOGIK (VIP)
+# MONITOR-LEADER (Lease-Datei)
+#
+# Jeder Worker mit RUN_MONITOR bewirbt sich alle MONITOR_LEASE_RENEW_SEC um
+# die Lease (JSON mit Inhaber + Ablaufzeit, Lesen/Schreiben unter flock).
+# Der Inhaber verlängert sie, solange sein Monitor-Loop tickt; eine
+# abgelaufene Lease übernimmt der nächste Bewerber. Ein abgelöster Leader
+# wertet keine Preise mehr aus (auch nicht, wenn seine Wahl-Schleife hängt:
+# monitor_is_leader prüft die lokal gemerkte Ablaufzeit) und beendet seinen
+# Preis-Feed; was der neue schon geschrieben hat, sieht er über die Trades-Signatur.
 # =============================================================================
-def _alert_trade(symbol: str, side: str, msg: str):
-    text = f"*{symbol}* | *{str(side).upper()}*\n{msg}"
-    send_telegram(text, retries=1)
-
-
-def _debug_trade_state(t: Dict[str, Any], price: float):
-    if not MONITOR_DEBUG:
-        return
-    symbol = (t.get("symbol") or "").upper()
-    side = t.get("side")
-    print(
-        "DEBUG "
-        f"{symbol} {side} | price={price} entry={t.get('entry')} sl={t.get('sl')} "
-        f"tp1={t.get('tp1')} tp2={t.get('tp2')} tp3={t.get('tp3')} | "
-        f"tp1_hit={t.get('tp1_hit')} tp2_hit={t.get('tp2_hit')} tp3_hit={t.get('tp3_hit')} "
-        f"sl_hit={t.get('sl_hit')} closed={t.get('closed')}",
-        flush=True,
-    )
+_leader = {
+    "id": f"{socket.gethostname()}:{os.getpid()}:{os.urandom(4).hex()}",
+    "active": False,          # Wahl läuft (sonst gilt jeder Prozess als Leader)
+    "generation": 0,
+    "last_tick": 0.0,
+    "acquired_at": None,
+    "expires_at": 0.0,        # Ablauf der eigenen Lease (lokal gemerkt)
+    "takeovers": 0,
+    "lost": 0,
+    "thread": None,
+}
+_leader_event = threading.Event()
+
+
+def monitor_is_leader() -> bool:
+    if not _leader["active"]:
+        return True
+    return _leader_event.is_set() and time.time() < _leader["expires_at"]
 
 
-def check_trades():
-    trades = load_trades()
+def _lease_update(claim: bool) -> bool:
+    # claim=True: übernehmen/verlängern, False: abgeben. True = wir halten die Lease.
+    now_ts = time.time()
+    fd = os.open(MONITOR_LEASE_FILE + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        lease = _safe_read_json(MONITOR_LEASE_FILE, {})
+        lease = lease if isinstance(lease, dict) else {}
+        holder = lease.get("holder")
+        mine = holder == _leader["id"]
+        if not claim:
+            _leader["expires_at"] = 0.0
+            if mine:
+                _safe_write_json_atomic(MONITOR_LEASE_FILE, {**lease, "expires_at": 0.0})
+            return False
+        if not mine and holder and float(lease.get("expires_at") or 0) > now_ts:
+            _leader["expires_at"] = 0.0
+            return False
+        if not mine and holder:
+            _leader["takeovers"] += 1
+            log_info(f"👑 Monitor-Lease übernommen von {holder}")
+        _safe_write_json_atomic(MONITOR_LEASE_FILE, {
+            "holder": _leader["id"],
+            "pid": os.getpid(),
+            "acquired_at": lease.get("acquired_at") if mine else now_ts,
+            "renewed_at": now_ts,
+            "expires_at": now_ts + MONITOR_LEASE_TTL_SEC,
+        })
+        _leader["expires_at"] = now_ts + MONITOR_LEASE_TTL_SEC
+        return True
+    finally:
+        os.close(fd)
 
-    # Keine offenen Trades -> keine Preisabfragen
-    if not any(not t.get("closed") for t in trades):
-        return
 
-    updated: List[Dict[str, Any]] = []
-    price_cache: Dict[str, float] = {}
+def monitor_election_step():
+    is_leader = _leader_event.is_set()
+    stalled = is_leader and time.time() - _leader["last_tick"] > MONITOR_LEASE_STALL_SEC
+    # alter Monitor-Thread noch nicht beendet (hängt) -> nicht erneut bewerben
+    busy = _leader["thread"] is not None and _leader["thread"].is_alive()
+    try:
+        if stalled:
+            leader = _lease_update(False)
+        elif is_leader or not busy:
+            leader = _lease_update(True)
+        else:
+            leader = False
+    except Exception as e:
+        log_error(f"Monitor-Lease Fehler: {e}")
+        leader = False
+
+    if leader and not is_leader:
+        _leader["generation"] += 1
+        _leader["acquired_at"] = time.time()
+        _leader["last_tick"] = time.time()
+        _leader_event.set()
+        log_info(f"👑 Monitor-Leader: {_leader['id']}")
+        th = threading.Thread(target=start_monitor_delayed, args=(_leader["generation"],), daemon=True, name="monitor")
+        _leader["thread"] = th
+        th.start()
+    elif not leader and is_leader:
+        _leader_event.clear()
+        _leader["lost"] += 1
+        stop_price_feed()
+        log_error("Monitor-Lease verloren" + (" (Loop hängt)" if stalled else "") + " – Monitor pausiert")
+
+
+def monitor_election_loop():
+    while True:
+        monitor_election_step()
+        time.sleep(MONITOR_LEASE_RENEW_SEC)
 
-    for t in trades:
-        if t.get("closed"):
-            updated.append(t)
-            continue
 
-        symbol = (t.get("symbol", "") or "").upper()
-        side = (t.get("side", "") or "").lower()
-        entry = parse_float(t.get("entry")) or 0.0
-        sl = parse_float(t.get("sl")) or 0.0
-        tp1 = parse_float(t.get("tp1")) or 0.0
-        tp2 = parse_float(t.get("tp2")) or 0.0
-        tp3 = parse_float(t.get("tp3")) or 0.0
-
-        t.setdefault("tp1_hit", False)
-        t.setdefault("tp2_hit", False)
-        t.setdefault("tp3_hit", False)
-        t.setdefault("sl_hit", False)
-        t.setdefault("closed", False)
+def _release_monitor_lease():
+    if _leader["active"] and _leader_event.is_set():
+        _leader_event.clear()
+        try:
+            _lease_update(False)
+        except Exception:
+            pass
 
-        if symbol not in price_cache:
-            price_cache[symbol] = get_price(symbol)
-        price = price_cache[symbol]
 
-        t["last_price"] = price
-        t["last_check_at"] = utc_now_iso()
-        t["updated_at"] = utc_now_iso()
+atexit.register(_release_monitor_lease)
 
-        log_info(f"🔍 {symbol} Preis: {price}")
-        _debug_trade_state(t, price)
 
-        if price == 0:
-            updated.append(t)
-            continue
+def start_monitor():
+    # Ohne fcntl (Windows) keine Wahl: ein Prozess, ein Monitor
+    if fcntl is None:
+        threading.Thread(target=start_monitor_delayed, daemon=True).start()
+        return
+    _leader["active"] = True
+    threading.Thread(target=monitor_election_loop, daemon=True, name="monitor-election").start()
+
+
+def monitor_leader_status() -> dict:
+    lease = _safe_read_json(MONITOR_LEASE_FILE, {}) if _leader["active"] else {}
+    lease = lease if isinstance(lease, dict) else {}
+    return {
+        "election": _leader["active"],
+        "leader": _leader["active"] and monitor_is_leader(),
+        "id": _leader["id"],
+        "holder": lease.get("holder"),
+        "expires_in_sec": round(float(lease.get("expires_at") or 0) - time.time(), 1) if lease else None,
+        "ttl_sec": MONITOR_LEASE_TTL_SEC,
+        "renew_sec": MONITOR_LEASE_RENEW_SEC,
+        "takeovers": _leader["takeovers"],
+        "lost": _leader["lost"],
+    }
 
-        # LONG
-        if side == "long":
-            if (not t["tp1_hit"]) and hit_tp_long(price, tp1):
-                t["tp1_hit"] = True
-                _alert_trade(symbol, side, "💶 *TP1 erreicht – BE setzen oder Trade managen. Wir machen uns auf den Weg zu TP2!* 🚀")
-
-            if (not t["tp2_hit"]) and hit_tp_long(price, tp2):
-                t["tp1_hit"] = True
-                t["tp2_hit"] = True
-                _alert_trade(symbol, side, "💶 *TP2 erreicht – weiter geht’s! Full TP in Sicht!* ✨")
-
-            if (not t["tp3_hit"]) and hit_tp_long(price, tp3):
-                t["tp1_hit"] = True
-                t["tp2_hit"] = True
-                t["tp3_hit"] = True
-                t["closed"] = True
-                t["close_reason"] = "tp3"
-                _alert_trade(symbol, side, "🏆 *Full TP erreicht – Glückwunsch an alle! 💶💶💰🥳*")
-
-            if not t["closed"]:
-                if (not t["tp1_hit"]) and (not t["sl_hit"]) and hit_sl_long(price, sl):
-                    t["sl_hit"] = True
-                    t["closed"] = True
-                    t["close_reason"] = "sl"
-                    _alert_trade(symbol, side, "🛑 *SL erreicht – schade. Wir bewerten neu und kommen stärker zurück.*")
-                elif t["tp1_hit"] and back_to_entry_long(price, entry):
-                    t["closed"] = True
-                    t["close_reason"] = "be_after_tp"
-                    if t.get("tp2_hit"):
-                        _alert_trade(symbol, side, "💰 *Trade teilweise im Gewinn geschlossen – TP1 + TP2 wurden erreicht, Rest auf Entry beendet.*")
-                    else:
-                        _alert_trade(symbol, side, "💰 *Trade teilweise im Gewinn geschlossen – TP1 wurde erreicht, Rest auf Entry beendet.*")
-
-        # SHORT
-        elif side == "short":
-            if (not t["tp1_hit"]) and hit_tp_short(price, tp1):
-                t["tp1_hit"] = True
-                _alert_trade(symbol, side, "💶 *TP1 erreicht – BE setzen oder Trade managen. Wir machen uns auf den Weg zu TP2!* 🚀")
-
-            if (not t["tp2_hit"]) and hit_tp_short(price, tp2):
-                t["tp1_hit"] = True
-                t["tp2_hit"] = True
-                _alert_trade(symbol, side, "💶 *TP2 erreicht – weiter geht’s! Full TP in Sicht!* ✨")
-
-            if (not t["tp3_hit"]) and hit_tp_short(price, tp3):
-                t["tp1_hit"] = True
-                t["tp2_hit"] = True
-                t["tp3_hit"] = True
-                t["closed"] = True
-                t["close_reason"] = "tp3"
-                _alert_trade(symbol, side, "🏆 *Full TP erreicht – Glückwunsch an alle! 💶💶💰🥳*")
-
-            if not t["closed"]:
-                if (not t["tp1_hit"]) and (not t["sl_hit"]) and hit_sl_short(price, sl):
-                    t["sl_hit"] = True
-                    t["closed"] = True
-                    t["close_reason"] = "sl"
-                    _alert_trade(symbol, side, "🛑 *SL erreicht – schade. Wir bewerten neu und kommen stärker zurück.*")
-                elif t["tp1_hit"] and back_to_entry_short(price, entry):
-                    t["closed"] = True
-                    t["close_reason"] = "be_after_tp"
-                    if t.get("tp2_hit"):
-                        _alert_trade(symbol, side, "💰 *Trade teilweise im Gewinn geschlossen – TP1 + TP2 wurden erreicht, Rest auf Entry beendet.*")
-                    else:
-                        _alert_trade(symbol, side, "💰 *Trade teilweise im Gewinn geschlossen – TP1 wurde erreicht, Rest auf Entry beendet.*")
 
-        else:
-            log_error(f"Ungültige Trade-Side in trades.json: {side} ({symbol})")
+# =============================================================================
+# PREIS-FEED (Push)
+#
+# Ein Reader-Thread nimmt Ticks vom Feed an (eine Zeile pro Tick:
+# "SYMBOL PREIS [ts]" oder JSON {"symbol", "price", "ts"}), ein Evaluator-
+# Thread wertet sie sofort aus. Kommen Ticks schneller als ausgewertet wird,
+# zählt pro Symbol nur der letzte (Conflation). Solange ein Symbol frische
+# Ticks hat, überspringt das Polling es; bei Feed-Ausfall übernimmt wieder REST.
+# =============================================================================
+_feed_cond = threading.Condition()
+_feed_pending: Dict[str, tuple] = {}                   # symbol -> (price, src_ts, recv_ts)
+_feed_last_tick: Dict[str, float] = {}
+_feed_latency: deque = deque(maxlen=2000)              # recv -> ausgewertet (s)
+_feed_src_latency: deque = deque(maxlen=2000)          # Quelle -> ausgewertet (s)
+_feed_stats = {"connected": False, "ticks": 0, "conflated": 0, "bad_lines": 0, "evaluations": 0, "reconnects": 0, "idle_timeouts": 0, "transitions": 0}
+# Lese-Timeouts beider Transporte (websocket-client hat eine eigene Klasse)
+_FEED_TIMEOUTS: Tuple[type, ...] = (socket.timeout, TimeoutError) + (
+    (websocket.WebSocketTimeoutException,) if websocket is not None else ()
+)
+_feed_started = False
+_feed_gen = 0  # jeder Start/Stop zählt hoch; Threads älterer Generationen beenden sich
+
+
+def parse_feed_line(line: str):
+    line = (line or "").strip()
+    if not line or line.startswith("#"):
+        return None
+    if line.startswith("{"):
+        try:
+            d = json.loads(line)
+        except Exception:
+            return None
+        symbol, price, ts = d.get("symbol"), parse_float(d.get("price")), parse_float(d.get("ts"))
+    else:
+        parts = line.replace(",", " ").split()
+        if len(parts) < 2:
+            return None
+        symbol, price = parts[0], parse_float(parts[1])
+        ts = parse_float(parts[2]) if len(parts) > 2 else None
+    symbol = str(symbol or "").strip().upper()
+    if not symbol or not price or price <= 0:
+        return None
+    return symbol, float(price), ts
 
-        updated.append(t)
 
-    save_trades(updated)
+def feed_covers(symbol: str, now_ts: float) -> bool:
+    last = _feed_last_tick.get(symbol)
+    return last is not None and now_ts - last <= PRICE_FEED_STALE_SEC
 
 
-def monitor_loop():
-    send_telegram("✅ *Trade-Monitor gestartet*", retries=1)
-    log_info(f"🔁 VIP Monitor aktiv (Intervall {MONITOR_POLL_SEC}s)")
+def feed_tick(symbol: str, price: float, src_ts: Optional[float] = None):
+    if PRICE_FEED_SYMBOLS and symbol not in PRICE_FEED_SYMBOLS:
+        return
+    now_ts = time.time()
+    with _lock_prices:
+        _price_cache[symbol] = {"value": price, "fetched_at": now_ts, "provider": "feed"}
+        _price_budget_stale.pop(symbol, None)
+    with _feed_cond:
+        _feed_stats["ticks"] += 1
+        if symbol in _feed_pending:
+            _feed_stats["conflated"] += 1
+        _feed_pending[symbol] = (price, src_ts, now_ts)
+        _feed_last_tick[symbol] = now_ts
+        _feed_cond.notify()
+
+
+def _feed_evaluator(gen: int):
     while True:
+        with _feed_cond:
+            while not _feed_pending and gen == _feed_gen:
+                _feed_cond.wait()
+            if gen != _feed_gen:
+                return
+            batch = dict(_feed_pending)
+            _feed_pending.clear()
+
+        if not monitor_is_leader():
+            continue
         try:
-            check_trades()
+            changed = evaluate_prices({s: v[0] for s, v in batch.items()}, time.time())
         except Exception as e:
-            log_error(f"Hauptfehler Monitor: {e}")
-        time.sleep(MONITOR_POLL_SEC)
+            log_error(f"Feed Auswertung Fehler: {e}")
+            continue
+
+        done = time.time()
+        with _feed_cond:
+            _feed_stats["evaluations"] += 1
+            _feed_stats["transitions"] += changed
+            for _, src_ts, recv_ts in batch.values():
+                _feed_latency.append(done - recv_ts)
+                if src_ts:
+                    _feed_src_latency.append(done - src_ts)
+
+
+def _feed_lines_tcp(url: str):
+    host, _, port = url[len("tcp://"):].rstrip("/").rpartition(":")
+    with socket.create_connection((host or "127.0.0.1", int(port)), timeout=PRICE_FEED_STALE_SEC) as sock:
+        # Lese-Timeout bleibt: hängende Verbindung -> socket.timeout -> Reconnect
+        sock.settimeout(PRICE_FEED_IDLE_SEC)
+        _feed_stats["connected"] = True
+        with sock.makefile("r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                yield line
+
+
+def _feed_lines_ws(url: str):
+    if websocket is None:
+        raise RuntimeError("websocket-client nicht installiert")
+    ws = websocket.create_connection(url, timeout=PRICE_FEED_STALE_SEC)
+    try:
+        ws.settimeout(PRICE_FEED_IDLE_SEC)
+        _feed_stats["connected"] = True
+        while True:
+            msg = ws.recv()
+            if not msg:
+                return
+            for line in str(msg).splitlines():
+                yield line
+    finally:
+        ws.close()
+
+
+def _feed_reader(url: str, gen: int):
+    lines = _feed_lines_ws if url.startswith(("ws://", "wss://")) else _feed_lines_tcp
+    while gen == _feed_gen:
+        try:
+            for line in lines(url):
+                if gen != _feed_gen:
+                    break
+                tick = parse_feed_line(line)
+                if tick is None:
+                    if line.strip():
+                        _feed_stats["bad_lines"] += 1
+                    continue
+                feed_tick(*tick)
+            if gen != _feed_gen:
+                break
+            log_error(f"Preis-Feed getrennt: {url}")
+        except _FEED_TIMEOUTS as e:
+            _feed_stats["idle_timeouts"] += 1
+            log_error(f"Preis-Feed {PRICE_FEED_IDLE_SEC:.0f}s ohne Daten, Reconnect {url}: {e}")
+        except Exception as e:
+            log_error(f"Preis-Feed Fehler {url}: {e}")
+        _feed_stats["connected"] = False
+        if gen != _feed_gen:
+            break
+        _feed_stats["reconnects"] += 1
+        time.sleep(PRICE_FEED_RECONNECT_SEC)
+    _feed_stats["connected"] = False
+
+
+def start_price_feed(url: str = ""):
+    global _feed_started, _feed_gen
+
+    url = url or PRICE_FEED_URL
+    with _feed_cond:
+        if _feed_started or not url:
+            return
+        _feed_started = True
+        _feed_gen += 1
+        gen = _feed_gen
+    threading.Thread(target=_feed_evaluator, args=(gen,), daemon=True, name="feed-eval").start()
+    threading.Thread(target=_feed_reader, args=(url, gen), daemon=True, name="feed-reader").start()
+    log_info(f"📡 Preis-Feed aktiv: {url}")
+
+
+def stop_price_feed():
+    # Leader-Wechsel: Evaluator endet sofort, der Reader mit der nächsten
+    # Zeile bzw. spätestens nach PRICE_FEED_IDLE_SEC
+    global _feed_started, _feed_gen
+
+    with _feed_cond:
+        if not _feed_started:
+            return
+        _feed_started = False
+        _feed_gen += 1
+        _feed_pending.clear()
+        _feed_cond.notify_all()
+    log_info("📡 Preis-Feed gestoppt")
+
+
+def _pct_ms(samples, q: float):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
 
 
-def start_monitor_delayed():
-    time.sleep(3)
-    monitor_loop()
+def price_feed_status() -> dict:
+    now_ts = time.time()
+    with _feed_cond:
+        lat, src = list(_feed_latency), list(_feed_src_latency)
+        out = dict(_feed_stats)
+        out["symbols"] = {s: round(now_ts - ts, 1) for s, ts in _feed_last_tick.items()}
+    out.update(
+        {
+            "url": PRICE_FEED_URL,
+            "eval_latency_ms_p50": _pct_ms(lat, 0.5),
+            "eval_latency_ms_p99": _pct_ms(lat, 0.99),
+            "source_latency_ms_p50": _pct_ms(src, 0.5),
+            "source_latency_ms_p99": _pct_ms(src, 0.99),
+        }
+    )
+    return out
 
 
 # =============================================================================
@@ -689,12 +3287,17 @@ def start_monitor_delayed():
 # =============================================================================
 def load_bot_signals():
     with _lock_bot:
+        if _sqlite is not None:
+            return _sqlite.load_signals()
         data = _safe_read_json(BOT_SIGNALS_FILE, [])
         return data if isinstance(data, list) else []
 
 
 def save_bot_signals(signals):
     with _lock_bot:
+        if _sqlite is not None:
+            _sqlite.write_signals(list(signals), [], replace=True)
+            return
         _safe_write_json_atomic(BOT_SIGNALS_FILE, signals)
 
 
@@ -716,7 +3319,7 @@ def build_signal_id(symbol: str, side: str, tf: str, t: str, entry: float, clien
 
 def load_bot_state():
     with _lock_state:
-        st = _safe_read_json(BOT_STATE_FILE, {})
+        st = _sqlite.load_state() if _sqlite is not None else _safe_read_json(BOT_STATE_FILE, {})
         if not isinstance(st, dict):
             st = {}
         st.setdefault("enabled", True)
@@ -727,43 +3330,234 @@ def load_bot_state():
 def save_bot_state(state: dict):
     with _lock_state:
         state["updated_at"] = utc_now_iso()
+        if _sqlite is not None:
+            _sqlite.save_state(state)
+            return
         _safe_write_json_atomic(BOT_STATE_FILE, state)
 
 
+# Im Journal-Modus resident (Snapshot + Journal beim Start nachgespielt)
+_bot_clients: Optional[Dict[str, Any]] = None
+_clients_journal = _Journal(BOT_CLIENTS_FILE, _lock_clients, lambda: dict(_bot_clients or {}), lambda: _resident_clients())
+
+
+def _clients_apply(d: Dict[str, Any], records: List[dict]):
+    for rec in records:
+        if rec.get("op") == "ack" and isinstance(rec.get("rec"), dict):
+            d[normalize_client_id(rec.get("client"))] = rec["rec"]
+
+
+def _resident_clients() -> Dict[str, Any]:
+    global _bot_clients
+
+    with _lock_clients:
+        # andere Worker: nur deren neue Journal-Zeilen nachspielen
+        records = _clients_journal.poll() if STATE_CROSS_PROCESS and _bot_clients is not None else []
+        if records is None:
+            _bot_clients = None
+        if _bot_clients is None:
+            d = _safe_read_json(BOT_CLIENTS_FILE, {})
+            d = d if isinstance(d, dict) else {}
+            _clients_apply(d, _clients_journal.replay())
+            _clients_journal.mark_seen()
+            _bot_clients = d
+        else:
+            _clients_apply(_bot_clients, records)
+        return _bot_clients
+
+
 def load_clients():
     with _lock_clients:
+        if _sqlite is not None:
+            return _sqlite.load_clients()
+        if BOT_PERSIST_MODE == "journal":
+            return dict(_resident_clients())
         d = _safe_read_json(BOT_CLIENTS_FILE, {})
         return d if isinstance(d, dict) else {}
 
 
 def save_clients(d: dict):
+    global _bot_clients
+
     with _lock_clients:
+        if _sqlite is not None:
+            _sqlite.put_clients(d, replace=True)
+            return
+        if BOT_PERSIST_MODE == "journal":
+            _bot_clients = dict(d)
+            _clients_journal.compact()
+            return
         _safe_write_json_atomic(BOT_CLIENTS_FILE, d)
 
 
+# ---------------------------------------------------------------------
+# Ack-Registry (write-behind): remember_client_ack() setzt nur einen
+# Dict-Eintrag. Der Flusher schreibt alle seitdem geänderten Clients in
+# einem Rutsch (Timer BOT_ACK_FLUSH_SEC + atexit), mehrere Acks desselben
+# Clients zwischen zwei Flushes werden so zu einem Schreibvorgang.
+# ---------------------------------------------------------------------
+_ack_registry: Dict[str, tuple] = {}  # client -> (sig_id, acked_ts)
+_ack_written: Dict[str, tuple] = {}  # zuletzt geschriebener Eintrag je Client
+_ack_loaded = False
+_ack_flusher: Optional[threading.Thread] = None
+_ack_flusher_lock = threading.Lock()
+_ack_stats = {"flushes": 0, "clients_written": 0, "stale_skipped": 0, "errors": 0}
+
+
+def _ack_newer(ack: tuple, rec: Any) -> bool:
+    # Hat ein anderer Worker inzwischen einen neueren Ack geschrieben, gewinnt der
+    if not isinstance(rec, dict) or not rec.get("last_ack_id"):
+        return True
+    dt = parse_iso_utc(rec.get("acked_at"))
+    return dt is None or dt.timestamp() <= ack[1]
+
+
+def _write_client_acks(acks: Dict[str, tuple]) -> int:
+    with _lock_clients:
+        if _sqlite is not None:
+            current = {c: _sqlite.get_client(c) for c in acks}
+        elif BOT_PERSIST_MODE == "journal":
+            current = _resident_clients()
+        else:
+            current = load_clients()
+
+        out = {}
+        for client_id, ack in acks.items():
+            rec = current.get(client_id)
+            if not _ack_newer(ack, rec):
+                _ack_stats["stale_skipped"] += 1
+                continue
+            rec = dict(rec) if isinstance(rec, dict) else {}
+            rec["last_ack_id"] = ack[0]
+            rec["acked_at"] = _iso_from_dt(datetime.fromtimestamp(ack[1], timezone.utc))
+            out[client_id] = rec
+        if not out:
+            return 0
+
+        if _sqlite is not None:
+            _sqlite.put_clients(out)
+        elif BOT_PERSIST_MODE == "journal":
+            for client_id, rec in out.items():
+                current[client_id] = rec
+                _clients_journal.append({"op": "ack", "client": client_id, "rec": rec})
+        else:
+            current.update(out)
+            save_clients(current)
+        return len(out)
+
+
+def flush_client_acks() -> int:
+    with _lock_clients:
+        dirty = {c: ack for c, ack in list(_ack_registry.items()) if _ack_written.get(c) is not ack}
+        if not dirty:
+            return 0
+        try:
+            n = _write_client_acks(dirty)
+        except Exception as e:
+            # bleibt dirty -> nächster Flush versucht es erneut
+            _ack_stats["errors"] += 1
+            log_error(f"Ack-Flush fehlgeschlagen: {e}")
+            return 0
+        _ack_written.update(dirty)
+        _ack_stats["flushes"] += 1
+        _ack_stats["clients_written"] += n
+        return n
+
+
+def _ack_flush_loop():
+    while True:
+        time.sleep(BOT_ACK_FLUSH_SEC)
+        flush_client_acks()
+
+
+def _ensure_ack_flusher():
+    global _ack_flusher
+
+    with _ack_flusher_lock:
+        if _ack_flusher is None:
+            _ack_flusher = threading.Thread(target=_ack_flush_loop, name="ack-flusher", daemon=True)
+            _ack_flusher.start()
+
+
+def _ack_after_fork():
+    # Threads überleben fork() nicht -> im Kind beim nächsten Ack neu starten
+    global _ack_flusher, _ack_flusher_lock
+
+    _ack_flusher = None
+    _ack_flusher_lock = threading.Lock()
+
+
+def _ack_load():
+    # einmalig: gespeicherte Acks übernehmen, danach liest /bot_next nur noch den Speicher
+    global _ack_loaded
+
+    with _lock_clients:
+        if _ack_loaded:
+            return
+        for client_id, rec in load_clients().items():
+            if not isinstance(rec, dict) or not rec.get("last_ack_id"):
+                continue
+            dt = parse_iso_utc(rec.get("acked_at"))
+            ack = (rec["last_ack_id"], dt.timestamp() if dt else 0.0)
+            if _ack_registry.setdefault(client_id, ack) is ack:
+                _ack_written[client_id] = ack
+        _ack_loaded = True
+
+
 def remember_client_ack(client_id: str, sig_id: str):
     client_id = normalize_client_id(client_id)
     if not sig_id:
         return
-    d = load_clients()
-    rec = d.get(client_id, {})
-    if not isinstance(rec, dict):
-        rec = {}
-    rec["last_ack_id"] = sig_id
-    rec["acked_at"] = utc_now_iso()
-    d[client_id] = rec
-    save_clients(d)
+
+    _ack_registry[client_id] = (sig_id, time.time())
+    if BOT_ACK_FLUSH_SEC <= 0:
+        flush_client_acks()
+    elif _ack_flusher is None:
+        _ensure_ack_flusher()
 
 
 def get_client_last_ack(client_id: str):
     client_id = normalize_client_id(client_id)
-    d = load_clients()
-    rec = d.get(client_id)
+    if not STATE_CROSS_PROCESS:
+        if not _ack_loaded:
+            _ack_load()
+        ack = _ack_registry.get(client_id)
+        return ack[0] if ack else None
+
+    # mehrere Worker: deren geflushte Acks können neuer sein als der eigene
+    ack = _ack_registry.get(client_id)
+    if _sqlite is not None:
+        rec = _sqlite.get_client(client_id)
+    elif BOT_PERSIST_MODE == "journal":
+        with _lock_clients:
+            rec = _resident_clients().get(client_id)
+    else:
+        d = load_clients()
+        rec = d.get(client_id)
+    if ack is not None and _ack_newer(ack, rec):
+        return ack[0]
     if not isinstance(rec, dict):
         return None
     return rec.get("last_ack_id")
 
 
+def client_ack_status() -> dict:
+    return {
+        "ack_flush_sec": BOT_ACK_FLUSH_SEC,
+        "ack_clients": len(_ack_registry),
+        "ack_pending": sum(1 for c, ack in list(_ack_registry.items()) if _ack_written.get(c) is not ack),
+        "ack_flushes": _ack_stats["flushes"],
+        "ack_clients_written": _ack_stats["clients_written"],
+        "ack_stale_skipped": _ack_stats["stale_skipped"],
+        "ack_flush_errors": _ack_stats["errors"],
+    }
+
+
+atexit.register(flush_client_acks)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_ack_after_fork)
+
+
 def _signal_effective_time(sig: dict):
     dt = parse_iso_utc(sig.get("time"))
     if dt:
@@ -789,47 +3583,278 @@ def is_signal_expired(sig: dict, now_dt: Optional[datetime] = None) -> bool:
     return now_dt > expiry
 
 
-def cleanup_bot_signals():
-    signals = load_bot_signals()
-    if not signals:
-        return []
+# ---------------------------------------------------------------------
+# Resident Signal-Store
+#
+# Einmal beim Start geladen, danach laufen alle Lese-Pfade (/bot_next,
+# /bot_signals) nur noch gegen den Speicher. Die Datei ist reines
+# Persistenz-Ziel und wird nur bei echten Änderungen geschrieben.
+# ---------------------------------------------------------------------
+_bot_store_loaded = False
+_bot_seq = 0
+_bot_signals: List[Dict[str, Any]] = []                # chronologisch (Eingang)
+_bot_by_id: Dict[str, Dict[str, Any]] = {}
+_bot_by_client: Dict[str, List[Dict[str, Any]]] = {}
+_bot_client_seqs: Dict[str, List[int]] = {}            # parallel zu _bot_by_client (bisect)
+_bot_meta: Dict[str, tuple] = {}                       # id -> (seq, expiry_ts, effective_ts)
+_bot_next_expiry = float("inf")
+_bot_client_conds: Dict[str, threading.Condition] = {}   # Long-Poll, teilen sich _lock_bot
+_bot_waiters = 0
+_bot_streams = 0
+_bot_dedup: "OrderedDict[str, float]" = OrderedDict()   # id -> erstmals gesehen (ts), älteste vorne
+_bot_dedup_stats = {"suppressed": 0, "evicted": 0}
+_bot_removed: List[str] = []                            # seit letztem Persist entfernt (SQLite)
+_bot_journal = _Journal(BOT_SIGNALS_FILE, _lock_bot, lambda: list(_bot_signals), lambda: _bot_store_sync())
+_bot_source_seen = None                                 # STATE_CROSS_PROCESS: Datei-Signatur bzw. SQLite-seq
+_bot_sync_stats = {"merged": 0, "reloads": 0}
+
+
+def _iso_from_dt(dt: datetime) -> str:
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+def _bot_store_index(sig: dict) -> bool:
+    global _bot_seq, _bot_next_expiry
+
+    sig_id = str(sig.get("id", "")).strip()
+    if not sig_id or sig_id in _bot_by_id:
+        return False
+
+    client_id = normalize_client_id(sig.get("client"))
+    eff = _signal_effective_time(sig)
+    expiry = _signal_expiry_time(sig)
+
+    _bot_seq += 1
+    expiry_ts = expiry.timestamp() if expiry else float("inf")
+    _bot_meta[sig_id] = (_bot_seq, expiry_ts, eff.timestamp() if eff else None)
+    _bot_signals.append(sig)
+    _bot_by_id[sig_id] = sig
+    _bot_by_client.setdefault(client_id, []).append(sig)
+    _bot_client_seqs.setdefault(client_id, []).append(_bot_seq)
+    _bot_next_expiry = min(_bot_next_expiry, expiry_ts)
+    return True
+
+
+def _bot_store_rebuild(keep: List[Dict[str, Any]]):
+    global _bot_next_expiry
+
+    keep_ids = {s["id"] for s in keep}
+    _bot_removed.extend(s["id"] for s in _bot_signals if s["id"] not in keep_ids)
+    _bot_signals[:] = keep
+    _bot_by_id.clear()
+    _bot_by_client.clear()
+    _bot_client_seqs.clear()
+    keep_meta = {}
+    _bot_next_expiry = float("inf")
+    for sig in keep:
+        sig_id = sig["id"]
+        meta = _bot_meta[sig_id]
+        keep_meta[sig_id] = meta
+        client_id = normalize_client_id(sig.get("client"))
+        _bot_by_id[sig_id] = sig
+        _bot_by_client.setdefault(client_id, []).append(sig)
+        _bot_client_seqs.setdefault(client_id, []).append(meta[0])
+        _bot_next_expiry = min(_bot_next_expiry, meta[1])
+    _bot_meta.clear()
+    _bot_meta.update(keep_meta)
+
+
+def _bot_dedup_evict(now_ts: float):
+    cutoff = now_ts - BOT_DEDUP_TTL_SEC
+    while _bot_dedup:
+        sig_id, seen_ts = next(iter(_bot_dedup.items()))
+        if seen_ts >= cutoff and len(_bot_dedup) <= BOT_DEDUP_MAX:
+            break
+        _bot_dedup.popitem(last=False)
+        _bot_dedup_stats["evicted"] += 1
+
+
+def _bot_dedup_remember(sig_id: str, seen_ts: float):
+    if sig_id not in _bot_dedup:
+        _bot_dedup[sig_id] = seen_ts
+
+
+def bot_dedup_status() -> dict:
+    with _lock_bot:
+        oldest = next(iter(_bot_dedup.values()), None)
+        return {
+            "dedup_ids": len(_bot_dedup),
+            "dedup_ttl_sec": BOT_DEDUP_TTL_SEC,
+            "dedup_oldest_age_sec": round(time.time() - oldest, 1) if oldest else 0.0,
+            "duplicates_suppressed": _bot_dedup_stats["suppressed"],
+            "dedup_evicted": _bot_dedup_stats["evicted"],
+            "cross_process_merged": _bot_sync_stats["merged"],
+            "cross_process_reloads": _bot_sync_stats["reloads"],
+        }
+
+
+def _bot_prepare_loaded(sig: dict):
+    sig.setdefault("client", BOT_DEFAULT_CLIENT)
+    sig.setdefault("received_at", utc_now_iso())
+    if "expires_at" not in sig:
+        eff = _signal_effective_time(sig)
+        if eff:
+            sig["expires_at"] = _iso_from_dt(eff + timedelta(seconds=BOT_SIGNAL_TTL_SEC))
+
 
-    now_dt = utc_now_dt()
-    cleaned = []
-    changed = False
+def _bot_mark_seen():
+    global _bot_source_seen
 
-    for sig in signals:
+    if _sqlite is not None:
+        _bot_source_seen = _sqlite.max_signal_seq()
+    elif BOT_PERSIST_MODE == "journal":
+        _bot_journal.mark_seen()
+    else:
+        _bot_source_seen = _file_sig(BOT_SIGNALS_FILE)
+
+
+def _bot_store_sync() -> int:
+    # Aufruf unter _lock_bot: Signale anderer Worker-Prozesse übernehmen.
+    # SQLite: neue Zeilen ab letzter seq, Journal: neue Zeilen am Ende,
+    # JSON: Datei neu lesen, wenn sich die Signatur geändert hat. Bekannte
+    # und lokal schon verworfene ids (Dedup-Index) werden übersprungen.
+    global _bot_source_seen
+
+    if not STATE_CROSS_PROCESS or not _bot_store_loaded:
+        return 0
+    if _sqlite is not None:
+        rows = _sqlite.signals_after(_bot_source_seen or 0)
+        if not rows:
+            return 0
+        _bot_source_seen = rows[-1][0]
+        loaded = [sig for _, sig in rows]
+    elif BOT_PERSIST_MODE == "journal":
+        records = _bot_journal.poll()
+        if records is None:
+            _bot_sync_stats["reloads"] += 1
+            records = _bot_journal.replay()
+            loaded = load_bot_signals()
+            _bot_journal.mark_seen()
+        else:
+            loaded = []
+        loaded += [r.get("sig") for r in records if r.get("op") == "add"]
+    else:
+        sig_now = _file_sig(BOT_SIGNALS_FILE)
+        if sig_now == _bot_source_seen:
+            return 0
+        _bot_sync_stats["reloads"] += 1
+        loaded = load_bot_signals()
+        _bot_source_seen = sig_now
+
+    added = 0
+    now_ts = time.time()
+    for sig in loaded:
         if not isinstance(sig, dict):
-            changed = True
             continue
+        sig_id = str(sig.get("id", "")).strip()
+        if not sig_id or sig_id in _bot_dedup or sig_id in _bot_by_id:
+            continue
+        _bot_prepare_loaded(sig)
+        if _bot_store_index(sig):
+            _bot_dedup_remember(sig_id, now_ts)
+            added += 1
+            cond = _bot_client_conds.get(normalize_client_id(sig.get("client")))
+            if cond is not None:
+                cond.notify_all()
+    if added:
+        _bot_sync_stats["merged"] += added
+        _bot_store_prune()
+    return added
+
+
+def _bot_wait(cond: threading.Condition, timeout: float):
+    # cond.wait(); mit mehreren Prozessen in STATE_SYNC_POLL_SEC-Schritten,
+    # weil save_bot_signal() in einem anderen Worker hier niemanden weckt
+    if not STATE_CROSS_PROCESS:
+        cond.wait(timeout)
+        return
+    deadline = time.time() + timeout
+    while True:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return
+        if cond.wait(min(remaining, STATE_SYNC_POLL_SEC)) or _bot_store_sync():
+            return
 
-        sig.setdefault("client", BOT_DEFAULT_CLIENT)
-        sig.setdefault("received_at", utc_now_iso())
 
-        if "expires_at" not in sig:
-            eff = _signal_effective_time(sig)
-            if eff:
-                sig["expires_at"] = (eff + timedelta(seconds=BOT_SIGNAL_TTL_SEC)).isoformat().replace("+00:00", "Z")
-                changed = True
+def _ensure_bot_store():
+    global _bot_store_loaded
 
-        if is_signal_expired(sig, now_dt=now_dt):
-            changed = True
-            continue
+    with _lock_bot:
+        if _bot_store_loaded:
+            return
+        _bot_store_loaded = True
+
+        loaded = load_bot_signals()
+        if BOT_PERSIST_MODE == "journal" and _sqlite is None:
+            loaded += [r.get("sig") for r in _bot_journal.replay() if r.get("op") == "add"]
+        if STATE_CROSS_PROCESS:
+            _bot_mark_seen()
+
+        for sig in loaded:
+            if not isinstance(sig, dict):
+                continue
+            _bot_prepare_loaded(sig)
+            if _bot_store_index(sig):
+                received = parse_iso_utc(sig.get("received_at"))
+                _bot_dedup_remember(sig["id"], received.timestamp() if received else time.time())
+
+        # Journal/Snapshot sind nicht zwingend zeitlich sortiert
+        ordered = sorted(_bot_dedup.items(), key=lambda kv: kv[1])
+        _bot_dedup.clear()
+        _bot_dedup.update(ordered)
+        _bot_dedup_evict(time.time())
+        _bot_store_prune()
+        log_info(f"🤖 Bot-Signale geladen: {len(_bot_signals)}")
+
+
+def _bot_store_prune(now_ts: Optional[float] = None) -> bool:
+    # Nur wenn das früheste Ablaufdatum erreicht ist bzw. das Limit überschritten wurde
+    now_ts = time.time() if now_ts is None else now_ts
+    over_max = BOT_SIGNALS_MAX > 0 and len(_bot_signals) > BOT_SIGNALS_MAX
+    if now_ts <= _bot_next_expiry and not over_max:
+        return False
+
+    keep = [s for s in _bot_signals if now_ts <= _bot_meta[s["id"]][1]]
+    if BOT_SIGNALS_MAX > 0 and len(keep) > BOT_SIGNALS_MAX:
+        keep = keep[-BOT_SIGNALS_MAX:]
+    _bot_store_rebuild(keep)
+    return True
 
-        cleaned.append(sig)
 
-    if BOT_SIGNALS_MAX > 0 and len(cleaned) > BOT_SIGNALS_MAX:
-        cleaned = cleaned[-BOT_SIGNALS_MAX:]
-        changed = True
+def _bot_store_persist(new_sig: Optional[dict] = None):
+    if _sqlite is not None:
+        removed = list(_bot_removed)
+        _bot_removed.clear()
+        try:
+            _sqlite.write_signals([new_sig] if new_sig is not None else [], removed)
+        except sqlite3.Error as e:
+            log_error(f"SQLite Write Fehler signals: {e}")
+        return
+    _bot_removed.clear()
+    if BOT_PERSIST_MODE == "journal":
+        if new_sig is not None:
+            _bot_journal.append({"op": "add", "sig": new_sig})
+        else:
+            _bot_journal.compact()
+        return
+    save_bot_signals(list(_bot_signals))
+    if STATE_CROSS_PROCESS:
+        _bot_mark_seen()
 
-    if changed:
-        save_bot_signals(cleaned)
 
-    return cleaned
+def cleanup_bot_signals(persist: bool = False):
+    _ensure_bot_store()
+    with _lock_bot:
+        _bot_store_sync()
+        changed = _bot_store_prune()
+        if persist and changed:
+            _bot_store_persist()
+        return list(_bot_signals)
 
 
 def save_bot_signal(symbol, side, entry, tf, slf=None, tv_time=None, raw=None, client_id=None, sig_id=None):
-    signals = cleanup_bot_signals()
+    _ensure_bot_store()
 
     tv_time = (tv_time or "").strip()
     tf = normalize_tf(tf)
@@ -841,15 +3866,10 @@ def save_bot_signal(symbol, side, entry, tf, slf=None, tv_time=None, raw=None, c
 
     effective_dt = tv_dt or utc_now_dt()
     received_at = utc_now_iso()
-    expires_at = (effective_dt + timedelta(seconds=BOT_SIGNAL_TTL_SEC)).isoformat().replace("+00:00", "Z")
+    expires_at = _iso_from_dt(effective_dt + timedelta(seconds=BOT_SIGNAL_TTL_SEC))
 
     final_id = str(sig_id or "").strip() or build_signal_id(symbol, side, tf, tv_time or received_at, float(entry), client_id)
 
-    # Dedup (letzte 1000 prüfen)
-    for s in reversed(signals[-1000:]):
-        if s.get("id") == final_id:
-            return False, "duplicate", final_id
-
     sig = {
         "id": final_id,
         "cmd": "ENTRY",
@@ -865,70 +3885,295 @@ def save_bot_signal(symbol, side, entry, tf, slf=None, tv_time=None, raw=None, c
         "raw": raw or {},
     }
 
-    signals.append(sig)
-    if BOT_SIGNALS_MAX > 0 and len(signals) > BOT_SIGNALS_MAX:
-        signals = signals[-BOT_SIGNALS_MAX:]
+    with _lock_bot:
+        _bot_store_sync()
+        now_ts = time.time()
+        _bot_store_prune(now_ts)
+        _bot_dedup_evict(now_ts)
+
+        # Dedup über eigenen Index (überlebt TTL-Cleanup und BOT_SIGNALS_MAX)
+        if final_id in _bot_dedup or final_id in _bot_by_id:
+            _bot_dedup_stats["suppressed"] += 1
+            return False, "duplicate", final_id
+
+        _bot_dedup_remember(final_id, now_ts)
+        _bot_store_index(sig)
+        _bot_store_prune()
+        _bot_store_persist(sig)
+
+        cond = _bot_client_conds.get(client_id)
+        if cond is not None:
+            cond.notify_all()
 
-    save_bot_signals(signals)
     return True, "saved", final_id
 
 
-def _signal_matches_client(sig: dict, client_id: str) -> bool:
-    target = normalize_client_id(sig.get("client"))
-    return target == normalize_client_id(client_id)
+def _bot_client_position(client_id: str, sig_id: str) -> Optional[int]:
+    sig = _bot_by_id.get(sig_id)
+    if not sig or normalize_client_id(sig.get("client")) != client_id:
+        return None
+    seqs = _bot_client_seqs.get(client_id) or []
+    seq = _bot_meta[sig_id][0]
+    pos = bisect_left(seqs, seq)
+    if pos < len(seqs) and seqs[pos] == seq:
+        return pos
+    return None
+
+
+def _baseline_or_ack_newest(client_id: str, newest: dict):
+    eff_ts = _bot_meta[newest["id"]][2]
+    if eff_ts is not None:
+        age = time.time() - eff_ts
+        if age <= float(BOT_BASELINE_GRACE_SEC):
+            return newest
+
+    last_id = str(newest.get("id", "")).strip()
+    if last_id:
+        remember_client_ack(client_id, last_id)
+    return None
 
 
 def next_signal_for_client(client_id: str):
     client_id = normalize_client_id(client_id)
-    signals = cleanup_bot_signals()
-    if not signals:
-        return None
+    _ensure_bot_store()
 
-    relevant = [s for s in signals if _signal_matches_client(s, client_id)]
-    if not relevant:
-        return None
+    with _lock_bot:
+        _bot_store_sync()
+        _bot_store_prune()
+        relevant = _bot_by_client.get(client_id)
+        if not relevant:
+            return None
 
-    last_ack = get_client_last_ack(client_id)
+        last_ack = get_client_last_ack(client_id)
 
-    if not last_ack:
-        if BOT_NEW_CLIENT_BASELINE:
-            newest = relevant[-1]
-            newest_dt = _signal_effective_time(newest)
-            if newest_dt:
-                age = (utc_now_dt() - newest_dt).total_seconds()
-                if age <= float(BOT_BASELINE_GRACE_SEC):
-                    return newest
+        if not last_ack:
+            if BOT_NEW_CLIENT_BASELINE:
+                return _baseline_or_ack_newest(client_id, relevant[-1])
+            return relevant[0]
 
-            last_id = str(newest.get("id", "")).strip()
-            if last_id:
-                remember_client_ack(client_id, last_id)
-            return None
+        pos = _bot_client_position(client_id, last_ack)
+        if pos is not None and pos + 1 < len(relevant):
+            return relevant[pos + 1]
 
-        return relevant[0]
+        return _baseline_or_ack_newest(client_id, relevant[-1])
 
-    found_last = False
-    for sig in relevant:
-        if found_last:
-            return sig
-        if sig.get("id") == last_ack:
-            found_last = True
 
-    newest = relevant[-1]
-    newest_dt = _signal_effective_time(newest)
-    if newest_dt:
-        age = (utc_now_dt() - newest_dt).total_seconds()
-        if age <= float(BOT_BASELINE_GRACE_SEC):
-            return newest
+def _bot_client_cond(client_id: str) -> threading.Condition:
+    cond = _bot_client_conds.get(client_id)
+    if cond is None:
+        cond = threading.Condition(_lock_bot)
+        _bot_client_conds[client_id] = cond
+    return cond
 
-    last_id = str(newest.get("id", "")).strip()
-    if last_id:
-        remember_client_ack(client_id, last_id)
-    return None
+
+def wait_signal_for_client(client_id: str, timeout: float):
+    # Parkt bis save_bot_signal() ein neues Signal für den Client ablegt.
+    # Ein bereits bestätigtes Signal (Baseline-Grace) weckt nicht auf, sonst
+    # würde der Long-Poll während der Grace-Zeit sofort zurückkehren.
+    global _bot_waiters
+
+    client_id = normalize_client_id(client_id)
+    deadline = time.time() + max(0.0, timeout)
+
+    with _lock_bot:
+        # Limit erreicht -> sofort antworten statt einen weiteren Thread zu parken
+        if _bot_waiters >= BOT_LONGPOLL_MAX_WAITERS or _bot_waiters + _bot_streams >= BOT_PARKED_MAX:
+            return next_signal_for_client(client_id)
+
+        cond = _bot_client_cond(client_id)
+        _bot_waiters += 1
+        try:
+            while True:
+                sig = next_signal_for_client(client_id)
+                if sig and sig.get("id") != get_client_last_ack(client_id):
+                    return sig
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return sig
+                _bot_wait(cond, remaining)
+        finally:
+            _bot_waiters -= 1
+
+
+def _bot_stream_start_seq(client_id: str, resume_id: str) -> int:
+    # Resume hinter Last-Event-ID bzw. letztem Ack. Unbekannte id (abgelaufen):
+    # alle Signale innerhalb der Baseline-Grace-Zeit erneut senden.
+    if resume_id and _bot_client_position(client_id, resume_id) is not None:
+        return _bot_meta[resume_id][0]
+
+    cutoff = time.time() - float(BOT_BASELINE_GRACE_SEC)
+    for sig in _bot_by_client.get(client_id) or []:
+        seq, _, eff_ts = _bot_meta[sig["id"]]
+        if eff_ts is None or eff_ts >= cutoff:
+            return seq - 1
+    return _bot_seq
+
+
+def bot_stream_events(client_id: str, resume_id: str = ""):
+    client_id = normalize_client_id(client_id)
+    _ensure_bot_store()
+
+    with _lock_bot:
+        _bot_store_sync()
+        _bot_store_prune()
+        cursor = _bot_stream_start_seq(client_id, resume_id or (get_client_last_ack(client_id) or ""))
+        cond = _bot_client_cond(client_id)
+
+    yield "retry: 3000\n\n"
+
+    deadline = time.time() + BOT_STREAM_MAX_SEC if BOT_STREAM_MAX_SEC else float("inf")
+    while True:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return
+        with _lock_bot:
+            _bot_store_sync()
+            _bot_store_prune()
+            seqs = _bot_client_seqs.get(client_id) or []
+            pos = bisect_right(seqs, cursor)
+            if pos >= len(seqs):
+                _bot_wait(cond, min(BOT_STREAM_PING_SEC, remaining))
+                seqs = _bot_client_seqs.get(client_id) or []
+                pos = bisect_right(seqs, cursor)
+            batch = list(zip(seqs[pos:], (_bot_by_client.get(client_id) or [])[pos:]))
+
+        if not batch:
+            yield ": ping\n\n"
+            continue
+
+        for seq, sig in batch:
+            s = bot_signal_payload(sig)
+            cursor = seq
+            yield f"id: {s['id']}\nevent: signal\ndata: {json.dumps(s, separators=(',', ':'))}\n\n"
+            if BOT_AUTO_ACK_ON_GET:
+                remember_client_ack(client_id, s["id"])
+
+
+def bot_signal_payload(sig: dict) -> dict:
+    s = dict(sig)
+
+    side_lc = (s.get("side") or "").lower()
+    if side_lc == "long":
+        side_u = "LONG"
+    elif side_lc == "short":
+        side_u = "SHORT"
+    else:
+        side_u = (s.get("side") or "").upper()
+
+    s["side"] = side_u
+    s["direction"] = side_u
+    s["action"] = "BUY" if side_u == "LONG" else "SELL" if side_u == "SHORT" else ""
+    s["sl"] = s.get("slf")
+    s["timeframe"] = s.get("tf")
+    s["client"] = normalize_client_id(s.get("client"))
+    return s
 
 
 # =============================================================================
 # ROUTES
 # =============================================================================
+@app.before_request
+def _metrics_request_start():
+    request.environ["metrics.t0"] = time.perf_counter()
+
+
+@app.after_request
+def _metrics_request_end(response):
+    t0 = request.environ.get("metrics.t0")
+    if t0 is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        metrics_observe("http_request_duration_seconds", (("route", route), ("method", request.method)), time.perf_counter() - t0)
+        metrics_inc("http_requests_total", (("route", route), ("method", request.method), ("status", str(response.status_code))))
+    return response
+
+
+def _metrics_labels(labels: tuple, extra: tuple = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+
+    def family(name: str, kind: str, help_text: str):
+        lines.append(f"# HELP {METRICS_PREFIX}{name} {help_text}")
+        lines.append(f"# TYPE {METRICS_PREFIX}{name} {kind}")
+
+    hist_help = {
+        "http_request_duration_seconds": "Antwortzeit pro Flask-Route",
+        "provider_request_duration_seconds": "Dauer ausgehender API-Calls pro Provider",
+        "monitor_tick_duration_seconds": "Dauer eines Monitor-Durchlaufs (check_trades)",
+    }
+    count_help = {
+        "http_requests_total": "Requests pro Route und Statuscode",
+        "provider_responses_total": "Antworten pro Provider und Statuscode (error = keine Antwort)",
+    }
+    hists = list(_metrics_hist.items())
+    counts = list(_metrics_count.items())
+
+    for name, help_text in hist_help.items():
+        family(name, "histogram", help_text)
+        for (n, labels), h in hists:
+            if n != name:
+                continue
+            cumulative = 0
+            for bound, c in zip(METRICS_BUCKETS + (float("inf"),), list(h.counts)):
+                cumulative += c
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{METRICS_PREFIX}{name}_bucket{_metrics_labels(labels, (('le', le),))} {cumulative}")
+            lines.append(f"{METRICS_PREFIX}{name}_sum{_metrics_labels(labels)} {h.sum:.6f}")
+            lines.append(f"{METRICS_PREFIX}{name}_count{_metrics_labels(labels)} {cumulative}")
+
+    for name, help_text in count_help.items():
+        family(name, "counter", help_text)
+        for (n, labels), v in counts:
+            if n == name:
+                lines.append(f"{METRICS_PREFIX}{name}{_metrics_labels(labels)} {v}")
+
+    with _lock_trades:
+        trades = _resident_trades()
+        open_trades = sum(1 for t in trades if not t.get("closed"))
+    _ensure_bot_store()
+    with _lock_bot:
+        signals = len(_bot_signals)
+    family("open_trades", "gauge", "Offene VIP-Trades")
+    lines.append(f"{METRICS_PREFIX}open_trades {open_trades}")
+    family("bot_signals", "gauge", "Gespeicherte (nicht abgelaufene) Bot-Signale")
+    lines.append(f"{METRICS_PREFIX}bot_signals {signals}")
+    family("telegram_queue_depth", "gauge", "Nachrichten in der Telegram-Queue")
+    lines.append(f"{METRICS_PREFIX}telegram_queue_depth {len(_tg_queue)}")
+    family("monitor_leader", "gauge", "1, wenn dieser Prozess den VIP-Monitor betreibt")
+    lines.append(f"{METRICS_PREFIX}monitor_leader {1 if RUN_MONITOR and monitor_is_leader() else 0}")
+    now_ts = time.time()
+    with _lock_prices:
+        budget_stale = list(_price_budget_stale.values())
+    family("price_budget_stale_symbols", "gauge", "Symbole mit veraltetem Preis, weil das API-Budget erschöpft ist")
+    lines.append(f"{METRICS_PREFIX}price_budget_stale_symbols {len(budget_stale)}")
+    family("price_budget_stale_max_age_seconds", "gauge", "Alter des ältesten wegen Budget veralteten Preises")
+    lines.append(f"{METRICS_PREFIX}price_budget_stale_max_age_seconds {max((now_ts - ts for ts in budget_stale), default=0.0):.1f}")
+
+    io = file_io_status()
+    for key, kind, help_text in (
+        ("reads", "file_reads_total", "Lesezugriffe pro Zustandsdatei"),
+        ("read_bytes", "file_read_bytes_total", "Gelesene Bytes pro Zustandsdatei"),
+        ("writes", "file_writes_total", "Schreibzugriffe pro Zustandsdatei"),
+        ("write_bytes", "file_write_bytes_total", "Geschriebene Bytes pro Zustandsdatei"),
+    ):
+        family(kind, "counter", help_text)
+        for path, st in sorted(io.items()):
+            lines.append(f"{METRICS_PREFIX}{kind}{_metrics_labels((('path', path),))} {st[key]}")
+
+    return "\n".join(lines) + "\n"
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
 @app.route("/")
 def health():
     return "✅ Monitor läuft", 200
@@ -943,6 +4188,40 @@ def show_trades():
         return f"Fehler beim Laden: {e}", 500
 
 
+@app.route("/trades_history", methods=["GET"])
+def trades_history():
+    today = utc_now_dt().date()
+    try:
+        day_to = datetime.strptime(request.args.get("to") or today.isoformat(), "%Y-%m-%d").date()
+        day_from = datetime.strptime(request.args.get("from") or (day_to - timedelta(days=30)).isoformat(), "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"ok": False, "error": "from/to als YYYY-MM-DD"}), 400
+    try:
+        limit = int(request.args.get("limit", "100"))
+    except Exception:
+        limit = 100
+    limit = max(1, min(1000, limit))
+
+    items, next_cursor = read_trade_history(
+        day_from.isoformat(),
+        day_to.isoformat(),
+        symbol=(request.args.get("symbol", "") or "").strip().upper(),
+        close_reason=(request.args.get("close_reason", "") or "").strip(),
+        limit=limit,
+        cursor=(request.args.get("cursor", "") or "").strip(),
+    )
+    return jsonify(
+        {
+            "ok": True,
+            "from": day_from.isoformat(),
+            "to": day_to.isoformat(),
+            "count": len(items),
+            "trades": items,
+            "next_cursor": next_cursor,
+        }
+    ), 200
+
+
 @app.route("/monitor_status", methods=["GET"])
 def monitor_status():
     now_ts = time.time()
@@ -958,6 +4237,18 @@ def monitor_status():
 
             "twelve_cooldown_until": TWELVE_API_COOLDOWN_UNTIL,
             "twelve_cooldown_active": now_ts < TWELVE_API_COOLDOWN_UNTIL,
+
+            "telegram_queue": telegram_queue_status(),
+            "price_cache": price_cache_status(),
+            "price_budget": price_budget_status(),
+            "schedule": monitor_schedule_status(),
+            "eval_mode": MONITOR_EVAL_MODE,
+            "trigger_index": trigger_index_status(),
+            "storage": storage_status(),
+            "trades_persist": trades_persist_status(),
+            "price_feed": price_feed_status(),
+            "file_io": file_io_status(),
+            "leader": monitor_leader_status(),
         }
     ), 200
 
@@ -1022,7 +4313,9 @@ def webhook():
             }
 
             msg = f"*{symbol}* | *{side.upper()}*\n{event_texts[event_key]}{price_line}"
-            send_telegram(msg, retries=1)
+            # Queue voll -> 503, damit TradingView erneut sendet (Telegram aus -> 200 wie bisher)
+            if queue_telegram(msg) == TG_FULL:
+                return "❌ Telegram-Nachricht nicht angenommen", 503
 
             return "✅ Event OK", 200
 
@@ -1082,10 +4375,11 @@ def webhook():
             side=side
         )
 
-        send_telegram(msg, retries=1)
+        if queue_telegram(msg) == TG_FULL:
+            return "❌ Telegram-Nachricht nicht angenommen", 503
 
         print(
-            f"✅ ENTRY aus TradingView Levels gesendet: "
+            f"✅ ENTRY aus TradingView Levels eingereiht: "
             f"{symbol} {side} entry={entry} slf={tv_sl} "
             f"tp1={tv_tp1} tp3={tv_tp3} tp5={tv_tp5}",
             flush=True
@@ -1120,10 +4414,11 @@ def add_manual():
         if not all([symbol, entry, side, sl, tp1, tp2, tp3]) or side not in {"long", "short"}:
             return "❌ Ungültige Daten", 400
 
-        msg = format_message(symbol, entry, sl, tp1, tp2, tp3, side)
-        send_telegram(msg, retries=1)
-
+        # Trade zuerst speichern: er wird überwacht, egal was mit der Nachricht passiert
         save_trade(symbol, entry, sl, tp1, tp2, tp3, side, meta={"manual": True})
+        msg = format_message(symbol, entry, sl, tp1, tp2, tp3, side)
+        if queue_telegram(msg) == TG_FULL:
+            return "❌ Trade gespeichert, Telegram-Nachricht nicht angenommen", 503
         return "✅ Manuell hinzugefügt", 200
 
     except Exception as e:
@@ -1143,6 +4438,15 @@ def bot_status():
     st["auto_ack_on_get"] = BOT_AUTO_ACK_ON_GET
     st["new_client_baseline"] = BOT_NEW_CLIENT_BASELINE
     st["baseline_grace_sec"] = BOT_BASELINE_GRACE_SEC
+    st["longpoll_max_sec"] = BOT_LONGPOLL_MAX_SEC
+    st["longpoll_waiters"] = _bot_waiters
+    st["stream_max"] = BOT_STREAM_MAX
+    st["streams"] = _bot_streams
+    st["stream_max_sec"] = BOT_STREAM_MAX_SEC
+    st["parked_max"] = BOT_PARKED_MAX
+    st["web_async"] = WEB_ASYNC
+    st.update(bot_dedup_status())
+    st.update(client_ack_status())
     return jsonify(st), 200
 
 
@@ -1155,10 +4459,11 @@ def bot_toggle():
     if not require_secret(data, "bot"):
         return "❌ Unauthorized", 401
 
-    st = load_bot_state()
-    if "enabled" in data:
-        st["enabled"] = bool(data.get("enabled"))
-    save_bot_state(st)
+    with _lock_state:
+        st = load_bot_state()
+        if "enabled" in data:
+            st["enabled"] = bool(data.get("enabled"))
+        save_bot_state(st)
     return jsonify(st), 200
 
 
@@ -1184,7 +4489,7 @@ def bot_cleanup():
     data = request.get_json(force=True, silent=True) or {}
     if data and (not isinstance(data, dict) or not require_secret(data, "bot")):
         return "❌ Unauthorized", 401
-    signals = cleanup_bot_signals()
+    signals = cleanup_bot_signals(persist=True)
     return jsonify({"ok": True, "count": len(signals)}), 200
 
 
@@ -1194,28 +4499,21 @@ def bot_cleanup():
 @app.route("/bot_next", methods=["GET"])
 def bot_next():
     client_id = normalize_client_id(request.args.get("client", ""))
-    sig = next_signal_for_client(client_id)
+    try:
+        wait = float(request.args.get("wait", "0") or 0)
+    except Exception:
+        wait = 0.0
+    wait = max(0.0, min(float(BOT_LONGPOLL_MAX_SEC), wait))
+
+    if wait > 0:
+        sig = wait_signal_for_client(client_id, wait)
+    else:
+        sig = next_signal_for_client(client_id)
 
     payload = {"ok": True, "signal": None, "client": client_id}
 
     if sig:
-        s = dict(sig)
-
-        side_lc = (s.get("side") or "").lower()
-        if side_lc == "long":
-            side_u = "LONG"
-        elif side_lc == "short":
-            side_u = "SHORT"
-        else:
-            side_u = (s.get("side") or "").upper()
-
-        s["side"] = side_u
-        s["direction"] = side_u
-        s["action"] = "BUY" if side_u == "LONG" else "SELL" if side_u == "SHORT" else ""
-        s["sl"] = s.get("slf")
-        s["timeframe"] = s.get("tf")
-        s["client"] = normalize_client_id(s.get("client"))
-
+        s = bot_signal_payload(sig)
         payload.update(s)
         payload["signal"] = s
 
@@ -1227,6 +4525,30 @@ def bot_next():
     return jsonify(payload), 200
 
 
+@app.route("/bot_stream", methods=["GET"])
+def bot_stream():
+    global _bot_streams
+
+    client_id = normalize_client_id(request.args.get("client", ""))
+    resume_id = str(request.headers.get("Last-Event-ID") or request.args.get("last_id") or "").strip()
+
+    with _lock_bot:
+        if _bot_streams >= BOT_STREAM_MAX or _bot_waiters + _bot_streams >= BOT_PARKED_MAX:
+            return "❌ Zu viele Streams", 503, {"Retry-After": str(BOT_STREAM_PING_SEC)}
+        _bot_streams += 1
+
+    def _release():
+        global _bot_streams
+        with _lock_bot:
+            _bot_streams -= 1
+
+    resp = Response(bot_stream_events(client_id, resume_id), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
+    resp.call_on_close(_release)
+    return resp
+
+
 @app.route("/bot_ack", methods=["POST"])
 def bot_ack():
     data = request.get_json(force=True, silent=True) or {}
@@ -1316,8 +4638,12 @@ def bot_webhook():
 # =============================================================================
 # STARTUP
 # =============================================================================
-if RUN_MONITOR:
-    threading.Thread(target=start_monitor_delayed, daemon=True).start()
+if APP_STARTUP:
+    _ensure_bot_store()
+    start_trade_archiver()
+
+    if RUN_MONITOR:
+        start_monitor()
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", "10000"))
@@ -0,0 +1,15 @@
+"""Gemeinsames Setup: main in einem leeren Temp-Verzeichnis importieren.
+
+Alle Zustandsdateien (trades.json, bot_*.json, Journale, Lease) liegen
+relativ zum Arbeitsverzeichnis; der Monitor startet nicht beim Import.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+os.environ.setdefault("RUN_MONITOR", "0")
+os.environ.setdefault("MONITOR_DEBUG", "0")
+os.chdir(tempfile.mkdtemp(prefix="tvtg_tests_"))
+sys.path.insert(0, ROOT)
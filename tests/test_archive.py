@@ -0,0 +1,79 @@
+"""Trade-Archiv: idempotent bei Fehlern/Abstürzen, Trades ohne Zeitstempel, lesefest."""
+import json
+import os
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    db = main._SqliteStore(str(tmp_path / "storage.db"))
+    monkeypatch.setattr(main, "_sqlite", db)
+    monkeypatch.setattr(main, "_trades_resident", None)
+    monkeypatch.setattr(main, "_trades_rowids", None)
+    monkeypatch.setattr(main, "_trades_rowjson", [])
+    monkeypatch.setattr(main, "_trades_sig", None)
+    monkeypatch.setattr(main, "TRADES_HISTORY_DIR", str(tmp_path / "history"))
+    yield db
+    db.close()
+
+
+def trade(symbol: str, updated_at=None, closed: bool = True):
+    return {"id": f"t_{symbol}", "symbol": symbol, "side": "long", "entry": 100.0, "sl": 99.0, "tp1": 101.0,
+            "tp2": 102.0, "tp3": 103.0, "closed": closed, "updated_at": updated_at}
+
+
+def history(day: str):
+    with open(main._history_path(day), encoding="utf-8") as f:
+        return [json.loads(line)["symbol"] for line in f]
+
+
+def test_failed_day_stays_resident_and_is_not_duplicated(store, monkeypatch):
+    main.save_trades([trade("AAA", "2020-01-01T00:00:00Z"), trade("BBB", "2020-01-02T00:00:00Z"),
+                      trade("CCC", closed=False)])
+    real = main._archive_day
+
+    def flaky(day, items):
+        if day == "2020-01-02":
+            raise OSError("disk full")
+        real(day, items)
+
+    monkeypatch.setattr(main, "_archive_day", flaky)
+    assert main.archive_closed_trades() == 1
+    assert [t["symbol"] for t in main.load_trades()] == ["BBB", "CCC"]
+
+    monkeypatch.setattr(main, "_archive_day", real)
+    assert main.archive_closed_trades() == 1
+    assert history("2020-01-01") == ["AAA"]
+    assert history("2020-01-02") == ["BBB"]
+    assert [t["symbol"] for t in main.load_trades()] == ["CCC"]
+
+
+def test_crash_after_archive_write_does_not_duplicate(store):
+    t = trade("AAA", "2020-01-01T00:00:00Z")
+    main.save_trades([t])
+    # Absturz nach dem Archiv-Write, vor dem Verkleinern des Bestands
+    main._archive_day("2020-01-01", [t])
+    assert main.archive_closed_trades() == 1
+    assert history("2020-01-01") == ["AAA"]
+    assert main.load_trades() == []
+
+
+def test_closed_trade_without_timestamps_is_archived(store):
+    main.save_trades([trade("AAA")])
+    assert main.archive_closed_trades(now_ts=1577836800.0) == 1
+    assert history("2020-01-01") == ["AAA"]
+
+
+def test_history_read_skips_vanished_file(store, monkeypatch):
+    main.save_trades([trade("AAA", "2020-01-01T00:00:00Z"), trade("BBB", "2020-01-02T00:00:00Z")])
+    main.archive_closed_trades()
+    days = main._history_days()
+    os.remove(main._history_path("2020-01-01"))
+    monkeypatch.setattr(main, "_history_days", lambda: days)
+
+    out, cursor = main.read_trade_history("2020-01-01", "2020-01-31", limit=10)
+    assert [t["symbol"] for t in out] == ["BBB"]
+    assert cursor is None
@@ -0,0 +1,68 @@
+"""Bot-Dedup: ids überleben TTL-Cleanup und BOT_SIGNALS_MAX, verfallen nach BOT_DEDUP_TTL_SEC."""
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(main, "STATE_CROSS_PROCESS", False)
+    monkeypatch.setattr(main, "BOT_REQUIRE_TIME", False)
+    monkeypatch.setattr(main, "BOT_SIGNALS_MAX", 0)
+    monkeypatch.setattr(main, "_bot_store_loaded", True)
+    monkeypatch.setattr(main, "_bot_signals", [])
+    monkeypatch.setattr(main, "_bot_by_id", {})
+    monkeypatch.setattr(main, "_bot_by_client", {})
+    monkeypatch.setattr(main, "_bot_client_seqs", {})
+    monkeypatch.setattr(main, "_bot_meta", {})
+    monkeypatch.setattr(main, "_bot_next_expiry", float("inf"))
+    monkeypatch.setattr(main, "_bot_dedup", OrderedDict())
+    monkeypatch.setattr(main, "_bot_dedup_stats", {"suppressed": 0, "evicted": 0})
+    monkeypatch.setattr(main, "_bot_removed", [])
+    monkeypatch.setattr(main, "_bot_store_persist", lambda new_sig=None: None)
+
+
+def _save(sig_id, age_sec=0):
+    tv_time = (datetime.now(timezone.utc) - timedelta(seconds=age_sec)).isoformat().replace("+00:00", "Z")
+    ok, reason, _ = main.save_bot_signal("BTCUSD", "long", 100.0, "5", tv_time=tv_time, sig_id=sig_id)
+    return reason
+
+
+def test_duplicate_suppressed_after_signal_expired(store):
+    assert _save("a", age_sec=main.BOT_SIGNAL_TTL_SEC + 60) == "saved"
+    assert _save("b") == "saved"
+    assert "a" not in main._bot_by_id
+    assert _save("a") == "duplicate"
+    assert main._bot_dedup_stats["suppressed"] == 1
+
+
+def test_duplicate_suppressed_after_signals_max(store, monkeypatch):
+    monkeypatch.setattr(main, "BOT_SIGNALS_MAX", 2)
+    for sig_id in ("a", "b", "c"):
+        assert _save(sig_id) == "saved"
+    assert [s["id"] for s in main._bot_signals] == ["b", "c"]
+    assert _save("a") == "duplicate"
+
+
+def test_dedup_id_evicted_after_ttl(store):
+    assert _save("a", age_sec=main.BOT_SIGNAL_TTL_SEC + 60) == "saved"
+    assert _save("b") == "saved"
+    main._bot_dedup["a"] = time.time() - main.BOT_DEDUP_TTL_SEC - 1
+
+    assert _save("a") == "saved"
+    assert main._bot_dedup_stats["evicted"] == 1
+    assert list(main._bot_dedup) == ["b", "a"]
+
+
+def test_dedup_index_bounded_by_max(store, monkeypatch):
+    monkeypatch.setattr(main, "BOT_DEDUP_MAX", 3)
+    now_ts = time.time()
+    for i in range(5):
+        main._bot_dedup_remember(f"id{i}", now_ts)
+    main._bot_dedup_evict(now_ts)
+    assert list(main._bot_dedup) == ["id2", "id3", "id4"]
+    assert main._bot_dedup_stats["evicted"] == 2
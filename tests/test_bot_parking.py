@@ -0,0 +1,22 @@
+"""Long-Polls + Streams dürfen zusammen nie alle gunicorn-Threads belegen."""
+import time
+
+import main
+
+
+def test_defaults_leave_threads_for_webhooks():
+    assert main.BOT_PARKED_MAX < main.WEB_THREADS
+    assert main.BOT_LONGPOLL_MAX_WAITERS <= main.BOT_PARKED_MAX
+    assert main.BOT_STREAM_MAX <= main.BOT_PARKED_MAX
+
+
+def test_parked_cap_reached(monkeypatch):
+    # Streams belegen das gemeinsame Budget -> Long-Poll antwortet sofort, Stream 503
+    monkeypatch.setattr(main, "_bot_streams", main.BOT_PARKED_MAX)
+    started = time.time()
+    assert main.wait_signal_for_client("parked", 5) is None
+    assert time.time() - started < 1
+
+    resp = main.app.test_client().get("/bot_stream?client=parked")
+    assert resp.status_code == 503
+    assert main._bot_streams == main.BOT_PARKED_MAX
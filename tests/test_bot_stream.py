@@ -0,0 +1,65 @@
+"""/bot_stream: Streams enden nach BOT_STREAM_MAX_SEC und geben ihren Platz frei;
+unter gevent hängt die Zahl der Streams nicht an den Threads."""
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import main
+from conftest import ROOT
+
+
+def test_stream_ends_after_max_lifetime(monkeypatch):
+    monkeypatch.setattr(main, "BOT_STREAM_MAX_SEC", 1)
+    started = time.time()
+    events = list(main.bot_stream_events("stream-lifetime"))
+    assert time.time() - started < 3
+    assert events[0].startswith("retry:")
+
+
+def test_stream_slot_released_on_close(monkeypatch):
+    monkeypatch.setattr(main, "BOT_STREAM_MAX_SEC", 1)
+    before = main._bot_streams
+    resp = main.app.test_client().get("/bot_stream?client=stream-slot")
+    assert resp.status_code == 200
+    assert resp.get_data(as_text=True).startswith("retry:")
+    resp.close()
+    assert main._bot_streams == before
+
+
+GEVENT_STREAMS = """
+from gevent import monkey
+monkey.patch_all()
+import sys
+sys.path.insert(0, {root!r})
+import gevent
+import main
+
+assert main.WEB_ASYNC and main.BOT_STREAM_MAX > main.WEB_THREADS
+got = []
+
+def consume():
+    for event in main.bot_stream_events("fanout"):
+        if "event: signal" in event:
+            got.append(event)
+            return
+
+streams = [gevent.spawn(consume) for _ in range({n})]
+gevent.sleep(0.5)
+main.save_bot_signal("BTCUSD", "long", 100.0, "5", client_id="fanout", sig_id="sig_fanout")
+gevent.joinall(streams, timeout=10)
+print(len(got))
+"""
+
+
+def test_gevent_streams_are_not_limited_by_threads(tmp_path):
+    # gunicorn -k gevent: viele idle Streams in einem Prozess, alle bekommen das Signal
+    pytest.importorskip("gevent")
+    n = 200
+    env = dict(os.environ, RUN_MONITOR="0", MONITOR_DEBUG="0", BOT_REQUIRE_TIME="0", BOT_NEW_CLIENT_BASELINE="0",
+               BOT_STREAM_MAX_SEC="30")
+    out = subprocess.run([sys.executable, "-c", GEVENT_STREAMS.format(root=ROOT, n=n)], cwd=tmp_path, env=env,
+                         stdout=subprocess.PIPE, text=True, timeout=60, check=True).stdout
+    assert int(out.splitlines()[-1]) == n
@@ -0,0 +1,81 @@
+"""Client-Acks (write-behind): mehrere Acks pro Flush gebündelt, Flush beim Beenden."""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import main
+from conftest import ROOT
+
+EXIT_WITHOUT_FLUSH = """
+import sys
+sys.path.insert(0, {root!r})
+import main
+main.remember_client_ack("c1", "s1")
+main.remember_client_ack("c1", "s2")
+assert main.client_ack_status()["ack_pending"] == 1
+"""
+
+
+@pytest.fixture
+def acks(monkeypatch):
+    writes = []
+    save = main.save_clients
+
+    def counting_save(d):
+        writes.append(dict(d))
+        save(d)
+
+    monkeypatch.setattr(main, "BOT_ACK_FLUSH_SEC", 3600.0)
+    monkeypatch.setattr(main, "STATE_CROSS_PROCESS", False)
+    monkeypatch.setattr(main, "_ack_registry", {})
+    monkeypatch.setattr(main, "_ack_written", {})
+    monkeypatch.setattr(main, "_ack_loaded", True)
+    monkeypatch.setattr(main, "_ack_flusher", object())   # kein Timer-Thread im Test
+    monkeypatch.setattr(main, "_ack_stats", dict.fromkeys(main._ack_stats, 0))
+    main.save_clients({})
+    monkeypatch.setattr(main, "save_clients", counting_save)
+    return writes
+
+
+def test_acks_are_coalesced_per_flush(acks):
+    for i in range(10):
+        main.remember_client_ack("c1", f"s{i}")
+    main.remember_client_ack("c2", "x")
+    assert acks == []
+    assert main.get_client_last_ack("c1") == "s9"
+    assert main.client_ack_status()["ack_pending"] == 2
+
+    assert main.flush_client_acks() == 2
+    assert len(acks) == 1
+    clients = main.load_clients()
+    assert clients["c1"]["last_ack_id"] == "s9"
+    assert clients["c2"]["last_ack_id"] == "x"
+
+    assert main.flush_client_acks() == 0
+    assert len(acks) == 1
+    assert main.client_ack_status()["ack_pending"] == 0
+
+
+def test_newer_ack_from_other_worker_wins(acks):
+    main.remember_client_ack("c1", "old")
+    main._ack_registry["c1"] = ("old", main._ack_registry["c1"][1] - 60)
+    main.save_clients({"c1": {"last_ack_id": "newer", "acked_at": main.utc_now_iso()}})
+    acks.clear()
+
+    assert main.flush_client_acks() == 0
+    assert acks == []
+    assert main._ack_stats["stale_skipped"] == 1
+    assert main.load_clients()["c1"]["last_ack_id"] == "newer"
+
+
+def test_pending_acks_flushed_at_exit(tmp_path):
+    env = dict(os.environ, BOT_ACK_FLUSH_SEC="3600", STATE_CROSS_PROCESS="0")
+    subprocess.run(
+        [sys.executable, "-c", EXIT_WITHOUT_FLUSH.format(root=ROOT)],
+        cwd=tmp_path, env=env, check=True, timeout=60,
+    )
+    with open(tmp_path / main.BOT_CLIENTS_FILE, encoding="utf-8") as f:
+        assert json.load(f)["c1"]["last_ack_id"] == "s2"
@@ -0,0 +1,75 @@
+"""Regressionstests für _Journal (Append-Log + Snapshot)."""
+import json
+import os
+import threading
+import time
+
+import main
+
+
+def _journal(tmp_path, lock, data):
+    return main._Journal(str(tmp_path / "store.json"), lock, lambda: dict(data))
+
+
+def test_compact_under_store_lock_does_not_deadlock(tmp_path):
+    # Hintergrund-Kompaktierung wartet auf den Store-Lock, während ein
+    # Vordergrund-Aufrufer (save_clients, _bot_store_persist) den Lock hält
+    # und selbst compact() ruft -> früher gegenseitiges Warten
+    lock = main._ProcLock(str(tmp_path / "store.json.lock"))
+    data = {"a": 1}
+    j = _journal(tmp_path, lock, data)
+    j.append({"op": "ack", "client": "a"})
+
+    background = threading.Thread(target=j.compact, daemon=True)
+    foreground_done = threading.Event()
+
+    def foreground():
+        with lock:
+            background.start()
+            time.sleep(0.2)  # Hintergrund-Thread steht jetzt in compact()
+            data["a"] = 2
+            j.compact()
+        foreground_done.set()
+
+    fg = threading.Thread(target=foreground, daemon=True)
+    fg.start()
+    fg.join(5)
+    background.join(5)
+    assert foreground_done.is_set(), "compact() unter Store-Lock hängt"
+    assert not background.is_alive(), "Hintergrund-Kompaktierung hängt"
+    with open(tmp_path / "store.json", encoding="utf-8") as f:
+        assert json.load(f) == {"a": 2}
+    assert not os.path.exists(j.rotated_path)
+
+
+def test_append_and_foreground_compact_stress(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "BOT_JOURNAL_COMPACT_EVERY", 3)
+    lock = main._ProcLock(str(tmp_path / "store.json.lock"))
+    data = {}
+    j = _journal(tmp_path, lock, data)
+
+    def appender(k):
+        for i in range(200):
+            with lock:
+                data[f"{k}:{i}"] = i
+                j.append({"k": k, "i": i})
+
+    def compactor():
+        for _ in range(50):
+            with lock:
+                j.compact()
+
+    threads = [threading.Thread(target=appender, args=(k,), daemon=True) for k in range(3)]
+    threads.append(threading.Thread(target=compactor, daemon=True))
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join(20)
+    assert not any(th.is_alive() for th in threads), "Deadlock zwischen append() und compact()"
+
+    deadline = time.time() + 5
+    while j.compacting and time.time() < deadline:
+        time.sleep(0.01)
+    j.compact()
+    with open(tmp_path / "store.json", encoding="utf-8") as f:
+        assert len(json.load(f)) == 600
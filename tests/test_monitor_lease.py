@@ -0,0 +1,86 @@
+"""Monitor-Leader: Übernahme einer abgelaufenen Lease, lokaler Ablauf, Feed-Stopp beim Verlust."""
+import socket
+import threading
+import time
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def lease(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "MONITOR_LEASE_FILE", str(tmp_path / "monitor.lease"))
+    monkeypatch.setattr(main, "_leader_event", threading.Event())
+    monkeypatch.setattr(main, "log_info", lambda *a, **k: None)
+    monkeypatch.setattr(main, "log_error", lambda *a, **k: None)
+
+
+def worker(monkeypatch, name: str) -> dict:
+    # ein "Prozess": eigene Leader-Daten, Event wird pro Wechsel neu gesetzt
+    state = dict(main._leader, id=name, active=True, generation=0, expires_at=0.0, takeovers=0, lost=0, thread=None)
+    monkeypatch.setattr(main, "_leader", state)
+    return state
+
+
+def test_expired_lease_is_taken_over(lease, monkeypatch):
+    monkeypatch.setattr(main, "MONITOR_LEASE_TTL_SEC", 0.2)
+    a = worker(monkeypatch, "A")
+    assert main._lease_update(True)
+
+    b = worker(monkeypatch, "B")
+    assert not main._lease_update(True)  # A hält die Lease noch
+    time.sleep(0.3)
+    assert main._lease_update(True)
+    assert b["takeovers"] == 1
+    assert main._safe_read_json(main.MONITOR_LEASE_FILE, {})["holder"] == "B"
+
+    monkeypatch.setattr(main, "_leader", a)
+    assert not main._lease_update(True)
+    assert a["expires_at"] == 0.0
+
+
+def test_local_expiry_pauses_evaluation(lease, monkeypatch):
+    state = worker(monkeypatch, "A")
+    main._leader_event.set()
+    state["expires_at"] = time.time() + 10
+    assert main.monitor_is_leader()
+    # Wahl-Thread hängt, Lease lokal abgelaufen -> kein Auswerten mehr
+    state["expires_at"] = time.time() - 1
+    assert not main.monitor_is_leader()
+
+
+def test_lost_lease_stops_price_feed(lease, monkeypatch):
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    monkeypatch.setattr(main, "PRICE_FEED_IDLE_SEC", 0.2)
+    monkeypatch.setattr(main, "PRICE_FEED_RECONNECT_SEC", 0.05)
+    monkeypatch.setattr(main, "_feed_started", False)
+    monkeypatch.setattr(main, "MONITOR_LEASE_TTL_SEC", 0.2)
+
+    # A ist Leader mit laufendem Feed
+    state = worker(monkeypatch, "A")
+    assert main._lease_update(True)
+    state["generation"] = 1
+    state["last_tick"] = time.time()
+    main._leader_event.set()
+    main.start_price_feed(f"tcp://127.0.0.1:{server.getsockname()[1]}")
+    feed_threads = [th for th in threading.enumerate() if th.name in ("feed-eval", "feed-reader")]
+    assert main._feed_started and feed_threads
+
+    # A hängt, B übernimmt die abgelaufene Lease
+    time.sleep(0.3)
+    worker(monkeypatch, "B")
+    assert main._lease_update(True)
+
+    monkeypatch.setattr(main, "_leader", state)
+    main.monitor_election_step()
+    assert not main._leader_event.is_set()
+    assert not main.monitor_is_leader()
+    assert state["lost"] == 1
+    assert not main._feed_started
+    for th in feed_threads:
+        th.join(2)
+        assert not th.is_alive()
+    server.close()
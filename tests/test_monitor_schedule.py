@@ -0,0 +1,83 @@
+"""Adaptiver Monitor-Scheduler: Intervalle, Schlafdauer, Aufräumen und neue Trades."""
+import time
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def sched(monkeypatch):
+    monkeypatch.setattr(main, "MONITOR_ADAPTIVE", True)
+    monkeypatch.setattr(main, "MONITOR_POLL_SEC", 3)
+    monkeypatch.setattr(main, "MONITOR_MIN_POLL_SEC", 1.0)
+    monkeypatch.setattr(main, "MONITOR_MAX_POLL_SEC", 60.0)
+    monkeypatch.setattr(main, "MONITOR_ADAPTIVE_SAFETY", 0.2)
+    monkeypatch.setattr(main, "MONITOR_EVAL_MODE", "index")
+    monkeypatch.setattr(main, "_monitor_due", {})
+    monkeypatch.setattr(main, "_monitor_sched", {})
+    monkeypatch.setattr(main, "_monitor_vol", {})
+    monkeypatch.setattr(main, "budget_intervals", lambda symbols, now_ts=None: {s: 0.0 for s in symbols})
+    monkeypatch.setattr(main, "feed_covers", lambda symbol, now_ts: False)
+    monkeypatch.setattr(main, "monitor_is_leader", lambda: True)
+    main.save_trades([])
+    yield
+
+
+def test_interval_bounds(sched):
+    # ohne offenen Trigger: maximal; ohne Volatilität: Grundintervall
+    assert main._monitor_interval("AAA", None) == 60.0
+    assert main._monitor_interval("AAA", 0.01) == 3.0
+    # sigma bekannt: 0.2 * (Abstand / sigma)^2, begrenzt auf [min, max]
+    main._monitor_vol["AAA"] = {"price": 100.0, "ts": 0.0, "sigma": 0.001}
+    assert main._monitor_interval("AAA", 0.005) == pytest.approx(5.0)
+    assert main._monitor_interval("AAA", 0.0001) == 1.0
+    assert main._monitor_interval("AAA", 0.5) == 60.0
+
+
+def test_sleep_until_earliest_due(sched):
+    assert main._monitor_sleep_sec() == 3.0
+    main._monitor_due["AAA"] = time.time() + 2.0
+    assert 1.0 <= main._monitor_sleep_sec() <= 2.0
+    main._monitor_due["AAA"] = time.time() + 30.0
+    assert main._monitor_sleep_sec() == 3.0
+    main._monitor_due["AAA"] = time.time() - 30.0
+    assert main._monitor_sleep_sec() == 1.0
+
+
+def test_closed_symbol_is_pruned(sched, monkeypatch):
+    monkeypatch.setattr(main, "get_prices", lambda symbols: {s: 100.0 for s in symbols})
+    main.save_trade("AAA", 100.0, 90.0, 110.0, 120.0, 130.0, "long")
+    main.save_trade("BBB", 100.0, 90.0, 110.0, 120.0, 130.0, "long")
+    main.check_trades()
+    assert set(main._monitor_due) == {"AAA", "BBB"}
+
+    # BBB schließt (SL) -> verschwindet aus der Planung, Schlafdauer wieder normal
+    main.evaluate_prices({"BBB": 80.0}, time.time())
+    main._monitor_due["BBB"] = time.time() - 100.0
+    main.check_trades()
+    assert set(main._monitor_due) == {"AAA"}
+    assert set(main.monitor_schedule_status()["symbols"]) == {"AAA"}
+    assert main._monitor_sleep_sec() > 1.0
+
+
+def test_new_trade_on_scheduled_symbol_is_due_now(sched, monkeypatch):
+    polled = []
+
+    def prices(symbols):
+        polled.append(list(symbols))
+        return {s: 100.0 for s in symbols}
+
+    monkeypatch.setattr(main, "get_prices", prices)
+    main._monitor_vol["AAA"] = {"price": 100.0, "ts": 0.0, "sigma": 0.001}
+    main.save_trade("AAA", 100.0, 50.0, 150.0, 160.0, 170.0, "long")
+    main.check_trades()
+    assert main._monitor_due["AAA"] > time.time() + 10  # Levels weit weg
+
+    main.check_trades()
+    assert polled == [["AAA"]]
+
+    # neuer Trade mit TP1 direkt am Preis -> sofort geprüft
+    main.save_trade("AAA", 100.0, 99.0, 100.05, 101.0, 102.0, "long")
+    main.check_trades()
+    assert polled == [["AAA"], ["AAA"]]
@@ -0,0 +1,105 @@
+"""Mehrere Prozesse auf denselben Zustandsdateien (STATE_CROSS_PROCESS=1).
+
+Wiederholbare Kurzfassung von bench/bench_multiproc.py: _ProcLock mit
+threading.Condition und gleichzeitige Acks auf denselben Client aus
+mehreren Prozessen.
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import main
+from conftest import ROOT
+
+PROCS = 4
+ACKS = 60
+
+WORKER = """
+import json, os, sys, time
+sys.path.insert(0, {root!r})
+import main
+k = int(sys.argv[1])
+while not os.path.exists("start"):
+    time.sleep(0.01)
+for i in range({acks}):
+    main.remember_client_ack("shared", f"p{{k}}_{{i}}")
+    main.remember_client_ack(f"own{{k}}", f"p{{k}}_{{i}}")
+main.flush_client_acks()
+print(json.dumps(main._ack_registry["shared"]))
+"""
+
+VERIFY = """
+import json, sys
+sys.path.insert(0, {root!r})
+import main
+print(json.dumps(main.load_clients()))
+"""
+
+
+def test_condition_wait_releases_file_lock(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "STATE_CROSS_PROCESS", True)
+    path = str(tmp_path / "state.lock")
+    lock = main._ProcLock(path)
+    cond = threading.Condition(lock)
+    woke = []
+
+    def waiter():
+        with lock, lock:
+            with cond:
+                cond.wait(5)
+                woke.append(lock._depth)
+
+    th = threading.Thread(target=waiter)
+    th.start()
+    time.sleep(0.1)
+
+    # eigene Datei-Beschreibung = wie ein anderer Prozess
+    fd = os.open(path, os.O_RDWR)
+    try:
+        main.fcntl.flock(fd, main.fcntl.LOCK_EX | main.fcntl.LOCK_NB)
+        main.fcntl.flock(fd, main.fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+    with cond:
+        cond.notify()
+    th.join(5)
+    assert woke == [3]
+    assert lock._owner is None and lock._depth == 0
+    with pytest.raises(RuntimeError):
+        lock.release()
+
+
+@pytest.mark.parametrize("env", [
+    {"STORAGE_BACKEND": "json", "BOT_PERSIST_MODE": "json"},
+    {"STORAGE_BACKEND": "json", "BOT_PERSIST_MODE": "journal"},
+    {"STORAGE_BACKEND": "sqlite"},
+], ids=["json", "journal", "sqlite"])
+def test_concurrent_acks_same_client_across_processes(tmp_path, env):
+    env = dict(os.environ, RUN_MONITOR="0", MONITOR_DEBUG="0", STATE_CROSS_PROCESS="1", BOT_ACK_FLUSH_SEC="0", **env)
+    worker = WORKER.format(root=ROOT, acks=ACKS)
+    procs = [
+        subprocess.Popen([sys.executable, "-c", worker, str(k)], cwd=tmp_path, env=env, stdout=subprocess.PIPE, text=True)
+        for k in range(PROCS)
+    ]
+    time.sleep(0.5)
+    (tmp_path / "start").touch()
+    finals = []
+    for p in procs:
+        out, _ = p.communicate(timeout=120)
+        assert p.returncode == 0
+        finals.append(json.loads(out.splitlines()[-1]))
+
+    out = subprocess.run([sys.executable, "-c", VERIFY.format(root=ROOT)], cwd=tmp_path, env=env,
+                         stdout=subprocess.PIPE, text=True, timeout=60, check=True).stdout
+    clients = json.loads(out.splitlines()[-1])
+
+    # kein Prozess überschreibt die Clients der anderen, der neueste Ack gewinnt
+    for k in range(PROCS):
+        assert clients[f"own{k}"]["last_ack_id"] == f"p{k}_{ACKS - 1}"
+    assert clients["shared"]["last_ack_id"] == max(finals, key=lambda ack: ack[1])[0]
@@ -0,0 +1,102 @@
+"""Batch-Abfragen: TwelveData und MetalsAPI lesen Teilantworten und Fehlereinträge pro Symbol."""
+import pytest
+
+import main
+
+
+class FakeResp:
+    status_code = 200
+
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+@pytest.fixture
+def http(monkeypatch):
+    urls = []
+    replies = []
+
+    def get(url, **kw):
+        urls.append(url)
+        return FakeResp(replies.pop(0))
+
+    monkeypatch.setattr(main._http, "get", get)
+    monkeypatch.setattr(main, "TWELVE_API_KEY", "tw")
+    monkeypatch.setattr(main, "METALS_API_KEY", "mt")
+    monkeypatch.setattr(main, "TWELVE_API_COOLDOWN_UNTIL", 0.0)
+    monkeypatch.setattr(main, "METALS_API_COOLDOWN_UNTIL", 0.0)
+    monkeypatch.setattr(main, "TWELVE_API_DAILY_CREDITS", 0)
+    monkeypatch.setattr(main, "METALS_API_MONTHLY_CREDITS", 0)
+    # budget_charge() zählt auch ohne Limit mit -> eigener Zähler, nichts schreiben
+    monkeypatch.setattr(main, "_budget_loaded", True)
+    monkeypatch.setattr(main, "_budget", {p: {"window": "", "used": 0, "warned": False} for p in ("metals", "twelve")})
+    monkeypatch.setattr(main, "_budget_recent", {p: main.deque() for p in ("metals", "twelve")})
+    monkeypatch.setattr(main, "_budget_save", lambda force=False: None)
+    monkeypatch.setattr(main, "log_error", lambda text: None)
+    return urls, replies
+
+
+def test_twelve_batch_one_request_for_all_symbols(http):
+    urls, replies = http
+    replies.append({
+        "EURUSD": {"price": "1.0850"},
+        "XAU/USD": {"price": "2400.5"},
+        "DAX": {"code": 400, "message": "symbol not found", "status": "error"},
+        "NDX": {"price": ""},
+    })
+    got = main._fetch_twelve(["EURUSD", "XAUUSD", "GOLD", "GER40", "NAS100", "US500"])
+
+    assert len(urls) == 1
+    assert "symbol=EURUSD,XAU/USD,DAX,NDX,SPX&" in urls[0]
+    assert got == {"EURUSD": 1.085, "XAUUSD": 2400.5, "GOLD": 2400.5}
+
+
+def test_twelve_single_symbol_response(http):
+    urls, replies = http
+    replies.append({"price": "1.27"})
+    assert main._fetch_twelve(["GBPUSD"]) == {"GBPUSD": 1.27}
+
+
+def test_twelve_batch_429_sets_cooldown(http):
+    urls, replies = http
+    replies.append({"code": 429, "message": "run out of API credits for the day", "status": "error"})
+    assert main._fetch_twelve(["EURUSD", "GBPUSD"]) == {}
+    assert main.TWELVE_API_COOLDOWN_UNTIL > 0
+    assert main._fetch_twelve(["EURUSD", "GBPUSD"]) == {}
+    assert len(urls) == 1
+
+
+def test_twelve_batch_is_chunked(http, monkeypatch):
+    urls, replies = http
+    monkeypatch.setattr(main, "PRICE_BATCH_MAX", 2)
+    replies.extend([{"AAA": {"price": "1"}, "BBB": {"price": "2"}}, {"price": "3"}])
+    assert main._fetch_twelve(["AAA", "BBB", "CCC"]) == {"AAA": 1.0, "BBB": 2.0, "CCC": 3.0}
+    assert len(urls) == 2
+
+
+def test_metals_batch_inverts_rates(http):
+    urls, replies = http
+    replies.append({"success": True, "rates": {"XAU": 1 / 2400.0, "XAG": 1 / 30.0}})
+    got = main._fetch_metals(["XAUUSD", "XAGUSD", "SILVER"])
+
+    assert len(urls) == 1
+    assert "base=USD&symbols=XAG,XAU" in urls[0]
+    assert got == {"XAUUSD": pytest.approx(2400.0), "XAGUSD": pytest.approx(30.0), "SILVER": pytest.approx(30.0)}
+
+
+def test_metals_partial_rates(http):
+    urls, replies = http
+    replies.append({"data": {"success": True, "rates": {"XAU": 1 / 2400.0, "XAG": 0}}})
+    assert main._fetch_metals(["XAUUSD", "XAGUSD"]) == {"XAUUSD": pytest.approx(2400.0)}
+
+
+def test_metals_monthly_limit_pauses_until_next_month(http):
+    urls, replies = http
+    replies.append({"success": False, "error": {"code": 429, "info": "monthly usage limit reached"}})
+    assert main._fetch_metals(["XAUUSD"]) == {}
+    assert main.METALS_API_COOLDOWN_UNTIL == main.next_utc_month_ts()
+    assert main._fetch_metals(["XAUUSD"]) == {}
+    assert len(urls) == 1
@@ -0,0 +1,67 @@
+"""Preis-Budget: Intervall pro Durchlauf, erschöpftes Budget liefert veraltete statt frische Preise."""
+import time
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    monkeypatch.setattr(main, "TWELVE_API_DAILY_CREDITS", 100)
+    monkeypatch.setattr(main, "METALS_API_MONTHLY_CREDITS", 0)
+    monkeypatch.setattr(main, "PRICE_BUDGET_RESERVE_PCT", 0.0)
+    monkeypatch.setattr(main, "_budget_loaded", True)
+    monkeypatch.setattr(main, "_budget", {p: {"window": "", "used": 0, "warned": False} for p in ("metals", "twelve")})
+    monkeypatch.setattr(main, "_budget_demand", {})
+    monkeypatch.setattr(main, "_price_cache", {})
+    monkeypatch.setattr(main, "_price_budget_stale", {})
+    monkeypatch.setattr(main, "_price_budget_warned", {})
+    monkeypatch.setattr(main, "_price_stats", dict.fromkeys(main._price_stats, 0))
+    monkeypatch.setattr(main, "_fetch_prices", lambda symbols: pytest.fail("kein Provider-Call erwartet"))
+    return main._budget["twelve"]
+
+
+def test_intervals_scale_with_twelve_demand(budget):
+    now_ts = time.time()
+    with main._lock_prices:
+        main.budget_note_demand(["EURUSD", "GBPUSD"], now_ts)
+    intervals = main.budget_intervals(["EURUSD", "GBPUSD"], now_ts)
+    _, end_ts = main._budget_window("twelve")
+    assert intervals["EURUSD"] == intervals["GBPUSD"] == pytest.approx((end_ts - now_ts) * 2 / 100, rel=0.01)
+
+
+def test_billing_is_decided_once_per_pass(budget, monkeypatch):
+    calls = []
+    real = main._budget_metals_ok
+    monkeypatch.setattr(main, "_budget_metals_ok", lambda: calls.append(1) or real())
+    symbols = [f"S{i:03d}USD" for i in range(50)]
+    with main._lock_prices:
+        main.budget_note_demand(symbols, time.time())
+    main.budget_intervals(symbols)
+    assert len(calls) == 1
+
+
+def test_exhausted_budget_serves_price_as_stale(budget, monkeypatch):
+    logged = []
+    monkeypatch.setattr(main, "log_error", logged.append)
+    budget["window"] = main._budget_window("twelve")[0]
+    budget["used"] = 100
+    fetched_at = time.time() - 3 * 86400
+    main._price_cache["EURUSD"] = {"value": 1.1, "fetched_at": fetched_at, "provider": "twelve"}
+
+    assert main.budget_interval("EURUSD") is None
+    assert main.get_prices(["EURUSD"]) == {"EURUSD": 1.1}
+    assert main.get_prices(["EURUSD"]) == {"EURUSD": 1.1}
+    assert main._price_stats["hits"] == 0
+    assert main._price_stats["budget_stale_hits"] == 2
+    assert len([m for m in logged if "EURUSD" in m]) == 1
+
+    status = main.price_cache_status()
+    assert status["budget_stale_symbols"] == ["EURUSD"]
+    assert status["symbols"]["EURUSD"]["fresh"] is False
+    assert status["symbols"]["EURUSD"]["budget_exhausted"] is True
+    assert f"{main.METRICS_PREFIX}price_budget_stale_symbols 1" in main.render_metrics()
+
+    main._price_store(["EURUSD"], {"EURUSD": 1.2})
+    assert main.price_cache_status()["budget_stale_symbols"] == []
@@ -0,0 +1,126 @@
+"""Preis-Cache: frisch/stale/Miss und gebündelte gleichzeitige Misses."""
+import threading
+import time
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    calls = []
+
+    def fetch(symbols):
+        calls.append(list(symbols))
+        return {s: 100.0 + len(calls) for s in symbols}
+
+    monkeypatch.setattr(main, "TWELVE_API_DAILY_CREDITS", 0)
+    monkeypatch.setattr(main, "METALS_API_MONTHLY_CREDITS", 0)
+    monkeypatch.setattr(main, "PRICE_TTL_TWELVE_SEC", 10.0)
+    monkeypatch.setattr(main, "PRICE_STALE_MAX_SEC", 60.0)
+    monkeypatch.setattr(main, "_price_cache", {})
+    monkeypatch.setattr(main, "_price_refreshing", set())
+    monkeypatch.setattr(main, "_price_inflight", {})
+    monkeypatch.setattr(main, "_price_stats", dict.fromkeys(main._price_stats, 0))
+    monkeypatch.setattr(main, "_fetch_prices", fetch)
+    return calls
+
+
+def _age(symbol, seconds):
+    main._price_cache[symbol]["fetched_at"] = time.time() - seconds
+
+
+def test_miss_then_fresh_hit(cache):
+    assert main.get_prices(["eurusd"]) == {"EURUSD": 101.0}
+    assert main.get_prices(["EURUSD"]) == {"EURUSD": 101.0}
+    assert cache == [["EURUSD"]]
+    assert main._price_stats["misses"] == 1
+    assert main._price_stats["hits"] == 1
+
+
+def test_stale_serves_old_value_and_refreshes_once(cache):
+    main.get_prices(["EURUSD"])
+    _age("EURUSD", 30)
+    assert main.get_prices(["EURUSD"]) == {"EURUSD": 101.0}
+    deadline = time.time() + 5
+    while main._price_refreshing and time.time() < deadline:
+        time.sleep(0.01)
+    assert main._price_stats["stale_hits"] == 1
+    assert main._price_stats["refreshes"] == 1
+    assert main.get_prices(["EURUSD"]) == {"EURUSD": 102.0}
+
+
+def test_too_old_is_fetched_synchronously(cache):
+    main.get_prices(["EURUSD"])
+    _age("EURUSD", 100)
+    assert main.get_prices(["EURUSD"]) == {"EURUSD": 102.0}
+    assert main._price_stats["misses"] == 2
+
+
+def test_failed_fetch_is_not_cached(cache, monkeypatch):
+    monkeypatch.setattr(main, "_fetch_prices", lambda symbols: {})
+    assert main.get_prices(["EURUSD"]) == {"EURUSD": 0.0}
+    assert "EURUSD" not in main._price_cache
+    assert main._price_stats["errors"] == 1
+
+
+def test_concurrent_cold_misses_share_one_call(cache, monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def slow_fetch(symbols):
+        calls.append(list(symbols))
+        release.wait(5)
+        return {s: 1.5 for s in symbols}
+
+    monkeypatch.setattr(main, "_fetch_prices", slow_fetch)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(main.get_prices(["EURUSD"]))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    deadline = time.time() + 5
+    while main._price_stats["misses"] + main._price_stats["coalesced"] < 8 and time.time() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert calls == [["EURUSD"]]
+    assert results == [{"EURUSD": 1.5}] * 8
+    assert main._price_stats["coalesced"] == 7
+    assert main._price_inflight == {}
+
+
+def test_failing_owner_releases_waiters(cache, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+
+    def broken_fetch(symbols):
+        started.set()
+        release.wait(5)
+        raise RuntimeError("provider down")
+
+    monkeypatch.setattr(main, "_fetch_prices", broken_fetch)
+    errors = []
+
+    def fetch_owner():
+        try:
+            main.get_prices(["EURUSD"])
+        except RuntimeError as e:
+            errors.append(e)
+
+    owner = threading.Thread(target=fetch_owner)
+    owner.start()
+    started.wait(5)
+    waiter = []
+    t = threading.Thread(target=lambda: waiter.append(main.get_prices(["EURUSD"])))
+    t.start()
+    while not main._price_stats["coalesced"]:
+        time.sleep(0.01)
+    release.set()
+    owner.join(5)
+    t.join(5)
+    assert len(errors) == 1
+    assert waiter == [{"EURUSD": 0.0}]
+    assert main._price_inflight == {}
@@ -0,0 +1,40 @@
+"""Preis-Feed: hängende Verbindung wird erkannt, Preis-Log pro Tick gedrosselt."""
+import socket
+import threading
+
+import pytest
+
+import main
+
+
+def test_silent_tcp_feed_times_out(monkeypatch):
+    monkeypatch.setattr(main, "PRICE_FEED_IDLE_SEC", 0.2)
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    accepted = []
+    threading.Thread(target=lambda: accepted.append(server.accept()), daemon=True).start()
+    try:
+        with pytest.raises(main._FEED_TIMEOUTS):
+            for _ in main._feed_lines_tcp(f"tcp://127.0.0.1:{server.getsockname()[1]}"):
+                pass
+    finally:
+        for conn, _ in accepted:
+            conn.close()
+        server.close()
+
+
+def test_price_log_is_rate_limited(monkeypatch):
+    logged = []
+    monkeypatch.setattr(main, "MONITOR_DEBUG", True)
+    monkeypatch.setattr(main, "log_info", logged.append)
+    monkeypatch.setattr(main, "_price_logged_at", {})
+    monkeypatch.setattr(main, "_trades_last_price", {})
+    for i in range(100):
+        main._record_last_prices({"AAA": 100.0 + i})
+    assert len(logged) == 1
+
+    monkeypatch.setattr(main, "MONITOR_DEBUG", False)
+    monkeypatch.setattr(main, "_price_logged_at", {})
+    main._record_last_prices({"AAA": 100.0})
+    assert len(logged) == 1
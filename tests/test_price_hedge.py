@@ -0,0 +1,81 @@
+"""Metals-Hedge: hängt MetalsAPI, gewinnt die erste vollständige Antwort."""
+import time
+
+import pytest
+
+import main
+
+SYMBOLS = ["XAUUSD", "XAGUSD"]
+
+
+@pytest.fixture
+def hedge(monkeypatch):
+    calls = {"metals": 0, "twelve": []}
+    monkeypatch.setattr(main, "PRICE_HEDGE_AFTER_SEC", 0.05)
+    monkeypatch.setattr(main, "TWELVE_API_KEY", "tw")
+    monkeypatch.setattr(main, "TWELVE_API_COOLDOWN_UNTIL", 0.0)
+    monkeypatch.setattr(main, "TWELVE_API_DAILY_CREDITS", 0)
+    monkeypatch.setattr(main, "_price_stats", dict.fromkeys(main._price_stats, 0))
+    monkeypatch.setattr(main, "log_error", lambda text: None)
+
+    def setup(metals_delay, metals_result, twelve_delay, twelve_result):
+        def fetch_metals(symbols):
+            calls["metals"] += 1
+            time.sleep(metals_delay)
+            if isinstance(metals_result, Exception):
+                raise metals_result
+            return dict(metals_result)
+
+        def fetch_twelve(symbols):
+            calls["twelve"].append(list(symbols))
+            time.sleep(twelve_delay)
+            return {s: v for s, v in twelve_result.items() if s in symbols}
+
+        monkeypatch.setattr(main, "_fetch_metals", fetch_metals)
+        monkeypatch.setattr(main, "_fetch_twelve", fetch_twelve)
+        return calls
+
+    return setup
+
+
+def test_fast_primary_needs_no_hedge(hedge):
+    calls = hedge(0.0, {"XAUUSD": 2400.0, "XAGUSD": 30.0}, 0.0, {})
+    assert main._fetch_metals_hedged(SYMBOLS) == {"XAUUSD": 2400.0, "XAGUSD": 30.0}
+    assert calls["twelve"] == []
+    assert main._price_stats["hedges"] == 0
+
+
+def test_fast_partial_primary_falls_back_for_missing(hedge):
+    calls = hedge(0.0, {"XAUUSD": 2400.0}, 0.0, {"XAGUSD": 30.5})
+    assert main._fetch_metals_hedged(SYMBOLS) == {"XAUUSD": 2400.0, "XAGUSD": 30.5}
+    assert calls["twelve"] == [["XAGUSD"]]
+
+
+def test_hanging_primary_loses_to_hedge(hedge):
+    hedge(1.0, {"XAUUSD": 2400.0, "XAGUSD": 30.0}, 0.0, {"XAUUSD": 2401.0, "XAGUSD": 30.1})
+    started = time.time()
+    assert main._fetch_metals_hedged(SYMBOLS) == {"XAUUSD": 2401.0, "XAGUSD": 30.1}
+    assert time.time() - started < 0.5
+    assert main._price_stats["hedges"] == 1
+    assert main._price_stats["hedge_wins"] == 1
+
+
+def test_incomplete_hedge_waits_for_primary(hedge):
+    hedge(0.2, {"XAUUSD": 2400.0, "XAGUSD": 30.0}, 0.0, {"XAUUSD": 2401.0})
+    assert main._fetch_metals_hedged(SYMBOLS) == {"XAUUSD": 2400.0, "XAGUSD": 30.0}
+    assert main._price_stats["hedges"] == 1
+    assert main._price_stats["hedge_wins"] == 0
+
+
+def test_failing_primary_keeps_partial_hedge(hedge):
+    hedge(0.2, RuntimeError("metals down"), 0.0, {"XAGUSD": 30.1})
+    assert main._fetch_metals_hedged(SYMBOLS) == {"XAGUSD": 30.1}
+    assert main._price_stats["hedge_wins"] == 0
+
+
+def test_no_hedge_during_twelve_cooldown(hedge, monkeypatch):
+    monkeypatch.setattr(main, "TWELVE_API_COOLDOWN_UNTIL", time.time() + 60)
+    calls = hedge(0.2, {"XAUUSD": 2400.0, "XAGUSD": 30.0}, 0.0, {})
+    assert main._fetch_metals_hedged(SYMBOLS) == {"XAUUSD": 2400.0, "XAGUSD": 30.0}
+    assert calls["twelve"] == []
+    assert main._price_stats["hedges"] == 0
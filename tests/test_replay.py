@@ -0,0 +1,18 @@
+"""tools/replay.py: der erste Trade eines Symbols wird ab dem nächsten Tick ausgewertet."""
+import importlib.util
+import os
+
+from conftest import ROOT
+
+spec = importlib.util.spec_from_file_location("replay", os.path.join(ROOT, "tools", "replay.py"))
+replay = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(replay)
+
+
+def test_first_trade_of_symbol_sees_next_tick():
+    trades = [{"symbol": "AAA", "side": "long", "entry": 100.0, "sl": 95.0, "tp1": 105.0, "tp2": 110.0, "tp3": 115.0,
+               "opened_ts": 0.0}]
+    ticks = [(1.0, "AAA", 100.0), (2.0, "AAA", 106.0), (3.0, "AAA", 106.5)]
+    runs, n_ticks = replay.run(trades, ticks, [0.0])
+    assert n_ticks == 3
+    assert runs[0].summary()["tp1_rate_pct"] == 100.0
@@ -0,0 +1,76 @@
+"""SQLite-Backend: Archiv und save_trades löschen nur betroffene Zeilen, Verbindungen werden geschlossen."""
+import threading
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    db = main._SqliteStore(str(tmp_path / "storage.db"))
+    monkeypatch.setattr(main, "_sqlite", db)
+    monkeypatch.setattr(main, "_trades_resident", None)
+    monkeypatch.setattr(main, "_trades_rowids", None)
+    monkeypatch.setattr(main, "_trades_rowjson", [])
+    monkeypatch.setattr(main, "_trades_sig", None)
+    monkeypatch.setattr(main, "TRADES_HISTORY_DIR", str(tmp_path / "history"))
+    yield db
+    db.close()
+
+
+def ids(db):
+    return [row[0] for row in db.conn().execute("SELECT id FROM trades ORDER BY id")]
+
+
+def trade(symbol: str, closed: bool = False):
+    return {"symbol": symbol, "side": "long", "entry": 100.0, "sl": 99.0, "tp1": 101.0, "tp2": 102.0, "tp3": 103.0,
+            "closed": closed, "updated_at": "2020-01-01T00:00:00Z" if closed else None}
+
+
+def test_archive_deletes_only_archived_rows(store):
+    main.save_trades([trade("AAA"), trade("BBB", closed=True), trade("CCC")])
+    before = ids(store)
+    assert main.archive_closed_trades() == 1
+    assert ids(store) == [before[0], before[2]]
+    assert [t["symbol"] for t in store.load_trades()[0]] == ["AAA", "CCC"]
+
+
+def test_save_trades_keeps_row_ids(store):
+    main.save_trades([trade("AAA"), trade("BBB"), trade("CCC")])
+    before = ids(store)
+    main.save_trades([trade("AAA"), trade("XXX")])
+    assert ids(store) == before[:2]
+    assert [t["symbol"] for t in store.load_trades()[0]] == ["AAA", "XXX"]
+
+
+def test_connections_of_finished_threads_are_closed(store):
+    store.conn()
+
+    def worker():
+        store.conn()
+
+    th = threading.Thread(target=worker)
+    th.start()
+    th.join()
+    finished = store._conns[-1][1]
+
+    # die nächste neue Verbindung räumt die des beendeten Threads ab
+    th = threading.Thread(target=worker)
+    th.start()
+    th.join()
+    with pytest.raises(main.sqlite3.ProgrammingError):
+        finished.execute("SELECT 1")
+    assert len(store._conns) == 2
+
+    store.close()
+    assert store._conns == []
+
+
+def test_reads_are_counted(store):
+    main.save_trades([trade("AAA"), trade("BBB")])
+    before = main.file_io_status().get(f"{store.path}:trades", {}).get("reads", 0)
+    store.load_trades()
+    st = main.file_io_status()[f"{store.path}:trades"]
+    assert st["reads"] == before + 1
+    assert st["read_bytes"] > 0
@@ -0,0 +1,92 @@
+"""Telegram: Token-Buckets pro Chat und global, 429 mit retry_after wird neu eingeplant."""
+import threading
+import time
+from collections import deque
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def tg(monkeypatch):
+    monkeypatch.setattr(main, "BOT_TOKEN", "token")
+    monkeypatch.setattr(main, "CHAT_ID", "chat")
+    monkeypatch.setattr(main, "TELEGRAM_WORKERS", 1)
+    monkeypatch.setattr(main, "TELEGRAM_CHAT_PER_MIN", 60.0)
+    monkeypatch.setattr(main, "TELEGRAM_CHAT_BURST", 2)
+    monkeypatch.setattr(main, "_tg_global_bucket", main._TokenBucket(100.0, 100.0))
+    monkeypatch.setattr(main, "_tg_chat_buckets", {})
+    monkeypatch.setattr(main, "_tg_chat_blocked_until", {})
+    monkeypatch.setattr(main, "_tg_queue", deque())
+    monkeypatch.setattr(main, "_tg_cond", threading.Condition())
+    monkeypatch.setattr(main, "_tg_busy_chats", set())
+    monkeypatch.setattr(main, "_tg_workers", [])
+    monkeypatch.setattr(main, "_tg_stats", dict.fromkeys(main._tg_stats, 0))
+    monkeypatch.setattr(main, "log_error", lambda text: None)
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = main._TokenBucket(2.0, 3)
+    now = bucket.stamp
+    for _ in range(3):
+        assert bucket.wait_time(now) == 0.0
+        bucket.consume()
+    assert bucket.wait_time(now) == pytest.approx(0.5)
+    assert bucket.wait_time(now + 0.5) == 0.0
+    assert bucket.wait_time(now + 100) == 0.0
+    assert bucket.tokens == 3
+
+
+def test_chat_bucket_limits_only_its_chat(tg):
+    with main._tg_cond:
+        assert main._telegram_acquire("a") == 0.0
+        assert main._telegram_acquire("a") == 0.0
+        assert main._telegram_acquire("a") == pytest.approx(1.0, abs=0.05)
+        assert main._telegram_acquire("b") == 0.0
+
+
+def test_global_bucket_limits_all_chats(tg, monkeypatch):
+    monkeypatch.setattr(main, "_tg_global_bucket", main._TokenBucket(10.0, 2))
+    with main._tg_cond:
+        assert main._telegram_acquire("a") == 0.0
+        assert main._telegram_acquire("b") == 0.0
+        assert main._telegram_acquire("c") == pytest.approx(0.1, abs=0.02)
+
+
+def test_429_retry_after_is_parsed(monkeypatch):
+    class Resp:
+        status_code = 429
+        text = '{"ok":false}'
+
+        def json(self):
+            return {"ok": False, "parameters": {"retry_after": 7}}
+
+    monkeypatch.setattr(main._http, "post", lambda *a, **kw: Resp())
+    status, retry_after, err = main._telegram_post("chat", "hi")
+    assert (status, retry_after) == ("retry", 7.0)
+    assert "429" in err
+
+
+def test_429_reschedules_in_order_without_counting_as_error(tg, monkeypatch):
+    posted = []
+
+    def post(chat_id, text):
+        posted.append((time.monotonic(), text))
+        if len(posted) == 1:
+            return "retry", 0.3, "HTTP 429"
+        return "ok", 0.0, ""
+
+    monkeypatch.setattr(main, "_telegram_post", post)
+    assert main.queue_telegram("TP1") == main.TG_QUEUED
+    assert main.queue_telegram("TP2") == main.TG_QUEUED
+
+    deadline = time.time() + 5
+    while main._tg_stats["sent"] < 2 and time.time() < deadline:
+        time.sleep(0.02)
+
+    assert [text for _, text in posted] == ["TP1", "TP1", "TP2"]
+    assert posted[1][0] - posted[0][0] >= 0.3
+    assert main._tg_stats["rescheduled"] == 1
+    assert main._tg_stats["failed"] == 0
+    assert main._tg_stats["sent"] == 2
@@ -0,0 +1,70 @@
+"""Trades-Checkpoint: Übergänge sofort schreiben, reine Preis-/Heartbeat-Felder nur zum Checkpoint."""
+import pytest
+
+import main
+
+
+@pytest.fixture
+def book(monkeypatch):
+    writes = []
+    persist = main._persist_trades
+
+    def counting_persist(*args):
+        writes.append(1)
+        persist(*args)
+
+    monkeypatch.setattr(main, "MONITOR_CHECKPOINT_SEC", 60)
+    monkeypatch.setattr(main, "MONITOR_EVAL_MODE", "index")
+    monkeypatch.setattr(main, "_monitor_due", {})
+    monkeypatch.setattr(main, "_monitor_sched", {})
+    monkeypatch.setattr(main, "budget_intervals", lambda symbols, now_ts=None: {s: 0.0 for s in symbols})
+    monkeypatch.setattr(main, "_trades_last_price", {})
+    monkeypatch.setattr(main, "queue_telegram", lambda text, chat_id=None: main.TG_QUEUED)
+    main.save_trades([{
+        "symbol": "AAA", "side": "long", "entry": 100.0, "sl": 99.0, "tp1": 101.0, "tp2": 102.0, "tp3": 103.0,
+        "tp1_hit": False, "tp2_hit": False, "tp3_hit": False, "sl_hit": False, "closed": False,
+    }])
+    monkeypatch.setattr(main, "_trades_io", {"flushes": 0, "checkpoints": 0, "skipped": 0})
+    monkeypatch.setattr(main, "_persist_trades", counting_persist)
+    return writes
+
+
+def on_disk():
+    return main._safe_read_json(main.TRADES_FILE, [])[0]
+
+
+def test_unchanged_ticks_are_not_written(book):
+    for k in range(10):
+        assert main.evaluate_prices({"AAA": 100.0 + k * 0.01}, 1000.0 + k) == 0
+    assert book == []
+    assert main._trades_io["skipped"] == 10
+    assert "last_price" not in on_disk()
+    assert main.trades_persist_status()["volatile_pending"] is True
+
+
+def test_checkpoint_after_interval(book, monkeypatch):
+    main.evaluate_prices({"AAA": 100.2}, 1000.0)
+    assert book == []
+    monkeypatch.setattr(main, "_trades_checkpoint_at", main._trades_checkpoint_at - 61)
+    main.evaluate_prices({"AAA": 100.3}, 1001.0)
+    assert book == [1]
+    assert main._trades_io["checkpoints"] == 1
+    assert on_disk()["last_price"] == 100.3
+    assert main.trades_persist_status()["volatile_pending"] is False
+
+
+def test_transition_is_written_at_once(book):
+    assert main.evaluate_prices({"AAA": 101.5}, 1000.0) == 1
+    assert book == [1]
+    assert main._trades_io["flushes"] == 1
+    assert on_disk()["tp1_hit"] is True
+    assert on_disk()["last_price"] == 101.5
+
+
+def test_pending_fields_written_at_exit(book):
+    main._checkpoint_trades_at_exit()
+    assert book == []
+    main.evaluate_prices({"AAA": 100.2}, 1000.0)
+    main._checkpoint_trades_at_exit()
+    assert book == [1]
+    assert on_disk()["last_price"] == 100.2
@@ -0,0 +1,93 @@
+"""Trigger-Auswertung: loop, vector (residentes TradeBook) und index liefern dieselben Übergänge."""
+import copy
+import random
+
+import pytest
+
+import main
+
+SYMBOLS = ["AAA", "BBB", "CCC"]
+
+
+def make_trades(n: int, rng: random.Random):
+    trades = []
+    for _ in range(n):
+        symbol = rng.choice(SYMBOLS)
+        side = rng.choice(["long", "short"])
+        entry = 100.0 * (1 + rng.uniform(-0.002, 0.002))
+        sl = main.calc_sl(entry, side)
+        tp1, tp2, tp3 = main.calc_tp(entry, sl, side, symbol)
+        trades.append({
+            "symbol": symbol, "side": side, "entry": entry, "sl": sl, "tp1": tp1, "tp2": tp2, "tp3": tp3,
+            "tp1_hit": False, "tp2_hit": False, "tp3_hit": False, "sl_hit": False, "closed": False,
+        })
+    return trades
+
+
+def price_path(ticks: int, rng: random.Random):
+    prices = {s: 100.0 for s in SYMBOLS}
+    path = []
+    for _ in range(ticks):
+        prices = {s: p * (1 + rng.gauss(0, 0.003)) for s, p in prices.items()}
+        path.append(dict(prices))
+    return path
+
+
+def run_mode(monkeypatch, mode: str, trades, path):
+    monkeypatch.setattr(main, "MONITOR_EVAL_MODE", mode)
+    main.save_trades(copy.deepcopy(trades))
+    for k, prices in enumerate(path):
+        main.evaluate_prices(prices, 1000.0 + k)
+    return [(main.trade_flags(t), t.get("close_reason")) for t in main.load_trades()]
+
+
+@pytest.mark.skipif(main.np is None, reason="numpy fehlt")
+def test_modes_agree(monkeypatch):
+    rng = random.Random(3)
+    trades = make_trades(300, rng)
+    path = price_path(60, rng)
+    expected = run_mode(monkeypatch, "loop", trades, path)
+    assert any(flags for flags, _ in expected)
+    assert run_mode(monkeypatch, "vector", trades, path) == expected
+    assert run_mode(monkeypatch, "index", trades, path) == expected
+
+
+@pytest.mark.skipif(main.np is None, reason="numpy fehlt")
+def test_trade_book_stays_resident(monkeypatch):
+    rng = random.Random(5)
+    monkeypatch.setattr(main, "MONITOR_EVAL_MODE", "vector")
+    main.save_trades(make_trades(50, rng))
+    path = price_path(10, rng)
+    main.evaluate_prices(path[0], 1000.0)
+    book = main._trade_book["book"]
+    for k, prices in enumerate(path[1:]):
+        main.evaluate_prices(prices, 1001.0 + k)
+    assert main._trade_book["book"] is book
+
+
+def test_new_trade_checked_without_crossing(monkeypatch):
+    # Trade, dessen TP1 beim Anlegen schon überschritten ist, löst beim
+    # nächsten Tick aus, auch ohne Kreuzung und ohne Index-Neuaufbau
+    monkeypatch.setattr(main, "MONITOR_EVAL_MODE", "index")
+    main.save_trades([])
+    main.save_trade("AAA", 100.0, 99.0, 110.0, 120.0, 130.0, "long")
+    main.evaluate_prices({"AAA": 100.0}, 1000.0)
+    version = main._trades_version
+
+    main.save_trade("AAA", 100.0, 99.0, 101.0, 120.0, 130.0, "long")
+    assert main._trades_version == version
+    assert main.evaluate_prices({"AAA": 105.0}, 1001.0) == 1
+    assert [t["tp1_hit"] for t in main.load_trades()] == [False, True]
+    assert main.evaluate_prices({"AAA": 105.0}, 1002.0) == 0
+
+
+def test_tick_does_not_touch_every_row(monkeypatch):
+    monkeypatch.setattr(main, "MONITOR_EVAL_MODE", "index")
+    monkeypatch.setattr(main, "_trades_last_price", {})
+    main.save_trades(make_trades(200, random.Random(9)))
+    main.evaluate_prices({s: 100.0 for s in SYMBOLS}, 1000.0)
+    main.evaluate_prices({s: 100.01 for s in SYMBOLS}, 1001.0)
+    # Preis wird einmal pro Symbol gemerkt und erst beim Lesen/Schreiben eingetragen
+    assert main._trades_last_price["AAA"][0] == 100.01
+    assert all(t.get("last_price") is None for t in main._trades_resident if not t.get("closed"))
+    assert {t["last_price"] for t in main.load_trades() if not t["closed"]} == {100.01}
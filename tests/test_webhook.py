@@ -0,0 +1,52 @@
+"""/webhook und /add_manual: volle Telegram-Queue -> 503 (TradingView wiederholt),
+Telegram nicht konfiguriert -> 200 wie bisher, manuelle Trades werden immer gespeichert."""
+import pytest
+
+import main
+
+EVENT = {"cmd": "TP1", "symbol": "BTCUSD", "side": "long", "price": 101.0}
+ENTRY = {"cmd": "ENTRY", "symbol": "BTCUSD", "side": "long", "entry": 100.0, "slf": 99.0, "tp1": 101.0, "tp3": 102.0, "tp5": 103.0}
+MANUAL = {"symbol": "BTCUSD", "side": "long", "entry": 100.0, "sl": 99.0, "tp1": 101.0, "tp2": 102.0, "tp3": 103.0}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "VIP_SECRET", "")
+    monkeypatch.setattr(main, "BOT_TOKEN", "test")
+    monkeypatch.setattr(main, "CHAT_ID", "1")
+    monkeypatch.setattr(main, "_ensure_telegram_workers", lambda: None)
+    main._tg_queue.clear()
+    yield main.app.test_client()
+    main._tg_queue.clear()
+
+
+@pytest.mark.parametrize("route,payload", [("/webhook", EVENT), ("/webhook", ENTRY)])
+def test_queue_full_returns_503(client, monkeypatch, route, payload):
+    monkeypatch.setattr(main, "TELEGRAM_QUEUE_OVERFLOW", "drop_new")
+    monkeypatch.setattr(main, "TELEGRAM_QUEUE_MAX", 0)
+    trades_before = len(main.load_trades())
+    assert client.post(route, json=payload).status_code == 503
+    assert len(main.load_trades()) == trades_before
+
+
+def test_add_manual_queue_full_still_saves_trade(client, monkeypatch):
+    monkeypatch.setattr(main, "TELEGRAM_QUEUE_OVERFLOW", "drop_new")
+    monkeypatch.setattr(main, "TELEGRAM_QUEUE_MAX", 0)
+    trades_before = len(main.load_trades())
+    assert client.post("/add_manual", json=MANUAL).status_code == 503
+    assert len(main.load_trades()) == trades_before + 1
+
+
+@pytest.mark.parametrize("route,payload,saved", [("/webhook", EVENT, 0), ("/webhook", ENTRY, 0), ("/add_manual", MANUAL, 1)])
+def test_telegram_unconfigured_returns_200(client, monkeypatch, route, payload, saved):
+    monkeypatch.setattr(main, "BOT_TOKEN", "")
+    trades_before = len(main.load_trades())
+    assert client.post(route, json=payload).status_code == 200
+    assert len(main.load_trades()) == trades_before + saved
+    assert len(main._tg_queue) == 0
+
+
+@pytest.mark.parametrize("route,payload", [("/webhook", EVENT), ("/webhook", ENTRY)])
+def test_accepted_returns_200(client, route, payload):
+    assert client.post(route, json=payload).status_code == 200
+    assert len(main._tg_queue) == 1
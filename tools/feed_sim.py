@@ -0,0 +1,101 @@
+"""Lokaler Preis-Feed-Simulator (TCP-Zeilenprotokoll) für PRICE_FEED_URL.
+
+    python tools/feed_sim.py --port 9009 --symbols BTCUSD:65000,XAUUSD:2400 --rate 20
+    PRICE_FEED_URL=tcp://127.0.0.1:9009 python main.py
+
+Jede Zeile: "SYMBOL PREIS TS" (--json: {"symbol", "price", "ts"}). Random Walk
+pro Symbol; --jump SYMBOL:PREIS:SEK setzt nach SEK Sekunden einen Sprung,
+um Trigger gezielt auszulösen. Die Latenz (Quelle -> ausgewertet) steht dann
+unter /monitor_status -> price_feed.
+"""
+import argparse
+import json
+import random
+import socket
+import sys
+import threading
+import time
+
+
+def parse_symbols(spec: str):
+    out = {}
+    for item in spec.split(","):
+        symbol, _, price = item.strip().partition(":")
+        if symbol:
+            out[symbol.upper()] = float(price or 100.0)
+    return out
+
+
+def parse_jumps(items):
+    out = []
+    for item in items or []:
+        symbol, price, after = item.split(":")
+        out.append((symbol.upper(), float(price), float(after)))
+    return out
+
+
+def serve_client(conn: socket.socket, prices: dict, args, jumps):
+    rng = random.Random(args.seed)
+    prices = dict(prices)
+    pending = list(jumps)
+    started = time.time()
+    interval = 1.0 / max(0.1, args.rate)
+    sent = 0
+    try:
+        while args.count <= 0 or sent < args.count:
+            now = time.time()
+            for jump in list(pending):
+                if now - started >= jump[2]:
+                    prices[jump[0]] = jump[1]
+                    pending.remove(jump)
+            lines = []
+            for symbol in prices:
+                prices[symbol] *= 1 + rng.gauss(0, args.vol)
+                ts = time.time()
+                if args.json:
+                    lines.append(json.dumps({"symbol": symbol, "price": round(prices[symbol], 6), "ts": ts}))
+                else:
+                    lines.append(f"{symbol} {prices[symbol]:.6f} {ts:.6f}")
+            conn.sendall(("\n".join(lines) + "\n").encode("utf-8"))
+            sent += 1
+            time.sleep(interval)
+    except OSError:
+        pass
+    finally:
+        conn.close()
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=9009)
+    ap.add_argument("--symbols", default="BTCUSD:65000,ETHUSD:3200,XAUUSD:2400")
+    ap.add_argument("--rate", type=float, default=10.0, help="Ticks pro Sekunde und Symbol")
+    ap.add_argument("--vol", type=float, default=0.0003, help="Std.-Abw. der Rendite pro Tick")
+    ap.add_argument("--jump", action="append", help="SYMBOL:PREIS:SEK (mehrfach)")
+    ap.add_argument("--count", type=int, default=0, help="Ticks pro Verbindung, 0 = endlos")
+    ap.add_argument("--json", action="store_true")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    prices = parse_symbols(args.symbols)
+    jumps = parse_jumps(args.jump)
+
+    srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    srv.bind((args.host, args.port))
+    srv.listen()
+    print(f"📡 Feed-Simulator auf tcp://{args.host}:{args.port} ({', '.join(prices)})", flush=True)
+    try:
+        while True:
+            conn, addr = srv.accept()
+            print(f"Client verbunden: {addr[0]}:{addr[1]}", flush=True)
+            threading.Thread(target=serve_client, args=(conn, prices, args, jumps), daemon=True).start()
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        srv.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
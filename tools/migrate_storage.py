@@ -0,0 +1,53 @@
+"""Einmalige Migration: JSON-Dateien -> SQLite (STORAGE_BACKEND=sqlite).
+
+    python tools/migrate_storage.py --db storage.db [--force]
+
+Liest trades, bot_signals, bot_clients und bot_state über die normalen
+Loader von main.py (Dateipfade aus den bekannten Env-Variablen, bei
+BOT_PERSIST_MODE=journal inkl. Journal-Replay) und schreibt sie in die DB.
+Abgelaufene Bot-Signale werden dabei nicht übernommen. Ohne --force wird
+eine DB mit vorhandenen Daten nicht angefasst.
+"""
+import argparse
+import os
+import sys
+
+# main nur als Bibliothek: kein Monitor, kein Laden beim Import
+os.environ["APP_STARTUP"] = "0"
+os.environ["RUN_MONITOR"] = "0"
+os.environ["STORAGE_BACKEND"] = "json"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import main  # noqa: E402
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", default=os.environ.get("STORAGE_DB_FILE", "storage.db"))
+    ap.add_argument("--force", action="store_true", help="vorhandene Daten in der DB ersetzen")
+    args = ap.parse_args()
+
+    store = main._SqliteStore(args.db)
+    if not store.is_empty() and not args.force:
+        print(f"❌ {args.db} enthält bereits Daten (--force zum Ersetzen)")
+        return 1
+
+    trades = main.load_trades()
+    signals = main.cleanup_bot_signals()
+    clients = main.load_clients()
+    state = main.load_bot_state()
+
+    store.write_trades(trades, None, [])
+    store.write_signals(signals, [], replace=True)
+    store.put_clients(clients, replace=True)
+    store.save_state(state)
+    store.conn().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    store.close()
+
+    print(f"✅ {args.db}: trades={len(trades)} signals={len(signals)} clients={len(clients)} state_keys={len(state)}")
+    print("Jetzt STORAGE_BACKEND=sqlite setzen; die JSON-Dateien bleiben unverändert liegen.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,299 @@
+"""Lokaler Provider-Simulator: CoinGecko, MetalsAPI, TwelveData, Telegram sendMessage.
+
+    python tools/provider_sim.py --port 9200 --scenario metals_monthly_429
+    python tools/provider_sim.py --port 9200 --scenario my_scenario.json
+
+Die App zeigt per COINGECKO_API_BASE / METALS_API_BASE / TWELVE_API_BASE /
+TELEGRAM_API_BASE=http://127.0.0.1:9200 hierher. Pro Provider im Szenario:
+
+    latency:    {"dist": "fixed", "ms": 50} | {"dist": "uniform", "min_ms", "max_ms"}
+                | {"dist": "lognormal", "median_ms", "p99_ms"} | {"dist": "exp", "mean_ms"}
+    error_rate: Anteil Antworten mit Fehler (CoinGecko 500, Telegram 500, sonst Fehler-Payload)
+    quota:      Calls bis zur Erschöpfung (MetalsAPI 429 monatlich/stündlich, TwelveData
+                429 Tageslimit, Telegram 429 mit retry_after), quota_kind: monthly | hourly
+    nested:     MetalsAPI-Antworten in {"data": {...}} verpacken
+    rate_429 / retry_after: Telegram, Anteil 429 und retry_after-Sekunden
+
+Steuerung (für Harness/Tests):
+    GET  /_sim/prices                aktuelle Preise pro Symbol
+    POST /_sim/price  {"symbol", "price"}   Preis setzen (Random Walk läuft ab dort weiter)
+    GET  /_sim/telegram?since=TS     empfangene Nachrichten mit Empfangszeit
+    GET  /_sim/stats                 Calls/Fehler/429 pro Provider
+    POST /_sim/scenario {...}        Szenario zur Laufzeit ersetzen
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SCENARIOS = {
+    "healthy": {
+        "coingecko": {"latency": {"dist": "lognormal", "median_ms": 60, "p99_ms": 250}},
+        "metals": {"latency": {"dist": "lognormal", "median_ms": 120, "p99_ms": 600}},
+        "twelve": {"latency": {"dist": "lognormal", "median_ms": 90, "p99_ms": 400}},
+        "telegram": {"latency": {"dist": "lognormal", "median_ms": 80, "p99_ms": 300}},
+    },
+    "slow": {
+        "coingecko": {"latency": {"dist": "lognormal", "median_ms": 400, "p99_ms": 4000}},
+        "metals": {"latency": {"dist": "lognormal", "median_ms": 900, "p99_ms": 6000}},
+        "twelve": {"latency": {"dist": "lognormal", "median_ms": 500, "p99_ms": 5000}},
+        "telegram": {"latency": {"dist": "lognormal", "median_ms": 300, "p99_ms": 3000}},
+    },
+    "flaky": {
+        "coingecko": {"latency": {"dist": "exp", "mean_ms": 150}, "error_rate": 0.2},
+        "metals": {"latency": {"dist": "exp", "mean_ms": 250}, "error_rate": 0.2, "nested": True},
+        "twelve": {"latency": {"dist": "exp", "mean_ms": 200}, "error_rate": 0.2},
+        "telegram": {"latency": {"dist": "exp", "mean_ms": 120}, "error_rate": 0.1},
+    },
+    "metals_monthly_429": {
+        "metals": {"latency": {"dist": "fixed", "ms": 100}, "quota": 3, "quota_kind": "monthly", "nested": True},
+    },
+    "metals_hourly_429": {
+        "metals": {"latency": {"dist": "fixed", "ms": 100}, "quota": 3, "quota_kind": "hourly"},
+    },
+    "twelve_daily_429": {
+        "twelve": {"latency": {"dist": "fixed", "ms": 80}, "quota": 5},
+    },
+    "telegram_429": {
+        "telegram": {"latency": {"dist": "fixed", "ms": 60}, "rate_429": 0.3, "retry_after": 2},
+    },
+}
+
+BASE_PRICES = {
+    "bitcoin": 65000.0, "ethereum": 3200.0, "ripple": 0.6, "dogecoin": 0.15,
+    "XAU": 2400.0, "XAG": 30.0,
+    "XAU/USD": 2400.0, "XAG/USD": 30.0, "BTC/USD": 65000.0, "ETH/USD": 3200.0,
+    "EURUSD": 1.08, "GBPUSD": 1.27, "NDX": 18000.0, "DJI": 39000.0, "SPX": 5200.0, "DAX": 18500.0,
+}
+
+
+class Sim:
+    def __init__(self, scenario: dict, vol: float, seed: int):
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+        self.vol = vol
+        self.scenario = scenario
+        self.prices = dict(BASE_PRICES)
+        self.stats = {}
+        self.telegram = []
+        self.used = {}
+
+    def cfg(self, provider: str) -> dict:
+        return self.scenario.get(provider, {})
+
+    def count(self, provider: str, key: str):
+        st = self.stats.setdefault(provider, {"calls": 0, "errors": 0, "quota_429": 0, "rate_429": 0})
+        st[key] += 1
+
+    def latency(self, provider: str) -> float:
+        lat = self.cfg(provider).get("latency") or {"dist": "fixed", "ms": 0}
+        dist = lat.get("dist", "fixed")
+        with self.lock:
+            if dist == "uniform":
+                ms = self.rng.uniform(lat.get("min_ms", 0), lat.get("max_ms", 0))
+            elif dist == "lognormal":
+                median = max(0.001, lat.get("median_ms", 50))
+                sigma = math.log(max(lat.get("p99_ms", median), median) / median) / 2.326
+                ms = median * math.exp(self.rng.gauss(0, sigma))
+            elif dist == "exp":
+                ms = self.rng.expovariate(1.0 / max(0.001, lat.get("mean_ms", 50)))
+            else:
+                ms = lat.get("ms", 0)
+        return ms / 1000.0
+
+    def roll(self, provider: str, key: str) -> bool:
+        rate = float(self.cfg(provider).get(key, 0) or 0)
+        with self.lock:
+            return rate > 0 and self.rng.random() < rate
+
+    def quota_exhausted(self, provider: str, cost: int = 1) -> bool:
+        quota = self.cfg(provider).get("quota")
+        with self.lock:
+            self.used[provider] = self.used.get(provider, 0) + cost
+            return quota is not None and self.used[provider] > quota
+
+    def price(self, key: str) -> float:
+        with self.lock:
+            p = self.prices.setdefault(key, 100.0)
+            p *= 1 + self.rng.gauss(0, self.vol)
+            self.prices[key] = p
+            return p
+
+
+class Handler(BaseHTTPRequestHandler):
+    sim: Sim = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, payload, delay: float = 0.0):
+        if delay:
+            time.sleep(delay)
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if (self.headers.get("Content-Type") or "").startswith("application/json"):
+            return json.loads(raw or b"{}")
+        return {k: v[0] for k, v in parse_qs(raw.decode("utf-8")).items()}
+
+    # --- Provider ------------------------------------------------------
+    def coingecko(self, q):
+        sim = self.sim
+        sim.count("coingecko", "calls")
+        delay = sim.latency("coingecko")
+        if sim.quota_exhausted("coingecko"):
+            sim.count("coingecko", "quota_429")
+            return self._send(429, {"status": {"error_code": 429, "error_message": "rate limit"}}, delay)
+        if sim.roll("coingecko", "error_rate"):
+            sim.count("coingecko", "errors")
+            return self._send(500, {"error": "internal"}, delay)
+        ids = [i for i in q.get("ids", "").split(",") if i]
+        return self._send(200, {i: {"usd": round(sim.price(i), 6)} for i in ids}, delay)
+
+    def metals(self, q):
+        sim = self.sim
+        cfg = sim.cfg("metals")
+        sim.count("metals", "calls")
+        delay = sim.latency("metals")
+
+        def wrap(payload):
+            return {"data": payload} if cfg.get("nested") else payload
+
+        if sim.quota_exhausted("metals"):
+            sim.count("metals", "quota_429")
+            info = (
+                "Your monthly usage limit has been reached. Please upgrade your Subscription Plan."
+                if cfg.get("quota_kind", "monthly") == "monthly"
+                else "Too many requests in the last hour."
+            )
+            return self._send(200, wrap({"success": False, "error": {"code": 429, "type": "usage_limit_reached", "info": info}}), delay)
+        if sim.roll("metals", "error_rate"):
+            sim.count("metals", "errors")
+            return self._send(200, wrap({"success": False, "error": {"code": 500, "info": "internal"}}), delay)
+
+        base, symbols = q.get("base", "USD"), [s for s in q.get("symbols", "").split(",") if s]
+        if base != "USD":
+            rates = {"USD": round(sim.price(base), 6)}
+        else:
+            rates = {s: 1.0 / sim.price(s) for s in symbols}
+        return self._send(200, wrap({"success": True, "base": base, "rates": rates}), delay)
+
+    def twelve(self, q):
+        sim = self.sim
+        sim.count("twelve", "calls")
+        delay = sim.latency("twelve")
+        symbols = [s for s in q.get("symbol", "").split(",") if s]
+        if sim.quota_exhausted("twelve", len(symbols)):
+            sim.count("twelve", "quota_429")
+            return self._send(200, {
+                "code": 429, "status": "error",
+                "message": "You have run out of API credits for the day. Please wait for the next day.",
+            }, delay)
+        if sim.roll("twelve", "error_rate"):
+            sim.count("twelve", "errors")
+            return self._send(200, {"code": 500, "status": "error", "message": "internal error"}, delay)
+        items = {s: {"price": f"{sim.price(s):.6f}"} for s in symbols}
+        return self._send(200, items[symbols[0]] if len(symbols) == 1 else items, delay)
+
+    def telegram(self):
+        sim = self.sim
+        cfg = sim.cfg("telegram")
+        body = self._body()
+        recv = time.time()
+        sim.count("telegram", "calls")
+        delay = sim.latency("telegram")
+        if sim.quota_exhausted("telegram") or sim.roll("telegram", "rate_429"):
+            sim.count("telegram", "rate_429")
+            retry_after = int(cfg.get("retry_after", 1))
+            return self._send(429, {
+                "ok": False, "error_code": 429, "description": f"Too Many Requests: retry after {retry_after}",
+                "parameters": {"retry_after": retry_after},
+            }, delay)
+        if sim.roll("telegram", "error_rate"):
+            sim.count("telegram", "errors")
+            return self._send(500, {"ok": False, "error_code": 500, "description": "Internal Server Error"}, delay)
+        with sim.lock:
+            sim.telegram.append({"recv_ts": recv, "chat_id": body.get("chat_id"), "text": body.get("text", "")})
+        return self._send(200, {"ok": True, "result": {"message_id": len(sim.telegram)}}, delay)
+
+    # --- Routing -------------------------------------------------------
+    def do_GET(self):
+        url = urlparse(self.path)
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        sim = self.sim
+        if url.path == "/api/v3/simple/price":
+            return self.coingecko(q)
+        if url.path == "/api/latest":
+            return self.metals(q)
+        if url.path == "/price":
+            return self.twelve(q)
+        if url.path == "/_sim/prices":
+            with sim.lock:
+                return self._send(200, dict(sim.prices))
+        if url.path == "/_sim/telegram":
+            since = float(q.get("since", 0) or 0)
+            with sim.lock:
+                return self._send(200, [m for m in sim.telegram if m["recv_ts"] >= since])
+        if url.path == "/_sim/stats":
+            with sim.lock:
+                return self._send(200, {"stats": sim.stats, "used": sim.used})
+        return self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        sim = self.sim
+        if url.path.endswith("/sendMessage"):
+            return self.telegram()
+        body = self._body()
+        if url.path == "/_sim/price":
+            with sim.lock:
+                sim.prices[str(body["symbol"])] = float(body["price"])
+            return self._send(200, {"ok": True})
+        if url.path == "/_sim/scenario":
+            with sim.lock:
+                sim.scenario = body
+                sim.used.clear()
+            return self._send(200, {"ok": True})
+        return self._send(404, {"error": "not found"})
+
+
+def load_scenario(name: str) -> dict:
+    if name in SCENARIOS:
+        return SCENARIOS[name]
+    with open(name, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=9200)
+    ap.add_argument("--scenario", default="healthy", help=f"{', '.join(SCENARIOS)} oder JSON-Datei")
+    ap.add_argument("--vol", type=float, default=0.0002, help="Random-Walk Std.-Abw. pro Preisabfrage")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    Handler.sim = Sim(load_scenario(args.scenario), args.vol, args.seed)
+    srv = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"🧪 Provider-Simulator auf http://{args.host}:{args.port} (Szenario: {args.scenario})", flush=True)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,232 @@
+"""Offline-Replay/Backtest der Trade-Zustandsmaschine (TP1 -> TP2 -> TP3 / SL / BE).
+
+    python tools/replay.py --trades signals.csv --ticks ticks.csv --eps 0,0.00005,0.0002
+    python tools/replay.py --trades trades.json --ohlc btc_1m.csv --symbol BTCUSD
+
+Trades: CSV oder JSON-Liste mit symbol, side, entry, time (ISO oder Epoch);
+sl/tp1..tp3 optional (sonst wie im Webhook per calc_sl/calc_tp berechnet).
+Ticks: CSV mit Kopfzeile ts,symbol,price; OHLC: ts,open,high,low,close
+(symbol-Spalte optional, sonst --symbol). Innerhalb einer Kerze wird der Pfad
+open -> low -> high -> close (grüne Kerze) bzw. open -> high -> low -> close
+angenommen. Die Datei wird per mmap in Blöcken gelesen, pro Tick werden über
+TriggerIndex nur Trades mit gekreuzten Levels ausgewertet; alle EPS-Varianten
+laufen in einem Durchgang.
+"""
+import argparse
+import csv
+import json
+import mmap
+import os
+import sys
+import time
+from collections import Counter
+
+os.environ.setdefault("RUN_MONITOR", "0")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import main  # noqa: E402
+
+CHUNK_BYTES = 8 << 20
+
+
+def parse_ts(raw) -> float:
+    try:
+        v = float(raw)
+        return v / 1000.0 if v > 1e11 else v
+    except (TypeError, ValueError):
+        pass
+    dt = main.parse_iso_utc(str(raw))
+    if dt is None:
+        raise ValueError(f"Zeitstempel nicht lesbar: {raw!r}")
+    return dt.timestamp()
+
+
+def load_trades(path: str):
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+    else:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+
+    trades = []
+    for r in rows:
+        symbol = main.normalize_symbol_tv(r.get("symbol", ""))
+        side = main.normalize_side(r.get("side"))
+        entry = main.parse_float(r.get("entry"))
+        when = r.get("time") or r.get("created_at")
+        if not symbol or side not in {"long", "short"} or not entry or not when:
+            continue
+        sl = main.parse_float(r.get("sl")) or main.calc_sl(entry, side)
+        tps = main.calc_tp(entry, sl, side, symbol)
+        levels = [main.parse_float(r.get(k)) or tps[i] for i, k in enumerate(("tp1", "tp2", "tp3"))]
+        trades.append({
+            "symbol": symbol, "side": side, "entry": entry, "sl": sl,
+            "tp1": levels[0], "tp2": levels[1], "tp3": levels[2],
+            "opened_ts": parse_ts(when),
+        })
+    trades.sort(key=lambda t: t["opened_ts"])
+    return trades
+
+
+def iter_rows(path: str):
+    # mmap + Blöcke bis zum letzten Zeilenumbruch: konstanter Speicher, keine
+    # Python-Zeilenobjekte für die ganze Datei
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            pos = 0
+            while pos < size:
+                end = min(size, pos + CHUNK_BYTES)
+                if end < size:
+                    nl = mm.rfind(b"\n", pos, end)
+                    end = nl + 1 if nl >= pos else (mm.find(b"\n", end) + 1 or size)
+                for line in mm[pos:end].splitlines():
+                    if line.strip():
+                        yield line.split(b",")
+                pos = end
+
+
+def iter_ticks(path: str, ohlc: bool, default_symbol: str):
+    rows = iter_rows(path)
+    header = [h.strip().decode().lower() for h in next(rows, [])]
+    col = {name: i for i, name in enumerate(header)}
+    ts_i = next((col[k] for k in ("ts", "time", "timestamp", "date") if k in col), 0)
+    sym_i = col.get("symbol")
+    if sym_i is None and not default_symbol:
+        raise SystemExit("Keine symbol-Spalte: --symbol angeben")
+
+    if ohlc:
+        o_i, h_i, l_i, c_i = (col[k] for k in ("open", "high", "low", "close"))
+    else:
+        p_i = col.get("price", col.get("close", 1))
+
+    last_ts_raw, last_ts = None, 0.0
+    for r in rows:
+        symbol = r[sym_i].strip().decode().upper() if sym_i is not None else default_symbol
+        raw = r[ts_i]
+        if raw != last_ts_raw:
+            last_ts_raw, last_ts = raw, parse_ts(raw.decode())
+        if not ohlc:
+            yield last_ts, symbol, float(r[p_i])
+            continue
+        o, h, lo, c = float(r[o_i]), float(r[h_i]), float(r[l_i]), float(r[c_i])
+        for p in ((o, lo, h, c) if c >= o else (o, h, lo, c)):
+            yield last_ts, symbol, p
+
+
+class Replay:
+    # Ein Durchlauf pro EPS-Wert; teilt sich die Trade-Liste, hat eigene Zustände
+    def __init__(self, trades, eps_pct: float):
+        self.trades = trades
+        self.eps_pct = eps_pct
+        self.state = [{"side": t["side"], "entry": t["entry"], "sl": t["sl"], "tp1": t["tp1"], "tp2": t["tp2"], "tp3": t["tp3"]} for t in trades]
+        self.flags = [0] * len(trades)
+        self.reason = [None] * len(trades)
+        self.closed_ts = [None] * len(trades)
+        self.index = {}
+        self.evaluations = 0
+
+    def _step(self, row: int, price: float, ts: float):
+        self.evaluations += 1
+        t = self.trades[row]
+        flags, events, reason = main.trade_transition(
+            t["side"], (t["entry"], t["sl"], t["tp1"], t["tp2"], t["tp3"]), self.flags[row], price, self.eps_pct
+        )
+        if not events:
+            return False
+        self.flags[row] = flags
+        main.apply_trade_state(self.state[row], flags, reason)
+        if reason:
+            self.reason[row] = reason
+            self.closed_ts[row] = ts
+        return True
+
+    def open_trade(self, row: int, price: float, ts: float):
+        self._step(row, price, ts)
+        idx = self.index.setdefault(self.trades[row]["symbol"], main.TriggerIndex(self.eps_pct))
+        idx.add(row, self.state[row])
+        # Eröffnungspreis als Referenz, sonst zählt erst der übernächste Tick
+        idx.last_price = price
+
+    def tick(self, symbol: str, price: float, ts: float):
+        idx = self.index.get(symbol)
+        if idx is None:
+            return
+        if idx.last_price is not None:
+            for row in idx.crossed(idx.last_price, price):
+                if self._step(row, price, ts):
+                    idx.remove(row)
+                    idx.add(row, self.state[row])
+        idx.last_price = price
+
+    def summary(self):
+        reasons = Counter(r or "open" for r in self.reason)
+        hours = [(c - t["opened_ts"]) / 3600 for t, c in zip(self.trades, self.closed_ts) if c is not None]
+        n = len(self.trades) or 1
+        return {
+            "eps_pct": self.eps_pct,
+            "trades": len(self.trades),
+            "close_reason": dict(reasons),
+            "close_reason_pct": {k: round(v * 100.0 / n, 1) for k, v in reasons.items()},
+            "tp1_rate_pct": round(sum(1 for f in self.flags if f & main.TRADE_TP1) * 100.0 / n, 1),
+            "tp2_rate_pct": round(sum(1 for f in self.flags if f & main.TRADE_TP2) * 100.0 / n, 1),
+            "avg_hours_to_close": round(sum(hours) / len(hours), 2) if hours else None,
+            "evaluations": self.evaluations,
+        }
+
+
+def run(trades, ticks, eps_values):
+    runs = [Replay(trades, eps) for eps in eps_values]
+    pending = {}  # Symbol -> Trades, die auf ihren ersten Tick warten
+    nxt = 0
+    n_ticks = 0
+    for ts, symbol, price in ticks:
+        n_ticks += 1
+        while nxt < len(trades) and trades[nxt]["opened_ts"] <= ts:
+            pending.setdefault(trades[nxt]["symbol"], []).append(nxt)
+            nxt += 1
+        for r in runs:
+            r.tick(symbol, price, ts)
+        rows = pending.pop(symbol, None)
+        if rows:
+            for r in runs:
+                for row in rows:
+                    r.open_trade(row, price, ts)
+    return runs, n_ticks
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--trades", required=True, help="CSV oder JSON mit Signalen/Trades")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--ticks", help="CSV ts,symbol,price")
+    src.add_argument("--ohlc", help="CSV ts,open,high,low,close[,symbol]")
+    ap.add_argument("--symbol", default="", help="Symbol, falls die Datei keine symbol-Spalte hat")
+    ap.add_argument("--eps", default=str(main.TRIGGER_EPS_PCT), help="kommagetrennte TRIGGER_EPS_PCT-Werte")
+    ap.add_argument("--json", action="store_true", help="Ergebnis als JSON")
+    args = ap.parse_args()
+
+    trades = load_trades(args.trades)
+    eps_values = [float(x) for x in args.eps.split(",") if x.strip()]
+    t0 = time.perf_counter()
+    ticks = iter_ticks(args.ticks or args.ohlc, bool(args.ohlc), args.symbol.upper())
+    runs, n_ticks = run(trades, ticks, eps_values)
+    elapsed = time.perf_counter() - t0
+
+    result = {"ticks": n_ticks, "seconds": round(elapsed, 3), "runs": [r.summary() for r in runs]}
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+
+    print(f"Trades={len(trades)} Ticks={n_ticks} Zeit={elapsed:.2f}s ({n_ticks / max(elapsed, 1e-9):,.0f} Ticks/s)")
+    for s in result["runs"]:
+        reasons = "  ".join(f"{k}={v} ({s['close_reason_pct'][k]}%)" for k, v in sorted(s["close_reason"].items()))
+        print(f"EPS {s['eps_pct']:<10g} {reasons}  TP1={s['tp1_rate_pct']}% TP2={s['tp2_rate_pct']}%  Ø {s['avg_hours_to_close']} h bis Close")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())